@@ -1,6 +1,5 @@
 """Russian fairy tail example - trying to extract sentence structure"""
 
-import re
 from tokema import *
 from tokema.utils import benchmark
 
@@ -57,33 +56,24 @@ WORDS = <WORDS> <WORD>
 WORDS = <WORD>
 """
 
-# Tokenization regex
-TOKEN_PATTERN = re.compile(
-    r'[^\W\d_]+|'   # any alphabetical and non-numeric
-    r'\d+|'                                  # or digit
-    r'[:";\'!@#$%^&*()<>?,./[\]{}\\|\-_+=]'  # or symbol
-)
-
-
-def tokenize(text: str):
-    for match in TOKEN_PATTERN.finditer(text):
-        yield match.group(0)
-    yield EOF_TOKEN
-
 
 if __name__ == '__main__':
     rules = parse_rules_from_string(GRAMMAR)
 
     # add all words (longer than 3 symbols) to rule set
-    for t in tokenize(TEXT):
-        if isinstance(t, str) and len(t) >= 3:
-            rules.append(Rule('WORD', (TextQuery(t), )))
+    for t in iter_tokens(TEXT):
+        if len(t) >= 3:
+            rules.append(Rule('WORD', (TextQuery(str(t)), )))
 
     with benchmark('Table construction'):
         table = build_text_parsing_table(rules, verbose=True)
 
     with benchmark('Parsing'):
-        result = parse(tokenize(TEXT), table, root_production='DOC', verbose=False, beam_limit=20)
+        result = parse(iter_tokens(TEXT, add_eof=True), table, root_production='DOC', verbose=False, beam_limit=20)
 
     for n in result:
         print_parse_node(n)
+
+        # Tokens carry character offsets, so parsed nodes can be mapped back to the source
+        start, end = n[0].span
+        print(f'Sentences span characters {start}..{end} of the text')
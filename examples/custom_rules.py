@@ -3,25 +3,6 @@ from tokema import *
 from tokema.utils import benchmark
 
 
-class StemmerResolver(Resolver):
-    """Additional resolver that will try to use stemmed text for reverse index lookups"""
-
-    def __init__(self, stemmer: Stemmer):
-        self.index = {}
-        self.stemmer = stemmer
-
-    def add_query(self, query: TerminalQuery, doc):
-        if isinstance(query, TextQuery):
-            s = self.stemmer.stemWord(query.text)
-            self.index[s] = doc
-
-    def resolve(self, token):
-        if isinstance(token, str):
-            s = self.stemmer.stemWord(token)
-            return self.index.get(s)
-        return None
-
-
 class ExtendedRule(Rule):
     """Custom rule that holds metadata"""
     def __init__(self, production: str, queries, metadata):
@@ -85,11 +66,16 @@ def main():
         rule('prop = баня'),
     ]
 
-    stemmer = Stemmer('russian')
-    stemmer_resolver = StemmerResolver(stemmer)
+    # Stemmed text is used for reverse index lookups, tokens are stemmed once by the table
+    normalizer = default_normalizer(stem=Stemmer('russian').stemWord)
+    stemmer_resolver = NormalizedTextResolver(form='stem')
 
     with benchmark('Table construction'):
-        parsing_table = build_text_parsing_table(rules, additional_resolvers=[stemmer_resolver])
+        parsing_table = build_text_parsing_table(
+            rules,
+            additional_resolvers=[stemmer_resolver],
+            normalizer=normalizer
+        )
     print()
 
     samples = [
@@ -0,0 +1,42 @@
+"""Parses a long document by sentences in a pool of worker processes"""
+
+import os
+from tokema import *
+from tokema.utils import benchmark
+
+from complex_text import TEXT, GRAMMAR
+
+REPEATS = 20
+
+
+if __name__ == '__main__':
+    rules = parse_rules_from_string(GRAMMAR)
+    for t in iter_tokens(TEXT):
+        if len(t) >= 3:
+            rules.append(Rule('WORD', (TextQuery(str(t)), )))
+    table = build_text_parsing_table(rules)
+
+    # Sentences are parsed independently, their parses are tokens of the top-level grammar
+    combine_table = build_parsing_table(
+        [Rule('DOC', (RepeatQuery(ProductionQuery('S')), EofQuery()))],
+        [ProductionResolver(), EofResolver()]
+    )
+
+    segments = split_segments(iter_tokens(TEXT * REPEATS, add_eof=True), boundaries='.!?:')
+    print(f'Parsing {sum(len(s) for s in segments)} tokens in {len(segments)} segments')
+
+    with benchmark('Single process'):
+        expected = parse_document(segments, table, root_production='S', beam_limit=20)
+
+    with benchmark(f'{os.cpu_count()} processes'):
+        result = parse_document(
+            segments, table, workers=os.cpu_count(), root_production='S', beam_limit=20
+        )
+    assert [str(p) for p in result] == [str(p) for p in expected]
+
+    doc = parse_document(
+        segments, table, combine_table=combine_table, combine_root='DOC',
+        root_production='S', beam_limit=20
+    )
+    sentences = doc[0][0]
+    print(f'{len(sentences)} sentences, the last one spans characters {sentences[-1].value.span}')
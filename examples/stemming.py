@@ -3,26 +3,12 @@ from Stemmer import Stemmer
 from tokema import *
 
 
-class StemmerResolver(Resolver):
-    """Additional resolver that will try to use stemmed text for reverse index lookups"""
+# Tokens are casefolded, normalized and stemmed once per token by the table,
+# stemming results are memoized
+normalizer = default_normalizer(stem=Stemmer('russian').stemWord)
 
-    def __init__(self, stemmer: Stemmer):
-        self.index = {}
-        self.stemmer = stemmer
-
-    def add_query(self, query: TerminalQuery, doc):
-        if isinstance(query, TextQuery):
-            s = self.stemmer.stemWord(query.text)
-            self.index[s] = doc
-
-    def resolve(self, token):
-        if isinstance(token, str):
-            s = self.stemmer.stemWord(token)
-            return self.index.get(s)
-        return None
-
-
-stemmer_resolver = StemmerResolver(Stemmer('russian'))
+# Additional resolver that uses stemmed text for reverse index lookups
+stemmer_resolver = NormalizedTextResolver(form='stem')
 
 rules = parse_rules_from_string("""
 SENTENCE = <WORDS> .
@@ -35,7 +21,11 @@ WORD = другой
 WORD = это
 """)
 
-table = build_text_parsing_table(rules, additional_resolvers=[stemmer_resolver])
+table = build_text_parsing_table(
+    rules,
+    additional_resolvers=[stemmer_resolver],
+    normalizer=normalizer
+)
 
 text = 'эти слова а еще и другие слова которые другим словом - слово .'
 
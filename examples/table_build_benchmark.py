@@ -0,0 +1,45 @@
+"""Build time and peak memory of the parsing table of a large generated grammar"""
+
+import random
+import tracemalloc
+
+from tokema import *
+from tokema.utils import benchmark
+
+RULES = 50000
+WORDS = 100
+
+
+def generate_rules(rule_count: int = RULES, seed: int = 0):
+    """Rules of a tree of productions, each referencing its child productions and words,
+    like the layers of a hand-written grammar
+    """
+    rnd = random.Random(seed)
+    production_count = rule_count // 10
+    rules = [Rule('ROOT', (ReferenceQuery('P0'), ))]
+    while len(rules) < rule_count:
+        production = len(rules) % production_count
+        children = range(production * 4 + 1, min(production * 4 + 5, production_count))
+        queries = []
+        for _ in range(rnd.randint(1, 4)):
+            if children and rnd.random() < 0.3:
+                queries.append(ReferenceQuery(f'P{rnd.choice(children)}'))
+            else:
+                queries.append(TextQuery(f'w{rnd.randrange(WORDS)}'))
+        rules.append(Rule(f'P{production}', tuple(queries)))
+    return rules
+
+
+if __name__ == '__main__':
+    rules = generate_rules()
+    print(f'{len(rules)} rules')
+
+    with benchmark('Table build'):
+        table = build_parsing_table(rules, [ExactTextResolver()])
+
+    tracemalloc.start()
+    with benchmark('Automaton build with allocation tracing'):
+        states, actions = measure_automaton(rules)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{states} states, {actions} actions, peak memory {peak / 1024 / 1024:.2f} MB')
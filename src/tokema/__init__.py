@@ -3,3 +3,15 @@ from .grammar import *
 from .table import *
 from .text import *
 from .eof import *
+from .vocab import *
+from .analysis import *
+from .optimize import *
+from .cache import *
+from .incremental import *
+from .profiler import *
+from .strindex import *
+from .normalize import *
+from .trie import *
+from .adaptive import *
+from .compact import *
+from .document import *
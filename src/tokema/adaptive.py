@@ -0,0 +1,173 @@
+"""Adaptive ordering of table resolvers based on observed hit rates and costs
+
+Table resolves a token by calling resolvers one by one until one accepts it,
+so resolvers that rarely accept tokens or are expensive waste time when placed early.
+With adaptive ordering enabled (see `ParsingTable.enable_adaptive_order`) every
+`sample_interval`-th token is passed to all resolvers in the declared order to measure
+acceptance probability and cost of each resolver. Every `interval` tokens resolvers
+are reordered to minimize expected resolution time.
+
+Reordering never changes which resolver accepts a token: resolvers that are able to accept
+the same token keep their declared order. Two resolvers are swapped only if their
+`Resolver.token_types` are unrelated (i.e. text resolvers and `EofResolver`) or if they
+are declared `disjoint`. Resolvers of the same token type (text, int, float, regex and prefix
+resolvers all accept strings) are never swapped unless declared disjoint, and declared
+disjoint resolvers observed accepting the same sampled token get their declared order back.
+"""
+
+import time
+from typing import List, Iterable, Set, Tuple, Optional, Dict, Any, TYPE_CHECKING
+
+from .table import Resolver, Action
+from .profiler import ResolverStats
+
+if TYPE_CHECKING:
+    from .table import ParsingTable
+
+__all__ = [
+    'AdaptiveResolverOrder'
+]
+
+
+class AdaptiveResolverOrder:
+    """Resolution order of table resolvers adapted to the observed tokens
+
+    :param resolvers: Resolvers in the declared order
+    :param priority: Resolvers that always go first in the declared order
+    :param disjoint: Groups of resolvers that never accept the same token,
+        resolvers of a group can be swapped with each other
+    :param interval: Number of resolved tokens between reorderings
+    :param sample_interval: Every `sample_interval`-th token is passed to all resolvers
+    """
+
+    def __init__(
+            self,
+            resolvers: List[Resolver],
+            priority: Iterable[Resolver] = (),
+            disjoint: Iterable[Iterable[Resolver]] = (),
+            interval: int = 4096,
+            sample_interval: int = 16
+    ):
+        self.resolvers = list(resolvers)
+        priority_ids = {id(r) for r in priority}
+        self.priority = [r for r in self.resolvers if id(r) in priority_ids]
+        self.interval = interval
+        self.sample_interval = sample_interval
+
+        # Measured on sampled tokens only, by declared resolver index
+        self.stats: List[ResolverStats] = [ResolverStats(r) for r in self.resolvers]
+
+        self.order: List[Resolver] = list(self.resolvers)
+        self.reorders = 0
+        self._tokens = 0
+        self._index: Dict[int, int] = {id(r): i for i, r in enumerate(self.resolvers)}
+
+        declared: Set[Tuple[int, int]] = set()
+        for group in disjoint:
+            indices = sorted(self._index[id(r)] for r in group)
+            declared.update((i, j) for k, i in enumerate(indices) for j in indices[k + 1:])
+
+        # Pairs of declared indices (i < j) of resolvers that may accept the same token,
+        # extended by the pairs observed accepting the same sampled token
+        self.overlaps: Set[Tuple[int, int]] = {
+            (i, j)
+            for j, b in enumerate(self.resolvers)
+            for i, a in enumerate(self.resolvers[:j])
+            if (i, j) not in declared and not _disjoint_types(a, b)
+        }
+
+    def resolve(self, table: 'ParsingTable', input_token) -> Tuple[Optional[Dict[int, Action]], Any]:
+        """Same as `ParsingTable.resolve`, calling resolvers in the adapted order"""
+        self._tokens += 1
+        if self._tokens % self.sample_interval == 1 or self.sample_interval == 1:
+            entry = self._sample(table, input_token)
+        else:
+            entry = None
+            if table.normalizer is None:
+                for resolver in self.order:
+                    entry = resolver.resolve(input_token)
+                    if entry is not None:
+                        break
+            else:
+                forms = table.normalizer.token_forms(input_token) \
+                    if isinstance(input_token, str) else None
+                for resolver in self.order:
+                    form = getattr(resolver, 'form', None)
+                    entry = resolver.resolve(
+                        input_token if form is None or forms is None else forms[form]
+                    )
+                    if entry is not None:
+                        break
+
+        if self._tokens % self.interval == 0:
+            self.reorder()
+
+        if entry is None:
+            return None, None
+        if isinstance(entry, tuple):
+            return entry
+        return entry, None
+
+    def _sample(self, table: 'ParsingTable', input_token):
+        """Calls all resolvers measuring them, returns the entry of the first declared match"""
+        stats = self.stats
+        first = None
+        hits = []
+        perf_counter = time.perf_counter
+        for i, (resolver, resolver_input) in enumerate(table.iter_resolver_inputs(input_token)):
+            started = perf_counter()
+            entry = resolver.resolve(resolver_input)
+            stats[i].time += perf_counter() - started
+            stats[i].calls += 1
+            if entry is not None:
+                stats[i].hits += 1
+                hits.append(i)
+                if first is None:
+                    first = entry
+
+        new_overlaps = [(i, j) for k, i in enumerate(hits) for j in hits[k + 1:]
+                        if (i, j) not in self.overlaps]
+        if new_overlaps:
+            self.overlaps.update(new_overlaps)
+            self.reorder()
+        return first
+
+    def reorder(self):
+        """Orders non-priority resolvers by the hit probability per unit of cost, highest first,
+        keeping the declared order of the resolvers that may accept the same token
+        """
+        self.reorders += 1
+        priority_ids = {id(r) for r in self.priority}
+        pending = [i for i, r in enumerate(self.resolvers) if id(r) not in priority_ids]
+
+        def _score(i: int) -> float:
+            s = self.stats[i]
+            if not s.calls:
+                return 0.0
+            cost = s.time / s.calls
+            return (s.hits / s.calls) / cost if cost > 0 else float('inf')
+
+        order = list(self.priority)
+        while pending:
+            # Resolvers without pending declared predecessors they overlap with
+            available = [
+                i for i in pending
+                if not any((j, i) in self.overlaps for j in pending if j < i)
+            ]
+            best = max(available, key=lambda i: (_score(i), -i))
+            pending.remove(best)
+            order.append(self.resolvers[best])
+        self.order = order
+
+    def __repr__(self):
+        names = ', '.join(r.__class__.__name__ for r in self.order)
+        return f'<{self.__class__.__name__} [{names}]>'
+
+
+def _disjoint_types(a: Resolver, b: Resolver) -> bool:
+    """Whether the resolvers accept tokens of unrelated types only"""
+    a_types = getattr(a, 'token_types', None)
+    b_types = getattr(b, 'token_types', None)
+    if a_types is None or b_types is None:
+        return False
+    return not any(issubclass(x, y) or issubclass(y, x) for x in a_types for y in b_types)
@@ -0,0 +1,257 @@
+"""Grammar analysis and corpus prefiltering
+
+Every derivation of a production contains some terminals, for example
+any `loan` must contain at least one of the loan keywords.
+Such conditions are computed as a conjunction of clauses, where each clause is a set of terminal
+queries at least one of which must match some token of the input.
+Inputs violating any of the clauses are rejected without running the parser.
+"""
+
+from typing import List, FrozenSet, Optional, Dict, Iterable, Iterator, Tuple, Sequence
+
+from .grammar import Rule, TerminalQuery, ReferenceQuery, expand_repetitions
+from .table import ParsingTable, MergedEntry
+from .vocab import Vocabulary
+
+__all__ = [
+    'necessary_terminals',
+    'Prefilter',
+    'PrefilterStats'
+]
+
+
+Clause = FrozenSet[TerminalQuery]
+
+
+def _absorb(clauses: Iterable[Clause], max_clauses: int) -> List[Clause]:
+    """Removes duplicates and clauses implied by smaller ones,
+    keeps only `max_clauses` strongest (smallest) clauses
+    """
+    result: List[Clause] = []
+    for clause in sorted(set(clauses), key=len):
+        if not any(c <= clause for c in result):
+            result.append(clause)
+    return result[:max_clauses]
+
+
+def _disjunction(a: List[Clause], b: List[Clause], max_clauses: int) -> List[Clause]:
+    return _absorb((x | y for x in a for y in b), max_clauses)
+
+
+def necessary_terminals(
+        rules: List[Rule],
+        production: str = 'ROOT',
+        max_clauses: int = 16,
+        max_iterations: int = 1000
+) -> List[Clause]:
+    """Computes sets of terminal queries necessary for any derivation of `production`
+
+    Each returned clause is a set of queries at least one of which is present in every derivation.
+    Empty list means no condition is known (any input is possible).
+    List containing an empty clause means that production can't be derived at all.
+
+    :param rules: Grammar rules
+    :param production: Production to analyze
+    :param max_clauses: Maximum number of clauses kept per production
+    :param max_iterations: Fixpoint iterations limit, no conditions are returned if reached
+    """
+    productions: Dict[str, List[Rule]] = {}
+    for rule in expand_repetitions(rules):
+        productions.setdefault(rule.production, []).append(rule)
+
+    # None - production is not derivable (yet)
+    conditions: Dict[str, Optional[List[Clause]]] = {p: None for p in productions}
+
+    for _ in range(max_iterations):
+        changed = False
+        for name, alternatives in productions.items():
+            combined: Optional[List[Clause]] = None
+            for rule in alternatives:
+                rule_clauses: Optional[List[Clause]] = []
+                for query in rule.queries:
+                    if isinstance(query, ReferenceQuery):
+                        query_clauses = conditions.get(query.reference)
+                        if query_clauses is None:
+                            # Rule refers to a production that is not derivable
+                            rule_clauses = None
+                            break
+                        rule_clauses.extend(query_clauses)
+                    else:
+                        rule_clauses.append(frozenset((query, )))
+
+                if rule_clauses is None:
+                    continue
+
+                rule_clauses = _absorb(rule_clauses, max_clauses)
+                if combined is None:
+                    combined = rule_clauses
+                else:
+                    combined = _disjunction(combined, rule_clauses, max_clauses)
+
+            if combined != conditions[name]:
+                conditions[name] = combined
+                changed = True
+
+        if not changed:
+            break
+    else:
+        return []
+
+    clauses = conditions.get(production)
+    if clauses is None:
+        return [frozenset()]
+    return clauses
+
+
+class PrefilterStats:
+    """Prefilter counters
+
+    :param checked: Number of inputs checked
+    :param rejected: Number of inputs rejected without parsing
+    """
+    __slots__ = 'checked', 'rejected'
+
+    def __init__(self):
+        self.checked = 0
+        self.rejected = 0
+
+    @property
+    def accepted(self) -> int:
+        return self.checked - self.rejected
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of inputs rejected by the prefilter (parsing avoided)"""
+        if not self.checked:
+            return 0.0
+        return self.rejected / self.checked
+
+    def reset(self):
+        self.checked = 0
+        self.rejected = 0
+
+    def __str__(self):
+        return f'checked: {self.checked}, rejected: {self.rejected}, hit rate: {self.hit_rate:.2%}'
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {self}>'
+
+
+class Prefilter:
+    """Rejects inputs that can't produce a parse of the root production
+
+    Uses conditions computed by `necessary_terminals` and resolves tokens with the table
+    the same way parser does.
+
+    :param table: Parsing table
+    :param root_production: Production which parses are looked for
+    :param rules: Grammar rules, rules of the table by default
+    :param max_clauses: Maximum number of clauses checked
+    """
+
+    def __init__(
+            self,
+            table: ParsingTable,
+            root_production: str = 'ROOT',
+            rules: Optional[List[Rule]] = None,
+            max_clauses: int = 16
+    ):
+        self.table = table
+        self.root_production = root_production
+        self.clauses = necessary_terminals(
+            rules if rules is not None else table.rules,
+            production=root_production,
+            max_clauses=max_clauses
+        )
+        self.stats = PrefilterStats()
+
+        self._full_mask = (1 << len(self.clauses)) - 1
+
+        # Clauses as sets of entry ids, token satisfies a clause if it resolves to one of entries
+        # or to an entry merged from one of them (see `MergedEntry`)
+        self._clause_entries: List[FrozenSet[int]] = []
+        self._version = None
+
+        # Per vocabulary token id bitmasks of satisfied clauses
+        self._vocabulary: Optional[Vocabulary] = None
+        self._masks: List[int] = []
+
+        self._update_clause_entries()
+
+    def accepts(self, tokens: Iterable) -> bool:
+        """Checks whether the tokens may produce a root parse"""
+        self._update_clause_entries()
+        remaining = self._clause_entries
+        if remaining:
+            resolve = self.table.resolve
+            for token in tokens:
+                entry, _ = resolve(token)
+                if entry is not None:
+                    entry_ids = _entry_ids(entry)
+                    remaining = [c for c in remaining if c.isdisjoint(entry_ids)]
+                    if not remaining:
+                        break
+        return self._count(not remaining)
+
+    def accepts_encoded(self, token_ids: Iterable[int], vocabulary: Vocabulary) -> bool:
+        """Checks whether the tokens encoded by `vocabulary` may produce a root parse"""
+        masks = self._get_masks(vocabulary)
+        full_mask = self._full_mask
+        mask = 0
+        for token_id in set(token_ids):
+            mask |= masks[token_id]
+            if mask == full_mask:
+                break
+        return self._count(mask == full_mask)
+
+    def filter(self, corpus: Iterable[Sequence]) -> Iterator[Tuple[int, Sequence]]:
+        """Yields (index, tokens) of the documents in the corpus that may produce a root parse"""
+        for i, tokens in enumerate(corpus):
+            if self.accepts(tokens):
+                yield i, tokens
+
+    def _count(self, accepted: bool) -> bool:
+        self.stats.checked += 1
+        if not accepted:
+            self.stats.rejected += 1
+        return accepted
+
+    def _update_clause_entries(self):
+        """Collects clause entries again if the table has changed (i.e. was frozen or compacted),
+        the ids of the replaced entries don't match the ones tokens resolve to
+        """
+        table = self.table
+        if self._version == table.version:
+            return
+        self._clause_entries = []
+        for clause in self.clauses:
+            entries = (table.get_entry(q) for q in clause)
+            self._clause_entries.append(frozenset(id(e) for e in entries if e is not None))
+        self._version = table.version
+        self._vocabulary = None
+
+    def _get_masks(self, vocabulary: Vocabulary) -> List[int]:
+        self._update_clause_entries()
+        if vocabulary.refresh() or vocabulary is not self._vocabulary:
+            self._vocabulary = vocabulary
+            self._masks = []
+
+        masks = self._masks
+        entries = vocabulary.entries
+        for token_id in range(len(masks), len(entries)):
+            entry = entries[token_id]
+            mask = 0
+            if entry is not None:
+                entry_ids = _entry_ids(entry)
+                for i, clause in enumerate(self._clause_entries):
+                    if not clause.isdisjoint(entry_ids):
+                        mask |= 1 << i
+            masks.append(mask)
+        return masks
+
+
+def _entry_ids(entry) -> Tuple[int, ...]:
+    """Ids of the query entries the token resolved to the `entry` matches"""
+    if isinstance(entry, MergedEntry):
+        return tuple(id(e) for e in entry.sources)
+    return (id(entry), )
@@ -0,0 +1,119 @@
+"""Bounded LRU cache of parse results
+
+Repeated identical inputs (greetings, canned button texts, ...) are parsed once,
+subsequent parses of the same tokens with the same options return shared results.
+Cached parse trees are frozen (node arguments are stored as tuples), so they can be
+safely shared between callers.
+
+Cache is attached to a table (see `ParsingTable.enable_cache`) and is invalidated
+automatically when actions or gotos are added to the table.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Hashable, Any, Optional, Tuple
+
+__all__ = [
+    'ResultCache',
+    'CacheStats'
+]
+
+
+class CacheStats:
+    """Result cache counters
+
+    :param hits: Number of lookups served from the cache
+    :param misses: Number of lookups that required parsing
+    :param evictions: Number of results dropped because of the size limit
+    :param invalidations: Number of times the cache was cleared because the table has changed
+    """
+    __slots__ = 'hits', 'misses', 'evictions', 'invalidations'
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache"""
+        if not self.lookups:
+            return 0.0
+        return self.hits / self.lookups
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __str__(self):
+        return (f'hits: {self.hits}, misses: {self.misses}, evictions: {self.evictions}, '
+                f'invalidations: {self.invalidations}, hit rate: {self.hit_rate:.2%}')
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {self}>'
+
+
+class ResultCache:
+    """Thread-safe LRU mapping of (tokens, options) to parse results
+
+    Results are bound to the table version they were computed with,
+    lookup with another version clears the cache.
+
+    :param max_size: Maximum number of cached inputs
+    """
+
+    def __init__(self, max_size: int = 1024):
+        if max_size <= 0:
+            raise ValueError('Cache size should be positive')
+        self.max_size = max_size
+        self.stats = CacheStats()
+        self._version: Optional[int] = None
+        self._items: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key: Hashable, version: int) -> Tuple[bool, Any]:
+        """Returns (found, value) for the key computed with the table `version`"""
+        with self._lock:
+            self._check_version(version)
+            try:
+                value = self._items[key]
+            except KeyError:
+                self.stats.misses += 1
+                return False, None
+            self._items.move_to_end(key)
+            self.stats.hits += 1
+            return True, value
+
+    def put(self, key: Hashable, value: Any, version: int):
+        """Stores value computed with the table `version`, evicting the least recently used"""
+        with self._lock:
+            self._check_version(version)
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def _check_version(self, version: int):
+        if version != self._version:
+            if self._items:
+                self._items.clear()
+                self.stats.invalidations += 1
+            self._version = version
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {len(self)}/{self.max_size} ({self.stats})>'
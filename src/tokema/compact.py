@@ -0,0 +1,369 @@
+"""Offline compaction of built parsing tables
+
+Action table is stored as an action entry (state -> action mapping) per terminal query.
+Entries are mostly redundant: a reducing state has the same reduction in every entry
+and shifts are sparse. `compact_table` rewrites a built table in place:
+
+* equivalent states (same actions and gotos leading to equivalent states) are merged;
+* the most common action of each state becomes its default, entries keep only
+  the actions different from defaults and identical entries are shared;
+* entries are packed into shared arrays with row displacement (comb vector) encoding,
+  so an entry is a small `PackedRow` view with the same `get(state)` interface as a dict;
+* identical goto rows are shared.
+
+Compacted table is read-only. Resolvers have to support `Resolver.replace_entries`
+to receive the packed entries. Objects holding action entries of the table
+(i.e. `tokema.vocab.Vocabulary` or `tokema.analysis` prefilters) should be created
+after the compaction.
+"""
+
+import sys
+from array import array
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Mapping, Hashable
+
+from .table import ParsingTable, Action, ShiftToStateAction, ReduceByRuleAction, _replaces_entries
+
+__all__ = [
+    'PackedRow',
+    'CompactionReport',
+    'compact_table'
+]
+
+
+_MISSING = object()
+
+
+class PackedRow(Mapping):
+    """Read-only action entry (state -> action mapping) packed into arrays shared by all entries
+    of the table
+
+    Action of the state is stored at `base + state` if the `check` array holds the row id there,
+    otherwise the state has the default action.
+    """
+    __slots__ = 'row', 'base', 'check', 'values', 'defaults', 'actions'
+
+    def __init__(
+            self,
+            row: int,
+            base: int,
+            check: array,
+            values: array,
+            defaults: array,
+            actions: List[Action]
+    ):
+        self.row = row
+        self.base = base
+        self.check = check
+        self.values = values
+        self.defaults = defaults
+        self.actions = actions
+
+    def get(self, state, default=None):
+        # Negative states (i.e. states of nodes without goto) would index from the end
+        if not isinstance(state, int) or state < 0:
+            return default
+        try:
+            i = self.base + state
+            value = self.values[i] if self.check[i] == self.row else self.defaults[state]
+        except IndexError:
+            return default
+        if value < 0:
+            return default
+        return self.actions[value]
+
+    def __getitem__(self, state) -> Action:
+        action = self.get(state, _MISSING)
+        if action is _MISSING:
+            raise KeyError(state)
+        return action
+
+    def __iter__(self) -> Iterator[int]:
+        for state in range(len(self.defaults)):
+            if self.get(state) is not None:
+                yield state
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {self.row} at {self.base}>'
+
+
+class CompactionReport:
+    """Statistics of `compact_table`, sizes are measured with `sys.getsizeof`"""
+
+    def __init__(self):
+        self.states_before = 0
+        self.states_after = 0
+        self.entries = 0
+        self.distinct_entries = 0
+        self.packed_size = 0
+        self.bytes_before = 0
+        self.bytes_after = 0
+
+    @property
+    def states_saved(self) -> int:
+        return self.states_before - self.states_after
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+    def __str__(self):
+        return '\n'.join([
+            f'States: {self.states_before} -> {self.states_after} (saved {self.states_saved})',
+            f'Entries: {self.entries} ({self.distinct_entries} distinct), '
+            f'packed size: {self.packed_size}',
+            f'Memory: {self.bytes_before} -> {self.bytes_after} bytes '
+            f'(saved {self.bytes_saved})',
+        ])
+
+
+def _action_key(action: Optional[Action]) -> Hashable:
+    if isinstance(action, ShiftToStateAction):
+        return 'S', action.state
+    if isinstance(action, ReduceByRuleAction):
+        return 'R', id(action.rule)
+    return None
+
+
+def _table_size(table: ParsingTable) -> int:
+    """Approximate size of the action and goto tables in bytes"""
+    seen = set()
+
+    def _size(obj) -> int:
+        if id(obj) in seen:
+            return 0
+        seen.add(id(obj))
+        return sys.getsizeof(obj)
+
+    size = _size(table._action_pre_table) + _size(table._goto)
+    for entry in table._action_pre_table.values():
+        size += _size(entry)
+        if isinstance(entry, PackedRow):
+            size += _size(entry.check) + _size(entry.values) + _size(entry.defaults)
+            size += _size(entry.actions) + sum(_size(a) for a in entry.actions)
+        else:
+            size += sum(_size(a) for a in entry.values())
+    for row in table._goto.values():
+        size += _size(row)
+    return size
+
+
+def _minimize(
+        state_count: int,
+        defaults: List[Hashable],
+        explicit: List[List[Tuple[int, Hashable]]],
+        gotos: List[List[Tuple[str, int]]]
+) -> List[int]:
+    """Partitions states into blocks of equivalent states (Moore's refinement)
+
+    :returns: Block of each state, blocks are numbered in the order of their first states
+    """
+
+    def _map(key, blocks: List[int]) -> Hashable:
+        if key is not None and key[0] == 'S':
+            return 'S', blocks[key[1]]
+        return key
+
+    blocks = [0] * state_count
+    count = 1
+    while True:
+        signatures: Dict[Hashable, int] = {}
+        refined = []
+        for state in range(state_count):
+            signature = (
+                blocks[state],
+                _map(defaults[state], blocks),
+                tuple((row, _map(key, blocks)) for row, key in explicit[state]),
+                tuple((variable, blocks[target]) for variable, target in gotos[state])
+            )
+            refined.append(signatures.setdefault(signature, len(signatures)))
+        blocks = refined
+        if len(signatures) == count:
+            return blocks
+        count = len(signatures)
+
+
+def _pack(rows: List[Dict[int, int]], width: int) -> Tuple[List[int], array, array]:
+    """Places sparse rows into shared check/values arrays so that their entries don't overlap
+
+    :returns: Base offset of each row, check array (row id or -1) and values array
+    """
+    bases = [0] * len(rows)
+
+    # Bit i is set if the position i is taken
+    used = 0
+    size = 0
+
+    # Densest rows first, each at the first offset where it fits
+    for row_id in sorted(range(len(rows)), key=lambda r: -len(rows[r])):
+        row = rows[row_id]
+        if not row:
+            continue
+
+        # Bit i of the conflicts is set if the row can't be placed at the offset i
+        conflicts = 0
+        mask = 0
+        for state in row:
+            conflicts |= used >> state
+            mask |= 1 << state
+        base = (~conflicts & (conflicts + 1)).bit_length() - 1
+        used |= mask << base
+        bases[row_id] = base
+        size = max(size, base + max(row) + 1)
+
+    # Any state index of any row stays within the arrays
+    size = max(size, max(bases, default=0) + width)
+    check = array('i', [-1]) * size
+    values = array('i', [-1]) * size
+    for row_id, row in enumerate(rows):
+        base = bases[row_id]
+        for state, value in row.items():
+            check[base + state] = row_id
+            values[base + state] = value
+    return bases, check, values
+
+
+def compact_table(table: ParsingTable) -> CompactionReport:
+    """Merges equivalent states of the table and packs its action entries (see `tokema.compact`)
+
+    Parses are the same as with the original table, state ids are changed.
+    Table is modified in place and becomes read-only.
+    """
+    if table.compacted:
+        raise ValueError('Table is already compacted')
+    if table.frozen:
+        raise ValueError('Frozen table can not be compacted, compact it before freezing')
+    for resolver in table.resolvers:
+        if not _replaces_entries(resolver):
+            raise ValueError(f'{resolver.__class__.__name__} does not support '
+                             f'action entries replacement')
+
+    report = CompactionReport()
+    report.bytes_before = _table_size(table)
+
+    queries = list(table._action_pre_table)
+    entries = [table._action_pre_table[q] for q in queries]
+    state_count = 1 + max(
+        [0] +
+        [s for entry in entries for s in entry if s is not None] +
+        [s for s in table._goto] +
+        [t for row in table._goto.values() for t in row.values() if t is not None]
+    )
+    report.states_before = state_count
+    report.entries = len(entries)
+
+    # Default action of a state is the action most of the entries have for it
+    counts: List[Dict[Hashable, int]] = [defaultdict(int) for _ in range(state_count)]
+    for entry in entries:
+        for state, action in entry.items():
+            counts[state][_action_key(action)] += 1
+    defaults: List[Hashable] = [None] * state_count
+    for state, state_counts in enumerate(counts):
+        if state_counts:
+            key, count = max(state_counts.items(), key=lambda kv: kv[1])
+            if 2 * count > len(entries):
+                defaults[state] = key
+
+    # Actions different from defaults, by state
+    explicit: List[List[Tuple[int, Hashable]]] = [[] for _ in range(state_count)]
+    rules = {}
+    for row, entry in enumerate(entries):
+        for state, action in entry.items():
+            key = _action_key(action)
+            if isinstance(action, ReduceByRuleAction):
+                rules[key] = action.rule
+            if key != defaults[state]:
+                explicit[state].append((row, key))
+    for state, default in enumerate(defaults):
+        # Entries without an action for a state with the default one
+        if default is not None and sum(counts[state].values()) < len(entries):
+            explicit[state].extend(
+                (row, None) for row, entry in enumerate(entries) if state not in entry
+            )
+    for state_explicit in explicit:
+        state_explicit.sort(key=lambda x: x[0])
+    gotos = [
+        sorted(table._goto[s].items()) if s in table._goto else [] for s in range(state_count)
+    ]
+
+    blocks = _minimize(state_count, defaults, explicit, gotos)
+    block_count = max(blocks) + 1
+    representatives = [-1] * block_count
+    for state, block in enumerate(blocks):
+        if representatives[block] < 0:
+            representatives[block] = state
+    report.states_after = block_count
+
+    # Distinct actions of the compacted table
+    actions: List[Action] = []
+    action_ids: Dict[Hashable, int] = {}
+
+    def _action_id(key) -> int:
+        if key is None:
+            return -1
+        if key[0] == 'S':
+            key = 'S', blocks[key[1]]
+        action_id = action_ids.get(key)
+        if action_id is None:
+            action_id = len(actions)
+            action_ids[key] = action_id
+            if key[0] == 'S':
+                actions.append(ShiftToStateAction(key[1]))
+            else:
+                actions.append(ReduceByRuleAction(rules[key]))
+        return action_id
+
+    packed_defaults = array('i', [_action_id(defaults[s]) for s in representatives])
+
+    # Identical rows are stored once
+    rows: List[Dict[int, int]] = []
+    row_ids: Dict[Hashable, int] = {}
+    entry_rows: List[int] = []
+    entry_explicit: List[Dict[int, int]] = [{} for _ in entries]
+    for block, state in enumerate(representatives):
+        for row, key in explicit[state]:
+            entry_explicit[row][block] = _action_id(key)
+    for row in entry_explicit:
+        signature = tuple(sorted(row.items()))
+        row_id = row_ids.get(signature)
+        if row_id is None:
+            row_id = len(rows)
+            row_ids[signature] = row_id
+            rows.append(row)
+        entry_rows.append(row_id)
+    report.distinct_entries = len(rows)
+
+    bases, check, values = _pack(rows, block_count)
+    report.packed_size = len(check)
+    packed_rows = [
+        PackedRow(row_id, bases[row_id], check, values, packed_defaults, actions)
+        for row_id in range(len(rows))
+    ]
+
+    # Identical goto rows are shared
+    goto_rows: Dict[Tuple, Dict[str, int]] = {}
+    packed_goto: Dict[int, Dict[str, int]] = defaultdict(dict)
+    for block, state in enumerate(representatives):
+        if gotos[state]:
+            goto_row = tuple((variable, blocks[target]) for variable, target in gotos[state])
+            packed_goto[block] = goto_rows.setdefault(goto_row, dict(goto_row))
+
+    replaced: Dict[int, Any] = {
+        id(entry): packed_rows[row_id] for entry, row_id in zip(entries, entry_rows)
+    }
+
+    def _replace(entry):
+        return replaced.get(id(entry), entry)
+
+    for resolver in table.resolvers:
+        resolver.replace_entries(_replace)
+    table._action_pre_table = dict(zip(queries, (_replace(e) for e in entries)))
+    table._goto = packed_goto
+    table.compacted = True
+    table.version += 1
+
+    report.bytes_after = _table_size(table)
+    return report
@@ -0,0 +1,258 @@
+"""Segment-parallel parsing of long documents
+
+A long document is split at hard boundaries (sentence ends, `EOF_TOKEN`, blank lines)
+into segments that are parsed independently, in a pool of worker processes if requested.
+Parses of the segments are stitched back with positions of tokens in the whole document.
+Parses can't cross segment boundaries, so boundaries should be the places where
+no production of the grammar continues.
+
+Optionally, the longest parse of each segment becomes a token of a top-level grammar
+(see `ProductionQuery`) which combines segments into the document parse.
+Rules strings have no syntax for `ProductionQuery`, the grammar is built from rules, i.e.::
+
+    combine_table = build_parsing_table(
+        [Rule('DOC', (RepeatQuery(ProductionQuery('S')), EofQuery()))],
+        [ProductionResolver(), EofResolver()]
+    )
+"""
+
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .eof import EOF_TOKEN
+from .grammar import TerminalQuery
+from .parsing import FlatParses, ParseNode, ParseResults, parse
+from .table import FrozenDict, ParsingTable, Resolver
+from .text import TOKEN_PATTERN, TextToken, iter_tokens
+
+__all__ = [
+    'ProductionQuery',
+    'ProductionResolver',
+    'split_segments',
+    'split_paragraphs',
+    'parse_document'
+]
+
+
+class ProductionQuery(TerminalQuery):
+    """Matches a parse of the production used as a token (see `parse_document`)"""
+    __slots__ = 'production'
+
+    def __init__(self, production: str):
+        self.production = production
+
+    def __hash__(self):
+        return hash((self.__class__, self.production))
+
+    def __str__(self):
+        return f'{{{self.production}}}'
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.production!r})'
+
+    def __eq__(self, other):
+        if isinstance(other, self.__class__):
+            return self.production == other.production
+        return False
+
+
+class ProductionResolver(Resolver):
+    """Resolves `ParseNode` tokens by the production of their rule"""
+    token_types = (ParseNode, )
+
+    def __init__(self):
+        self.index = {}
+
+    def add_query(self, query: TerminalQuery, doc):
+        if isinstance(query, ProductionQuery):
+            self.index[query.production] = doc
+
+    def resolve(self, token):
+        if isinstance(token, ParseNode):
+            return self.index.get(token.rule.production)
+        return None
+
+    def replace_entries(self, replace):
+        for key, entry in self.index.items():
+            self.index[key] = replace(entry)
+
+    def freeze(self):
+        self.index = FrozenDict(self.index)
+
+
+def split_segments(
+        tokens: Iterable,
+        boundaries: Union[Callable[[Any], bool], Iterable[str]] = ()
+) -> List[List]:
+    """Splits tokens after each boundary token, boundary tokens end their segments
+
+    :param tokens: Tokens of the document
+    :param boundaries: Texts of the boundary tokens (i.e. sentence ends) or a predicate,
+        `EOF_TOKEN` is always a boundary
+    """
+    if callable(boundaries):
+        is_boundary = boundaries
+    else:
+        texts = frozenset(boundaries)
+
+        def is_boundary(token) -> bool:
+            return isinstance(token, str) and token in texts
+
+    segments = []
+    segment = []
+    for token in tokens:
+        segment.append(token)
+        if token is EOF_TOKEN or is_boundary(token):
+            segments.append(segment)
+            segment = []
+    if segment:
+        segments.append(segment)
+    return segments
+
+
+_BLANK_LINES = re.compile(r'\n[^\S\n]*\n\s*')
+
+
+def split_paragraphs(src: str, pattern=TOKEN_PATTERN) -> List[List[TextToken]]:
+    """Tokenizes `src` into segments separated by blank lines,
+    tokens keep their character offsets in the whole `src`
+    """
+    segments = []
+    start = 0
+    for match in _BLANK_LINES.finditer(src):
+        segments.append(list(iter_tokens(src[start:match.start()], pattern, offset=start)))
+        start = match.end()
+    segments.append(list(iter_tokens(src[start:], pattern, offset=start)))
+    return [s for s in segments if s]
+
+
+# Table of the worker process and ids of its rules, see `_init_worker`
+_worker_table: Optional[ParsingTable] = None
+_worker_rule_ids: Dict[int, int] = {}
+
+
+def _init_worker(
+        table: Optional[ParsingTable],
+        table_factory: Optional[Callable[[], ParsingTable]]
+):
+    global _worker_table, _worker_rule_ids
+    _worker_table = table_factory() if table_factory is not None else table
+    _worker_rule_ids = _rule_ids(_worker_table)
+
+
+def _rule_ids(table: ParsingTable) -> Dict[int, int]:
+    return {id(rule): i for i, rule in enumerate(table.rules)}
+
+
+def _parse_segment(
+        tokens: Sequence,
+        options: Dict[str, Any],
+        table: Optional[ParsingTable] = None,
+        rule_ids: Optional[Dict[int, int]] = None
+):
+    if table is None:
+        table, rule_ids = _worker_table, _worker_rule_ids
+    results = parse(tokens, table, **options)
+    flat = FlatParses()
+    flat.extend(results, rule_ids)
+    return results.truncated, flat
+
+
+def _leaf_positions(node: ParseNode) -> Tuple[int, int]:
+    first = node.args[0]
+    while isinstance(first, ParseNode):
+        first = first.args[0]
+    last = node.args[-1]
+    while isinstance(last, ParseNode):
+        last = last.args[-1]
+    return first.position, last.position
+
+
+def parse_document(
+        segments: Iterable[Sequence],
+        table: ParsingTable,
+        workers: Optional[int] = None,
+        table_factory: Optional[Callable[[], ParsingTable]] = None,
+        combine_table: Optional[ParsingTable] = None,
+        combine_root: str = 'ROOT',
+        beam_limit: int = 100,
+        root_production: str = 'ROOT',
+        max_skip: Optional[int] = None,
+        max_span: Optional[int] = None,
+        max_nodes: Optional[int] = None,
+        chunksize: int = 16
+) -> ParseResults:
+    """Parses document segments independently (see `split_segments` and `split_paragraphs`)
+
+    Positions of the symbols in the results are positions in the whole document,
+    symbol values are the original tokens.
+
+    :param segments: Token sequences, tokens must be picklable to use workers
+    :param table: GLR-compatible Parsing table
+    :param workers: Number of worker processes, None - parse in the calling process
+    :param table_factory: Picklable callable building the table in each worker
+        (i.e. `functools.partial(build_text_parsing_table, rules)`), by default the table
+        itself is sent to the workers. The factory has to build the same rules in the same
+        order. Tables with a result cache can't be pickled.
+    :param combine_table: Table of the top-level grammar, the longest parse of each segment
+        is its token (see `ProductionQuery`) and the tokens end with `EOF_TOKEN`
+    :param combine_root: Root production of the top-level grammar
+    :param beam_limit: See `parse`
+    :param root_production: Root production of the segments
+    :param max_skip: See `parse`
+    :param max_span: See `parse`
+    :param max_nodes: Node budget of each segment, see `parse`
+    :param chunksize: Number of segments sent to a worker at once
+
+    :returns: Parses of the `combine_root` if `combine_table` is set,
+        otherwise parses of all segments in the order of segments
+    """
+    segments = [s if isinstance(s, Sequence) else list(s) for s in segments]
+    options = dict(
+        beam_limit=beam_limit,
+        root_production=root_production,
+        max_skip=max_skip,
+        max_span=max_span,
+        max_nodes=max_nodes
+    )
+
+    if workers is None:
+        rule_ids = _rule_ids(table)
+        encoded = [_parse_segment(s, options, table, rule_ids) for s in segments]
+    else:
+        with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(None if table_factory is not None else table, table_factory)
+        ) as executor:
+            encoded = list(executor.map(
+                partial(_parse_segment, options=options), segments, chunksize=chunksize
+            ))
+
+    truncated = False
+    segment_parses: List[List[ParseNode]] = []
+    offset = 0
+    for tokens, (segment_truncated, flat) in zip(segments, encoded):
+        truncated = truncated or segment_truncated
+        segment_parses.append(flat.trees(table.rules, tokens, offset))
+        offset += len(tokens)
+
+    if combine_table is None:
+        return ParseResults((p for parses in segment_parses for p in parses), truncated=truncated)
+
+    # Longest parse of each segment, the earliest of equally long ones
+    roots = []
+    for parses in segment_parses:
+        if parses:
+            ranges = [_leaf_positions(p) for p in parses]
+            best = max(
+                range(len(parses)),
+                key=lambda i: (ranges[i][1] - ranges[i][0], -ranges[i][0])
+            )
+            roots.append(parses[best])
+    roots.append(EOF_TOKEN)
+    results = parse(roots, combine_table, beam_limit=beam_limit, root_production=combine_root)
+    results.truncated = results.truncated or truncated
+    return results
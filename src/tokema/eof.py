@@ -21,6 +21,10 @@ class Eof:
     def __repr__(self):
         return 'EOF'
 
+    def __reduce__(self):
+        # Unpickled as the same singleton, resolvers compare tokens with it by identity
+        return 'EOF_TOKEN'
+
 
 EOF_TOKEN = Eof()
 
@@ -42,6 +46,8 @@ class EofQuery(TerminalQuery):
 
 
 class EofResolver(Resolver):
+    token_types = (Eof, )
+
     def __init__(self):
         self.doc = None
 
@@ -53,3 +59,7 @@ class EofResolver(Resolver):
         if token is EOF_TOKEN:
             return self.doc
         return None
+
+    def replace_entries(self, replace):
+        if self.doc is not None:
+            self.doc = replace(self.doc)
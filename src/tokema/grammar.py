@@ -1,10 +1,15 @@
-from typing import Tuple, Union
+import copy
+from itertools import product
+from typing import Tuple, Union, Optional, List, Dict
 
 __all__ = [
     'Rule',
     'Query',
     'TerminalQuery',
-    'ReferenceQuery'
+    'ReferenceQuery',
+    'RepeatQuery',
+    'RepetitionRule',
+    'expand_repetitions'
 ]
 
 
@@ -37,15 +42,79 @@ class ReferenceQuery:
         return False
 
 
-Query = Union[TerminalQuery, ReferenceQuery]
+class RepeatQuery:
+    """Repetition of the inner query: `?` (optional), `*` (zero or more) or `+` (one or more)
+
+    Repetitions are compiled into plain rules (see `expand_repetitions`) when the table is built.
+    Repeated matches are collected into a single flat `ParseNode`.
+    In the rules text operators follow references only (`<A>+`, see `parse_rules_from_string`),
+    other queries are repeated by constructing the query.
+    """
+    __slots__ = 'query', 'min_count', 'max_count'
+
+    OPERATORS = {
+        '?': (0, 1),
+        '*': (0, None),
+        '+': (1, None),
+    }
+
+    def __init__(
+            self,
+            query: Union[TerminalQuery, ReferenceQuery],
+            min_count: int = 1,
+            max_count: Optional[int] = None
+    ):
+        if (min_count, max_count) not in self.OPERATORS.values():
+            raise ValueError(f'Unsupported repetition {min_count}..{max_count}')
+        self.query = query
+        self.min_count = min_count
+        self.max_count = max_count
+
+    @classmethod
+    def from_operator(cls, query: Union[TerminalQuery, ReferenceQuery], operator: str):
+        min_count, max_count = cls.OPERATORS[operator]
+        return cls(query, min_count=min_count, max_count=max_count)
+
+    @property
+    def operator(self) -> str:
+        for operator, counts in self.OPERATORS.items():
+            if counts == (self.min_count, self.max_count):
+                return operator
+
+    def __hash__(self):
+        return hash((self.query, self.min_count, self.max_count))
+
+    def __str__(self):
+        return f'{self.query}{self.operator}'
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.query!r}, {self.min_count!r}, {self.max_count!r})'
+
+    def __eq__(self, other):
+        if isinstance(other, self.__class__):
+            return (
+                self.query == other.query and
+                self.min_count == other.min_count and
+                self.max_count == other.max_count
+            )
+        return False
+
+
+Query = Union[TerminalQuery, ReferenceQuery, RepeatQuery]
 
 
 class Rule:
-    __slots__ = 'production', 'queries'
+    """Grammar rule
 
-    def __init__(self, production: str, queries: Tuple[Query, ...]):
+    :param weight: Score added to the parses using the rule (see `tokema.parsing.parse_viterbi`),
+        negative weight penalizes the rule
+    """
+    __slots__ = 'production', 'queries', 'weight'
+
+    def __init__(self, production: str, queries: Tuple[Query, ...], weight: float = 0.0):
         self.production = production
         self.queries = queries
+        self.weight = weight
 
     def __str__(self):
         matchers_fmt = ' '.join(str(m) for m in self.queries)
@@ -53,3 +122,70 @@ class Rule:
 
     def __repr__(self):
         return f'<{self.__class__.__name__} {self.production} with {len(self.queries)} queries>'
+
+
+class RepetitionRule(Rule):
+    """Rule generated for a repetition of the query.
+
+    Either `X+ = <X+> query` (accumulating) or `X+ = query` (first element).
+    Parser collects matches of these rules into a single flat node instead of nested ones.
+    """
+    __slots__ = 'accumulate'
+
+    def __init__(self, production: str, queries: Tuple[Query, ...], accumulate: bool):
+        super().__init__(production, queries)
+        self.accumulate = accumulate
+
+
+def expand_repetitions(rules: List[Rule]) -> List[Rule]:
+    """Compiles `RepeatQuery` queries into plain rules
+
+    Optional queries produce rule variants with and without the query,
+    one-or-more repetitions are replaced with references to generated left-recursive
+    `RepetitionRule` rules. Rules without repetitions are returned as is.
+    """
+    result: List[Rule] = []
+    repetitions: Dict[Query, ReferenceQuery] = {}
+    repetition_rules: List[Rule] = []
+
+    def _repetition_reference(query: Query) -> ReferenceQuery:
+        reference = repetitions.get(query)
+        if reference is None:
+            reference = ReferenceQuery(str(RepeatQuery(query)))
+            repetitions[query] = reference
+            repetition_rules.append(
+                RepetitionRule(reference.reference, (query, ), accumulate=False))
+            repetition_rules.append(
+                RepetitionRule(reference.reference, (reference, query), accumulate=True))
+        return reference
+
+    for rule in rules:
+        if not any(isinstance(q, RepeatQuery) for q in rule.queries):
+            result.append(rule)
+            continue
+
+        options = []
+        for query in rule.queries:
+            if not isinstance(query, RepeatQuery):
+                options.append(((query, ), ))
+                continue
+
+            if query.max_count == 1:
+                present = (query.query, )
+            else:
+                present = (_repetition_reference(query.query), )
+
+            if query.min_count == 0:
+                options.append(((), present))
+            else:
+                options.append((present, ))
+
+        for variant in product(*options):
+            queries = tuple(q for part in variant for q in part)
+            if queries:
+                # Copy keeps the type and additional data of custom rules
+                new_rule = copy.copy(rule)
+                new_rule.queries = queries
+                result.append(new_rule)
+
+    return result + repetition_rules
@@ -0,0 +1,397 @@
+"""Incremental re-parsing of edited token sequences
+
+Parser state is snapshotted after every token. When tokens are replaced, inserted or deleted,
+parsing resumes from the snapshot before the edit, so the unchanged prefix is never parsed again.
+
+After every following token the new parser state is compared with the snapshot of the previous
+run, with the positions after the edit shifted by the change of the number of tokens.
+Once they are equivalent (same nodes with the same subtrees) the rest of the previous run
+is reused: its nodes are renumbered in place and its symbols after the edit are replaced
+with renumbered copies by a single pass over them, which is cheaper than parsing them again.
+Otherwise the tail after the edit is parsed again, reusing only the resolved tokens.
+"""
+
+from collections import deque
+from typing import Iterable, List, Optional, Dict, Any, Tuple, Sequence
+
+from .table import ParsingTable, Action
+from .parsing import ParseNode, Symbol, _ParserState, _Node, _Repetition
+
+__all__ = [
+    'IncrementalParser'
+]
+
+
+class IncrementalParser:
+    """Keeps parser snapshots of a token sequence to re-parse it quickly after edits
+
+    Memory used by snapshots grows linearly with the number of tokens: each snapshot holds
+    up to `beam_limit` node references (the nodes of the window in the bounded mode),
+    lists the parser only appends to (all nodes with `beam_limit=0`, collected parses)
+    are shared by the snapshots.
+    Parse trees are shared between snapshots, so returned parses must not be modified.
+    Parser never modifies them either: parses returned before an edit keep their positions,
+    reused subtrees after an insertion or a deletion are renumbered copies.
+
+    :param table: GLR-compatible Parsing table
+    :param tokens: Initial input tokens
+    :param beam_limit: See `tokema.parsing.parse`
+    :param root_production: See `tokema.parsing.parse`
+    :param max_skip: See `tokema.parsing.parse`
+    :param max_span: See `tokema.parsing.parse`
+    """
+
+    def __init__(
+            self,
+            table: ParsingTable,
+            tokens: Iterable = (),
+            beam_limit: int = 100,
+            root_production: str = 'ROOT',
+            max_skip: Optional[int] = None,
+            max_span: Optional[int] = None,
+    ):
+        self.table = table
+
+        # Resolved tokens: (token, action entry, meta)
+        self._resolved: List[Tuple[Any, Optional[Dict[int, Action]], Any]] = []
+
+        # State after i tokens for every i
+        self._snapshots: List[_Snapshot] = [_Snapshot(_ParserState(
+            table=table,
+            beam_limit=beam_limit,
+            verbose=False,
+            root_productions=(root_production, ),
+            max_skip=max_skip,
+            max_span=max_span
+        ))]
+
+        # Number of tokens stepped by the last parse or edit
+        self.last_steps = 0
+
+        self.replace(0, 0, tokens)
+
+    def __len__(self):
+        return len(self._resolved)
+
+    @property
+    def tokens(self) -> List[Any]:
+        return [token for token, _, _ in self._resolved]
+
+    @property
+    def parses(self) -> List[ParseNode]:
+        """Parses of the current tokens"""
+        return self._snapshots[-1].restore().get_parses()
+
+    def replace(self, start: int, end: int, tokens: Iterable) -> List[ParseNode]:
+        """Replaces tokens in [start, end) range with new tokens and re-parses
+
+        :returns: Parses of the edited tokens
+        """
+        length = len(self._resolved)
+        if not 0 <= start <= end <= length:
+            raise IndexError(f'Invalid edit range [{start}, {end}) of {length} tokens')
+
+        resolve = self.table.resolve
+        new_resolved = []
+        for token in tokens:
+            entry, meta = resolve(token)
+            new_resolved.append((token, entry, meta))
+        self._resolved[start:end] = new_resolved
+        edit_end = start + len(new_resolved)
+
+        old_snapshots = self._snapshots
+        snapshots = old_snapshots[:start + 1]
+        state = snapshots[-1].restore()
+        # Position of a token after the edit in the new tokens minus the one in the old tokens
+        delta = edit_end - end
+
+        self.last_steps = 0
+        for position in range(start, len(self._resolved)):
+            token, entry, meta = self._resolved[position]
+            state.step(position, token, entry, meta)
+            snapshots.append(_Snapshot(state))
+            self.last_steps += 1
+
+            # Snapshot of the previous run after the same token
+            old_index = position - delta + 1
+            if position >= edit_end and old_index + 1 < len(old_snapshots) and \
+                    _same_states(state, old_snapshots[old_index], start, end, delta):
+                # Frontier has converged with the previous run
+                tail = old_snapshots[old_index + 1:]
+                _merge_parses(state, old_snapshots[old_index], tail, start, end, delta)
+                snapshots.extend(tail)
+                break
+
+        self._snapshots = snapshots
+        return self.parses
+
+    def insert(self, position: int, tokens: Iterable) -> List[ParseNode]:
+        """Inserts tokens before the `position` and re-parses"""
+        return self.replace(position, position, tokens)
+
+    def delete(self, start: int, end: Optional[int] = None) -> List[ParseNode]:
+        """Deletes tokens in [start, end) range (single token by default) and re-parses"""
+        if end is None:
+            end = start + 1
+        return self.replace(start, end, ())
+
+    def set_tokens(self, tokens: Sequence) -> List[ParseNode]:
+        """Replaces all tokens, re-parsing only starting from the first changed one"""
+        tokens = list(tokens)
+        old_tokens = self.tokens
+        start = 0
+        for a, b in zip(old_tokens, tokens):
+            if a != b:
+                break
+            start += 1
+
+        # Common suffix, not overlapping the common prefix
+        suffix = 0
+        max_suffix = min(len(old_tokens), len(tokens)) - start
+        while suffix < max_suffix and old_tokens[-1 - suffix] == tokens[-1 - suffix]:
+            suffix += 1
+
+        return self.replace(start, len(old_tokens) - suffix, tokens[start:len(tokens) - suffix])
+
+
+class _Snapshot:
+    """Parser state after a token, never stepped
+
+    Lists the state only appends to are shared with the state instead of being copied,
+    the snapshot keeps their lengths.
+    """
+    __slots__ = 'state', 'node_count', 'parse_count'
+
+    def __init__(self, state: _ParserState):
+        snapshot = _ParserState.__new__(_ParserState)
+        for attr in _ParserState.__slots__:
+            setattr(snapshot, attr, getattr(state, attr))
+        if not state.bounded and state.beam_limit:
+            # Beam limit truncates the list in place on the next step,
+            # in the bounded mode every step creates a new list
+            snapshot.inactive_nodes = list(state.inactive_nodes)
+        snapshot.buckets = deque(state.buckets)
+        self.state = snapshot
+        self.node_count = len(state.inactive_nodes)
+        self.parse_count = len(state.bounded_parses)
+
+    @property
+    def nodes(self) -> List[_Node]:
+        return self.state.inactive_nodes[:self.node_count]
+
+    def restore(self) -> _ParserState:
+        """Independent state to continue parsing from the snapshot"""
+        state = self.state.fork()
+        del state.inactive_nodes[self.node_count:]
+        del state.bounded_parses[self.parse_count:]
+        return state
+
+
+def _same_states(a: _ParserState, b: _Snapshot, start: int, end: int, delta: int) -> bool:
+    """Checks that states contain equivalent nodes in the same order,
+    so that they will produce equivalent nodes for the same input
+
+    Tokens [start, end) of `b` were replaced by `delta + end - start` tokens of `a`,
+    positions of the later tokens in `a` are greater by `delta`.
+    """
+    a_nodes = a.inactive_nodes
+    b_nodes = b.nodes
+    b_state = b.state
+    if not a.bounded and a.beam_limit:
+        # Only nodes kept by the beam limit take part in the next steps
+        a_nodes = a_nodes[-a.beam_limit:]
+        b_nodes = b_nodes[-b_state.beam_limit:]
+    if a.step_index != b_state.step_index + delta or len(a_nodes) != len(b_nodes):
+        return False
+    if a.bounded and (a.bucket_nodes != b_state.bucket_nodes or
+                      len(a.buckets) != len(b_state.buckets)):
+        return False
+
+    if delta and a.bounded:
+        # Skip and span limits compare positions before and after the edit,
+        # their distances differ between the runs
+        edit_end = end + delta
+        checked = set()
+        for node in a_nodes:
+            if node is not a.root and node.end_pos <= start:
+                return False
+            while a.max_span is not None and node is not a.root and id(node) not in checked:
+                if node.start_pos < edit_end:
+                    return False
+                checked.add(id(node))
+                node = node.parent
+
+    def _position(p):
+        # Position in `a` of the token at `p` in `b`, None for the replaced tokens
+        if p < start or not delta:
+            return p
+        return p + delta if p >= end else None
+
+    def _end_position(p):
+        if p <= start or not delta:
+            return p
+        return p + delta if p > end else None
+
+    # Nodes and symbols of `a` mapped to nodes and symbols of `b`, the mapping must be one-to-one
+    mapping: Dict[int, Any] = {}
+    mapped: Dict[int, Any] = {}
+
+    def _same(x, y) -> bool:
+        if x is y:
+            return True
+        if id(x) in mapping:
+            return mapping[id(x)] is y
+        if id(y) in mapped or type(x) is not type(y):
+            return False
+
+        if isinstance(x, _Node):
+            # Skipped tokens between the parent and the node include the edited ones
+            skipped = y.skipped_symbols
+            if y.parent is not None and y.parent.end_pos <= start < y.end_pos:
+                skipped += delta
+            same = x.state == y.state and x.start_pos == _position(y.start_pos) and \
+                x.end_pos == _end_position(y.end_pos) and x.skipped_symbols == skipped and \
+                _same(x.symbol, y.symbol) and _same(x.parent, y.parent)
+        elif isinstance(x, Symbol):
+            same = x.position == _position(y.position) and x.value == y.value and \
+                x.meta == y.meta
+        elif isinstance(x, ParseNode):
+            same = x.rule is y.rule and len(x.args) == len(y.args) and \
+                all(_same(i, j) for i, j in zip(x.args, y.args))
+        elif isinstance(x, _Repetition):
+            same = x.rule is y.rule and _same(x.item, y.item) and _same(x.previous, y.previous)
+        else:
+            same = False
+
+        if same:
+            mapping[id(x)] = y
+            mapped[id(y)] = x
+        return same
+
+    return all(_same(x, y) for x, y in zip(a_nodes, b_nodes))
+
+
+def _merge_parses(
+        state: _ParserState,
+        converged: _Snapshot,
+        tail: List[_Snapshot],
+        start: int,
+        end: int,
+        delta: int
+):
+    """Replaces parses collected by the previous run up to the converged snapshot
+    with the parses of the state in the tail snapshots, renumbering the tail
+    if the number of tokens has changed
+    """
+    collected = converged.parse_count
+    count = len(state.bounded_parses)
+    last = tail[-1]
+    parses = last.state.bounded_parses[collected:last.parse_count]
+    if delta:
+        parses = _shift_positions(tail, parses, start, end, delta)
+    state.bounded_parses.extend(parses)
+    for snapshot in tail:
+        snapshot.state.bounded_parses = state.bounded_parses
+        snapshot.parse_count += count - collected
+
+
+def _shift_positions(
+        snapshots: List[_Snapshot],
+        parses: List[ParseNode],
+        start: int,
+        end: int,
+        delta: int
+) -> List[ParseNode]:
+    """Renumbers nodes and symbols of the snapshots after the tokens [start, end) were replaced,
+    in the same way as `_same_states` maps them
+
+    Parser nodes and repetition cells are private to the snapshots and are updated in place,
+    symbols and parse nodes, which are a part of the returned parses, are replaced with copies,
+    so parses returned before stay valid. Objects before the edit are shared with the new run
+    and are not visited.
+
+    :returns: Renumbered parses
+    """
+    # Copies of the symbols and parse nodes by ids of the originals
+    copies: Dict[int, Any] = {}
+
+    visited = set()
+    for snapshot in snapshots:
+        state = snapshot.state
+        state.step_index += delta
+        for nodes in (state.inactive_nodes, *state.buckets):
+            if id(nodes) in visited:
+                continue
+            visited.add(id(nodes))
+            for node in nodes:
+                while node.end_pos > start and id(node) not in visited:
+                    visited.add(id(node))
+                    if node.parent.end_pos <= start:
+                        node.skipped_symbols += delta
+                    if node.start_pos >= end:
+                        node.start_pos += delta
+                    node.end_pos += delta
+                    node.symbol = _shifted_symbol(node.symbol, copies, start, end, delta)
+                    node = node.parent
+    return [_shifted_symbol(parse, copies, start, end, delta) for parse in parses]
+
+
+def _shifted_symbol(symbol, copies: Dict[int, Any], start: int, end: int, delta: int):
+    """Renumbered copy of the symbol or the parse node, the same object if it is before the edit,
+    repetition cells are renumbered in place
+
+    :param copies: Copies made so far by ids of the originals, updated
+    """
+    copy = copies.get(id(symbol))
+    if copy is not None:
+        return copy
+    if isinstance(symbol, Symbol):
+        copy = Symbol(symbol.value, symbol.position + delta, symbol.meta) \
+            if symbol.position >= end else symbol
+        copies[id(symbol)] = copy
+        return copy
+
+    stack = [symbol]
+    while stack:
+        x = stack[-1]
+        if id(x) in copies:
+            stack.pop()
+            continue
+
+        if isinstance(x, Symbol):
+            copy = Symbol(x.value, x.position + delta, x.meta) if x.position >= end else x
+        elif isinstance(x, ParseNode):
+            # Arguments are ordered by position
+            first = len(x.args)
+            while first and _last_position(x.args[first - 1]) >= start:
+                first -= 1
+            pending = [arg for arg in x.args[first:] if id(arg) not in copies]
+            if pending:
+                stack.extend(pending)
+                continue
+            if first == len(x.args):
+                copy = x
+            else:
+                args = [*x.args[:first], *(copies[id(arg)] for arg in x.args[first:])]
+                copy = x.__class__(x.rule, tuple(args) if isinstance(x.args, tuple) else args)
+        else:
+            # Repetition cell
+            copy = x
+            if _last_position(x.item) >= start:
+                pending = [d for d in (x.item, x.previous) if d is not None and id(d) not in copies]
+                if pending:
+                    stack.extend(pending)
+                    continue
+                x.item = copies[id(x.item)]
+                # Flat node of the cell may be a part of the returned parses
+                x._node = None
+        copies[id(x)] = copy
+        stack.pop()
+    return copies[id(symbol)]
+
+
+def _last_position(symbol) -> int:
+    """Position of the last token of the symbol"""
+    while not isinstance(symbol, Symbol):
+        symbol = symbol.item if isinstance(symbol, _Repetition) else symbol.args[-1]
+    return symbol.position
@@ -0,0 +1,155 @@
+"""Token normalization pipeline shared by resolvers
+
+Table normalizer is a chain of named stages, for example
+casefold -> unicode normalization -> ё/е folding -> stemming.
+Each stage output is a normalized form of the token named after the stage.
+Resolvers declare the form they index on with the `form` attribute,
+the table computes the forms once per token and passes the requested form to each resolver.
+Expensive stages (i.e. stemming) are memoized in a bounded cache.
+"""
+
+import unicodedata
+from functools import lru_cache
+from typing import Callable, List, Optional, Tuple, Dict
+
+from .grammar import TerminalQuery
+from .table import Resolver, FrozenDict
+
+__all__ = [
+    'TokenNormalizer',
+    'TokenForms',
+    'NormalizedTextResolver',
+    'default_normalizer',
+    'fold_yo'
+]
+
+
+def fold_yo(text: str) -> str:
+    """Replaces russian ё with е"""
+    return text.replace('ё', 'е').replace('Ё', 'Е')
+
+
+def _normalize_unicode(text: str) -> str:
+    return unicodedata.normalize('NFKC', text)
+
+
+class TokenNormalizer:
+    """Chain of named normalization stages
+
+    Each stage is applied to the output of the previous one.
+    """
+
+    def __init__(self):
+        self.stages: List[Tuple[str, Callable[[str], str]]] = []
+        self._stage_index: Dict[str, int] = {}
+
+    def add_stage(
+            self,
+            name: str,
+            fn: Callable[[str], str],
+            cache_size: Optional[int] = None
+    ) -> 'TokenNormalizer':
+        """Appends a stage to the chain
+
+        :param name: Name of the form produced by the stage
+        :param fn: Normalization function
+        :param cache_size: Memoize results of the stage keeping up to `cache_size` last inputs,
+            None - no memoization (cheap stages)
+        """
+        if name in self._stage_index:
+            raise ValueError(f'Stage {name!r} is already defined')
+        if cache_size is not None:
+            fn = lru_cache(maxsize=cache_size)(fn)
+        self._stage_index[name] = len(self.stages)
+        self.stages.append((name, fn))
+        return self
+
+    @property
+    def forms(self) -> List[str]:
+        return [name for name, _ in self.stages]
+
+    def stage_index(self, form: str) -> int:
+        try:
+            return self._stage_index[form]
+        except KeyError:
+            raise ValueError(f'Unknown normalized form {form!r}, expected one of {self.forms}')
+
+    def normalize(self, text: str, form: str) -> str:
+        """Applies stages up to the one producing the `form`"""
+        for _, fn in self.stages[:self.stage_index(form) + 1]:
+            text = fn(text)
+        return text
+
+    def token_forms(self, token: str) -> 'TokenForms':
+        return TokenForms(self, token)
+
+
+class TokenForms:
+    """Normalized forms of a single token computed lazily, each stage at most once"""
+    __slots__ = 'normalizer', 'values'
+
+    def __init__(self, normalizer: TokenNormalizer, token: str):
+        self.normalizer = normalizer
+        self.values: List[str] = [token]
+
+    def __getitem__(self, form: str) -> str:
+        index = self.normalizer.stage_index(form) + 1
+        values = self.values
+        stages = self.normalizer.stages
+        while len(values) <= index:
+            values.append(stages[len(values) - 1][1](values[-1]))
+        return values[index]
+
+
+class NormalizedTextResolver(Resolver):
+    """Resolves text queries by the normalized form of the token and the query text
+
+    Resolver is bound to the normalizer of the table it is used in
+    (see `normalizer` argument of `tokema.table.build_parsing_table`).
+
+    :param form: Name of the normalized form to index on
+    """
+    token_types = (str, )
+
+    def __init__(self, form: str):
+        self.form = form
+        self.normalizer: Optional[TokenNormalizer] = None
+        self.index = {}
+
+    def add_query(self, query: TerminalQuery, doc):
+        text = getattr(query, 'text', None)
+        if isinstance(text, str):
+            self.index[self.normalizer.normalize(text, self.form)] = doc
+
+    def resolve(self, token):
+        # Token is already normalized by the table
+        if isinstance(token, str):
+            return self.index.get(token)
+        return None
+
+    def replace_entries(self, replace):
+        for key, entry in self.index.items():
+            self.index[key] = replace(entry)
+
+    def freeze(self):
+        if isinstance(self.index, dict):
+            self.index = FrozenDict(self.index)
+
+
+def default_normalizer(
+        stem: Optional[Callable[[str], str]] = None,
+        cache_size: int = 1 << 16
+) -> TokenNormalizer:
+    """Normalizer with `casefold`, `unicode` (NFKC), `yo` (ё/е folding) and `stem` forms
+
+    :param stem: Stemming or lemmatization function, i.e. `Stemmer('russian').stemWord`,
+        `stem` form is not available if not given
+    :param cache_size: Memo cache size of the stemming stage
+    """
+    normalizer = TokenNormalizer()
+    normalizer.add_stage('casefold', str.casefold)
+    normalizer.add_stage('unicode', _normalize_unicode)
+    normalizer.add_stage('yo', fold_yo)
+    if stem is not None:
+        normalizer.add_stage('stem', stem, cache_size=cache_size)
+    return normalizer
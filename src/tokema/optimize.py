@@ -0,0 +1,295 @@
+"""Grammar normalization before table construction
+
+Optimizations:
+    - removal of unproductive rules (referring productions that can't be derived)
+    - removal of rules unreachable from the root productions
+    - removal of duplicate rules
+    - inlining of unit rules like `A = <B>` where `B` is used only once: the rule is replaced
+      by rules `A = ...` with the queries of every `B` rule,
+      so parser does one reduction instead of two
+
+Inlined rules remember the original rules chain, so parse trees of the original
+grammar can be restored from the results with `restore_tree`.
+"""
+
+from typing import List, Optional, Iterable, Tuple, Dict, Set, Union
+
+from .grammar import Rule, ReferenceQuery, RepetitionRule, expand_repetitions
+from .table import measure_automaton, _get_roots
+from .parsing import ParseNode, Symbol
+
+__all__ = [
+    'InlinedRule',
+    'OptimizationReport',
+    'optimize_rules',
+    'restore_tree'
+]
+
+
+class InlinedRule(Rule):
+    """Rule produced by inlining unit rules
+
+    :param chain: Original rules from the outermost unit rule to the rule
+        which queries are used
+    """
+    __slots__ = 'chain'
+
+    def __init__(self, chain: Tuple[Rule, ...]):
+        super().__init__(
+            production=chain[0].production,
+            queries=chain[-1].queries,
+            weight=sum(r.weight for r in chain)
+        )
+        self.chain = chain
+
+
+class OptimizationReport:
+    """Statistics of `optimize_rules`
+
+    States and actions are measured only if requested (requires building automatons twice).
+    """
+
+    def __init__(self):
+        self.rules_before = 0
+        self.rules_after = 0
+        self.unproductive = 0
+        self.unreachable = 0
+        self.duplicates = 0
+        self.inlined = 0
+        self.states_before: Optional[int] = None
+        self.states_after: Optional[int] = None
+        self.actions_before: Optional[int] = None
+        self.actions_after: Optional[int] = None
+
+    @property
+    def states_saved(self) -> Optional[int]:
+        if self.states_before is None:
+            return None
+        return self.states_before - self.states_after
+
+    @property
+    def actions_saved(self) -> Optional[int]:
+        if self.actions_before is None:
+            return None
+        return self.actions_before - self.actions_after
+
+    def __str__(self):
+        lines = [
+            f'Rules: {self.rules_before} -> {self.rules_after}',
+            f'  unproductive removed: {self.unproductive}',
+            f'  unreachable removed: {self.unreachable}',
+            f'  duplicates removed: {self.duplicates}',
+            f'  unit rules inlined: {self.inlined}',
+        ]
+        if self.states_before is not None:
+            lines.append(f'States: {self.states_before} -> {self.states_after} '
+                         f'(saved {self.states_saved})')
+            lines.append(f'Actions: {self.actions_before} -> {self.actions_after} '
+                         f'(saved {self.actions_saved})')
+        return '\n'.join(lines)
+
+
+def _references(rule: Rule) -> Iterable[str]:
+    for q in rule.queries:
+        if isinstance(q, ReferenceQuery):
+            yield q.reference
+
+
+def _remove_unproductive(rules: List[Rule]) -> List[Rule]:
+    productive: Set[str] = set()
+    changed = True
+    while changed:
+        changed = False
+        for rule in rules:
+            if rule.production not in productive and all(
+                    r in productive for r in _references(rule)
+            ):
+                productive.add(rule.production)
+                changed = True
+    return [r for r in rules if all(ref in productive for ref in _references(r))]
+
+
+def _remove_unreachable(rules: List[Rule], roots: List[str]) -> List[Rule]:
+    by_production: Dict[str, List[Rule]] = {}
+    for rule in rules:
+        by_production.setdefault(rule.production, []).append(rule)
+
+    reachable: Set[str] = set()
+    stack = list(roots)
+    while stack:
+        production = stack.pop()
+        if production in reachable:
+            continue
+        reachable.add(production)
+        for rule in by_production.get(production, ()):
+            stack.extend(_references(rule))
+    return [r for r in rules if r.production in reachable]
+
+
+def _remove_duplicates(rules: List[Rule]) -> List[Rule]:
+    """Removes exact duplicates of plain rules, rule subclasses may carry additional data"""
+    seen = set()
+    result = []
+    for rule in rules:
+        if type(rule) is Rule:
+            key = (rule.production, rule.queries, rule.weight)
+            if key in seen:
+                continue
+            seen.add(key)
+        result.append(rule)
+    return result
+
+
+def _is_unit(rule: Rule) -> bool:
+    return len(rule.queries) == 1 and isinstance(rule.queries[0], ReferenceQuery)
+
+
+def _chain(rule: Rule) -> Tuple[Rule, ...]:
+    if isinstance(rule, InlinedRule):
+        return rule.chain
+    return rule,
+
+
+def _inline_units(rules: List[Rule], roots: List[str]) -> Tuple[List[Rule], int]:
+    """Inlines unit rules `A = <B>` where `B` is referenced only once in the whole grammar.
+
+    Such inlining is a renaming of `B` rules to `A`, so it doesn't introduce new conflicts
+    to the table, which keeps a single reduction per state and token.
+    """
+    by_production: Dict[str, List[Rule]] = {}
+    references: Dict[str, int] = {}
+    for rule in rules:
+        by_production.setdefault(rule.production, []).append(rule)
+        for reference in _references(rule):
+            references[reference] = references.get(reference, 0) + 1
+
+    def _can_inline(rule: Rule) -> bool:
+        # Repetition rules are recognized by the parser, so they are kept as is
+        if not _is_unit(rule) or isinstance(rule, RepetitionRule):
+            return False
+        reference = rule.queries[0].reference
+        return (
+            references[reference] == 1 and
+            reference not in roots and
+            reference != rule.production and
+            not any(isinstance(r, RepetitionRule) for r in by_production.get(reference, ()))
+        )
+
+    # Productions which rules will be inlined into the single referring unit rule
+    inlined_productions = {r.queries[0].reference for r in rules if _can_inline(r)}
+
+    result = []
+    for rule in rules:
+        if rule.production in inlined_productions:
+            continue
+
+        if not _can_inline(rule):
+            result.append(rule)
+            continue
+
+        # Expand unit chain until rules that can't be inlined further are met
+        stack = [(_chain(rule), rule.queries[0].reference)]
+        while stack:
+            chain, reference = stack.pop()
+            for target in reversed(by_production.get(reference, ())):
+                target_chain = chain + _chain(target)
+                if _can_inline(target):
+                    stack.append((target_chain, target.queries[0].reference))
+                else:
+                    result.append(InlinedRule(target_chain))
+
+    # Every inlined unit rule is replaced by the rules of the production it refers to
+    return result, len(rules) - len(result)
+
+
+def optimize_rules(
+        rules: List[Rule],
+        roots: Optional[Iterable[str]] = None,
+        remove_useless: bool = True,
+        deduplicate: bool = True,
+        inline_units: bool = True,
+        measure: bool = False
+) -> Tuple[List[Rule], OptimizationReport]:
+    """Normalizes grammar to reduce table size and parser work
+
+    :param rules: Grammar rules
+    :param roots: Root productions, production of the first rule by default
+    :param remove_useless: Remove unproductive and unreachable rules
+    :param deduplicate: Remove duplicate rules
+    :param inline_units: Inline unit rules (`A = <B>`)
+    :param measure: Measure number of states and actions before and after optimization
+
+    :returns: Optimized rules (roots are kept first) and the report
+    """
+    rules = expand_repetitions(rules)
+    roots = _get_roots(rules, roots)
+    report = OptimizationReport()
+    report.rules_before = len(rules)
+
+    if measure:
+        report.states_before, report.actions_before = measure_automaton(rules, roots)
+
+    if remove_useless:
+        productive = _remove_unproductive(rules)
+        report.unproductive = len(rules) - len(productive)
+        rules = productive
+
+    if deduplicate:
+        unique = _remove_duplicates(rules)
+        report.duplicates = len(rules) - len(unique)
+        rules = unique
+
+    # Unreachable rules are removed before inlining: a unit cycle not reachable from
+    # the roots (A = <B>, B = <A>) would be inlined into nothing and not be counted
+    if remove_useless:
+        reachable = _remove_unreachable(rules, roots)
+        report.unreachable = len(rules) - len(reachable)
+        rules = reachable
+
+    if inline_units:
+        rules, report.inlined = _inline_units(rules, roots)
+
+    # Root rules first, since it is the default root of the table
+    rules = (
+        [r for r in rules if r.production in roots] +
+        [r for r in rules if r.production not in roots]
+    )
+    report.rules_after = len(rules)
+
+    if measure:
+        report.states_after, report.actions_after = measure_automaton(rules, roots)
+
+    return rules, report
+
+
+def restore_tree(node: Union[ParseNode, Symbol]) -> Union[ParseNode, Symbol]:
+    """Rebuilds parse tree with the shape of the original (not optimized) grammar"""
+    restored: Dict[int, Union[ParseNode, Symbol]] = {}
+    stack = [node]
+    while stack:
+        n = stack[-1]
+        if id(n) in restored:
+            stack.pop()
+            continue
+
+        if isinstance(n, Symbol):
+            restored[id(n)] = n
+            stack.pop()
+            continue
+
+        pending = [a for a in n.args if id(a) not in restored]
+        if pending:
+            stack.extend(pending)
+            continue
+
+        args = [restored[id(a)] for a in n.args]
+        if isinstance(n.rule, InlinedRule):
+            chain = n.rule.chain
+            result = ParseNode(rule=chain[-1], args=args)
+            for rule in reversed(chain[:-1]):
+                result = ParseNode(rule=rule, args=[result])
+        else:
+            result = ParseNode(rule=n.rule, args=args)
+        restored[id(n)] = result
+        stack.pop()
+    return restored[id(node)]
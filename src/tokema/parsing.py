@@ -1,15 +1,40 @@
-from typing import Optional, List, Iterable, Union
+from typing import (
+    Optional, List, Iterable, Iterator, Union, Tuple, Dict, Any, Deque, Collection, Sequence, IO
+)
+import time
+import json
+import heapq
+from array import array
 from itertools import chain
+from functools import partial
+from collections import deque
+from concurrent.futures import Executor
 
-from .grammar import Rule
+from .grammar import Rule, RepetitionRule, ReferenceQuery
 from .utils import print_tree, print_parented_tree
-from .table import ParsingTable
+from .table import ParsingTable, Action, ShiftToStateAction, ReduceByRuleAction
+from .vocab import Vocabulary
+from .profiler import ParseProfile
 
 
 __all__ = [
     'parse',
+    'parse_encoded',
+    'parse_grouped',
+    'parse_batch',
+    'parse_many',
+    'parse_first',
+    'parse_best',
+    'parse_viterbi',
+    'parse_k_best',
+    'parse_score',
     'Symbol',
     'ParseNode',
+    'ParseResults',
+    'FlatParses',
+    'flatten_parses',
+    'iter_json',
+    'write_jsonl',
     'print_parse_node'
 ]
 
@@ -19,7 +44,8 @@ class Symbol:
 
     :param position: Token position index
     :param value: Original token value
-    :param meta: Addition meta information from resolver
+    :param meta: Addition meta information from resolver, meta with a `score` attribute
+        scores the match (see `tokema.table.ScoredMatch`)
     """
     __slots__ = 'position', 'value', 'meta'
 
@@ -28,6 +54,16 @@ class Symbol:
         self.value = value
         self.meta = meta
 
+    @property
+    def span(self) -> Optional[Tuple[int, int]]:
+        """Character offsets of the token in the source if the token carries them
+        (see `tokema.text.TextToken`)
+        """
+        try:
+            return self.value.start, self.value.end
+        except AttributeError:
+            return None
+
     def __str__(self):
         return str(self.value)
 
@@ -38,10 +74,10 @@ class Symbol:
 class ParseNode:
     __slots__ = 'rule', 'args'
 
-    def __init__(self, rule: Rule, args: List[Union['ParseNode', Symbol]]):
+    def __init__(self, rule: Rule, args: Sequence[Union['ParseNode', Symbol]]):
         """
         :param rule: Rule used to produce this node
-        :param args: Symbols that matched rule queries
+        :param args: Symbols that matched rule queries (tuple if the node is shared)
         """
         self.rule = rule
         self.args = args
@@ -55,27 +91,340 @@ class ParseNode:
     def __iter__(self):
         return self.args.__iter__()
 
+    @property
+    def span(self) -> Optional[Tuple[int, int]]:
+        """Character offsets of the matched source text, from the start of the first token
+        to the end of the last one, if tokens carry them (see `tokema.text.TextToken`)
+        """
+        first = self.args[0]
+        while isinstance(first, ParseNode):
+            first = first.args[0]
+        last = self.args[-1]
+        while isinstance(last, ParseNode):
+            last = last.args[-1]
+
+        first_span = first.span
+        last_span = last.span
+        if first_span is None or last_span is None:
+            return None
+        return first_span[0], last_span[1]
+
     def __str__(self):
-        args_fmt = ', '.join(str(a) for a in self.args)
-        return f'{self.rule.production}({args_fmt})'
+        return ''.join(_iter_formatted(self, repr_fmt=False))
+
+    def __repr__(self):
+        return ''.join(_iter_formatted(self, repr_fmt=True))
+
+
+def _iter_formatted(node: ParseNode, repr_fmt: bool) -> Iterator[str]:
+    """Chunks of `str` or `repr` of the parse tree, the tree is walked without recursion,
+    so that deep trees (i.e. long left-recursive chains) don't hit the recursion limit
+    """
+    # Stack of nodes to format and literal chunks closing their parents
+    stack: List[Any] = [node]
+    while stack:
+        n = stack.pop()
+        if isinstance(n, str):
+            yield n
+        elif isinstance(n, ParseNode):
+            args = n.args
+            if repr_fmt:
+                is_tuple = isinstance(args, tuple)
+                yield f'{n.__class__.__name__}(rule={n.rule!r}, args={"(" if is_tuple else "["}'
+                stack.append((',))' if len(args) == 1 else '))') if is_tuple else '])')
+            else:
+                yield f'{n.rule.production}('
+                stack.append(')')
+            for i in range(len(args) - 1, -1, -1):
+                stack.append(args[i])
+                if i:
+                    stack.append(', ')
+        else:
+            yield repr(n) if repr_fmt else str(n)
+
+
+class ParseResults(list):
+    """List of found parses
+
+    :param truncated: True if parsing was stopped by the deadline or the node budget,
+        in that case parses contain only the parses found before the stop
+    """
+
+    def __init__(self, parses: Iterable[ParseNode] = (), truncated: bool = False):
+        super().__init__(parses)
+        self.truncated = truncated
 
     def __repr__(self):
-        return f'{self.__class__.__name__}(rule={self.rule!r}, args={self.args!r})'
+        return f'{self.__class__.__name__}({list.__repr__(self)}, truncated={self.truncated!r})'
+
+
+class FlatParses:
+    """Parse trees encoded in preorder into flat arrays
+
+    Node `i` of the encoding is a production node of the rule `rules[i]` (index of the rule
+    in the table rules) or a token if `rules[i]` is -1. `parents[i]` is the index of its parent,
+    -1 for roots, and the node covers tokens from `starts[i]` to `ends[i]` (exclusive).
+    Nodes of a tree are stored contiguously, `roots` holds the index of each tree root.
+    Token positions are in `starts`, resolver meta of the tokens is in `metas`
+    (None for production nodes).
+
+    Arrays are cheap to pickle, so the encoding is used to send parses between processes
+    (see `tokema.document`).
+    """
+    __slots__ = 'rules', 'parents', 'starts', 'ends', 'roots', 'metas'
+
+    def __init__(self):
+        self.rules = array('i')
+        self.parents = array('q')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.roots = array('q')
+        self.metas: List[Any] = []
+
+    def __len__(self):
+        """Number of trees"""
+        return len(self.roots)
+
+    def extend(self, parses: Iterable[ParseNode], rule_ids: Dict[int, int]):
+        """Appends parse trees
+
+        :param parses: Parse trees
+        :param rule_ids: Index of each rule by its `id`
+        """
+        rules = self.rules
+        parents = self.parents
+        starts = self.starts
+        ends = self.ends
+        metas = self.metas
+        for parse in parses:
+            first = len(rules)
+            self.roots.append(first)
+
+            # Children are pushed in reverse, so they are popped in order
+            stack: List[Tuple[Union[ParseNode, Symbol], int]] = [(parse, -1)]
+            while stack:
+                node, parent = stack.pop()
+                index = len(rules)
+                parents.append(parent)
+                if isinstance(node, ParseNode):
+                    rules.append(rule_ids[id(node.rule)])
+                    starts.append(-1)
+                    ends.append(-1)
+                    metas.append(None)
+                    args = node.args
+                    for i in range(len(args) - 1, -1, -1):
+                        stack.append((args[i], index))
+                else:
+                    rules.append(-1)
+                    starts.append(node.position)
+                    ends.append(node.position + 1)
+                    metas.append(node.meta)
+
+            # Children follow their parents, so spans are collected in reverse
+            for i in range(len(rules) - 1, first, -1):
+                parent = parents[i]
+                if starts[parent] < 0 or starts[i] < starts[parent]:
+                    starts[parent] = starts[i]
+                if ends[i] > ends[parent]:
+                    ends[parent] = ends[i]
+
+    def tree(self, index: int, rules: Sequence[Rule], tokens: Sequence, offset: int = 0) -> ParseNode:
+        """Decodes the parse tree
+
+        :param index: Index of the tree
+        :param rules: Rules of the table the trees were encoded with
+        :param tokens: Input tokens, token values of the symbols
+        :param offset: Added to positions of the symbols
+        """
+        first = self.roots[index]
+        end = self.roots[index + 1] if index + 1 < len(self.roots) else len(self.rules)
+        rule_ids = self.rules
+        parents = self.parents
+        starts = self.starts
+        metas = self.metas
+
+        # Preorder: parent is built before its children, children are appended in order
+        built: List[Union[ParseNode, Symbol]] = []
+        for i in range(first, end):
+            rule_id = rule_ids[i]
+            if rule_id < 0:
+                position = starts[i]
+                node = Symbol(value=tokens[position], position=offset + position, meta=metas[i])
+            else:
+                node = ParseNode(rule=rules[rule_id], args=[])
+            built.append(node)
+            if i > first:
+                built[parents[i] - first].args.append(node)
+        return built[0]
+
+    def trees(self, rules: Sequence[Rule], tokens: Sequence, offset: int = 0) -> List[ParseNode]:
+        """Decodes all parse trees (see `tree`)"""
+        return [self.tree(i, rules, tokens, offset) for i in range(len(self.roots))]
+
+
+def flatten_parses(parses: Iterable[ParseNode], rules: Sequence[Rule]) -> FlatParses:
+    """Encodes parse trees into flat arrays (see `FlatParses`) without recursion
+
+    :param parses: Parse trees
+    :param rules: Rules of the table, i.e. `table.rules`
+    """
+    flat = FlatParses()
+    flat.extend(parses, {id(rule): i for i, rule in enumerate(rules)})
+    return flat
+
+
+def iter_json(node: Union[ParseNode, Symbol]) -> Iterator[str]:
+    """Yields chunks of the JSON encoding of the parse tree, the tree is walked without recursion
+
+    Production node is `{"production": ..., "args": [...]}`, token is
+    `{"token": ..., "position": ...}` with `"span"` if the token carries character offsets.
+    Token values are converted with `str`, resolver meta is not encoded.
+    """
+    dumps = json.dumps
+    productions: Dict[str, str] = {}
+
+    # Stack of nodes to encode and literal chunks closing their parents
+    stack: List[Union[ParseNode, Symbol, str]] = [node]
+    while stack:
+        n = stack.pop()
+        if isinstance(n, str):
+            yield n
+        elif isinstance(n, ParseNode):
+            production = productions.get(n.rule.production)
+            if production is None:
+                production = dumps(n.rule.production)
+                productions[n.rule.production] = production
+            yield f'{{"production": {production}, "args": ['
+            stack.append(']}')
+            args = n.args
+            for i in range(len(args) - 1, -1, -1):
+                stack.append(args[i])
+                if i:
+                    stack.append(', ')
+        else:
+            span = n.span
+            if span is None:
+                yield f'{{"token": {dumps(str(n.value))}, "position": {n.position}}}'
+            else:
+                yield f'{{"token": {dumps(str(n.value))}, "position": {n.position}, ' \
+                      f'"span": [{span[0]}, {span[1]}]}}'
+
+
+def write_jsonl(results: Iterable[Iterable[ParseNode]], fp: IO[str]) -> int:
+    """Writes parses of each input as a JSON array on its own line (JSON Lines)
+
+    Results of `parse_batch` or `parse_many` are written as they are iterated,
+    trees are encoded with `iter_json`.
+
+    :param results: Parses of each input
+    :param fp: Text file to write to
+
+    :returns: Number of written lines
+    """
+    lines = 0
+    for parses in results:
+        fp.write('[')
+        for i, parse in enumerate(parses):
+            if i:
+                fp.write(', ')
+            fp.writelines(iter_json(parse))
+        fp.write(']\n')
+        lines += 1
+    return lines
+
+
+class _Repetition:
+    """Cons cell of the repeated matches produced by `RepetitionRule` reductions
+
+    Accumulating an item costs a single cell, the flat `ParseNode` with all items
+    is built only when a parse containing the repetition is returned (see `_flatten`).
+    """
+    __slots__ = 'rule', 'previous', 'item', '_node'
+
+    def __init__(
+            self,
+            rule: Rule,
+            previous: Optional['_Repetition'],
+            item: Union[ParseNode, Symbol]
+    ):
+        self.rule = rule
+        self.previous = previous
+        self.item = item
+        self._node: Optional[ParseNode] = None
+
+    def _unflattened(self) -> Tuple[List[Any], Sequence[Any]]:
+        """Items of the cells after the nearest flattened one and the flat items before them"""
+        items = []
+        cell = self
+        while cell is not None and cell._node is None:
+            items.append(cell.item)
+            cell = cell.previous
+        items.reverse()
+        return items, (cell._node.args if cell is not None else ())
+
+    def __str__(self):
+        return str(_flatten(self))
+
+
+class _PendingNode(ParseNode):
+    """Parse node with repetition cells among its arguments or the arguments of its descendants,
+    the flat copy is built only when the parse is returned (see `_flatten`)
+    """
+    __slots__ = '_node',
+
+    def __init__(self, rule: Rule, args: Sequence[Any]):
+        super().__init__(rule, args)
+        self._node: Optional[ParseNode] = None
+
+
+# Symbols that have to be flattened before they are returned
+_UNFLATTENED = (_Repetition, _PendingNode)
+
+
+def _flatten(symbol):
+    """Flat parse tree of the symbol, without repetition cells
+
+    Flat nodes are cached, so every repetition is flattened once however many parses share it.
+    Only the nodes with unflattened descendants are visited.
+    """
+    if not isinstance(symbol, _UNFLATTENED):
+        return symbol
+    stack = [symbol]
+    while stack:
+        x = stack[-1]
+        if x._node is not None:
+            stack.pop()
+            continue
+        if isinstance(x, _Repetition):
+            args, flat = x._unflattened()
+        else:
+            args, flat = x.args, ()
+        pending = [a for a in args if isinstance(a, _UNFLATTENED) and a._node is None]
+        if pending:
+            stack.extend(pending)
+            continue
+        x._node = ParseNode(
+            rule=x.rule,
+            args=[*flat, *(a._node if isinstance(a, _UNFLATTENED) else a for a in args)]
+        )
+        stack.pop()
+    return symbol._node
 
 
 class _Node:
     """GLR Parser state node"""
 
-    __slots__ = 'state', 'start_pos', 'end_pos', 'symbol', 'parent', 'skipped_symbols'
+    __slots__ = 'state', 'start_pos', 'end_pos', 'symbol', 'parent', 'skipped_symbols', 'score'
 
     def __init__(
             self,
             state: int,
             start_pos: int,
             end_pos: int,
-            symbol: Union[Symbol, ParseNode, None],
+            symbol: Union[Symbol, ParseNode, _Repetition, None],
             parent: Optional['_Node'] = None,
             skipped_symbols: int = 0,
+            score: float = 0.0,
     ):
         self.state = state
         self.start_pos = start_pos
@@ -84,6 +433,9 @@ class _Node:
         self.parent = parent
         self.skipped_symbols = skipped_symbols
 
+        # Sum of the rule weights and the match scores of the symbol (see `parse_score`)
+        self.score = score
+
     def __repr__(self):
         return f'<ParserNode {self.state} {self.symbol}>'
 
@@ -94,7 +446,13 @@ def parse(
         beam_limit: int = 100,
         verbose: bool = False,
         root_production: str = 'ROOT',
-) -> List[ParseNode]:
+        max_skip: Optional[int] = None,
+        max_span: Optional[int] = None,
+        deadline: Optional[float] = None,
+        max_nodes: Optional[int] = None,
+        max_step_nodes: Optional[int] = None,
+        profile: Optional[ParseProfile] = None,
+) -> ParseResults:
     """Parses input steam of tokens of any type (that table support)
 
     Parsing algorithm is designed based on GLR* with noise skipping.
@@ -111,58 +469,886 @@ def parse(
     :param beam_limit: inactive nodes size limit, 0 - no limit
     :param verbose: Algorithm prints a lot of debug output if True
     :param root_production:
+    :param max_skip: Maximum number of consecutive tokens skipped inside a parse, None - no limit
+    :param max_span: Maximum number of tokens covered by a production, None - no limit
+    :param deadline: Time limit of parsing in seconds, None - no limit
+    :param max_nodes: Maximum number of parser nodes created in total, None - no limit
+    :param max_step_nodes: Maximum number of parser nodes created per input token, None - no limit
+    :param profile: Profile to add rule, state and resolver counters of this parse to
+        (see `tokema.profiler`)
+
+    If `max_skip` or `max_span` is set, nodes that can no longer be extended are dropped
+    from the parser state as the input advances, so the work per token and the memory
+    stay bounded on arbitrary long inputs. Parses of the `root_production` are collected
+    as soon as they are dropped, so parses found early in the input are not lost.
+
+    If `deadline`, `max_nodes` or `max_step_nodes` limit is hit, parsing stops and
+    the parses found so far are returned with `truncated` flag set (see `ParseResults`).
+
+    If the table has a result cache (see `ParsingTable.enable_cache`), parses of the inputs
+    seen before are returned from the cache. Cached parse trees are shared and frozen
+    (node args are tuples). Inputs are looked up by the token text (normalized text
+    if all resolvers use normalized forms) and by the type and value of other tokens,
+    trees of a cached input with other token objects (i.e. `TextToken` with other offsets)
+    are copied with the symbols holding the given tokens.
+    Inputs with unhashable tokens (i.e. lists) are parsed without the cache.
 
     :returns: List of found parses if any
     """
+    cache = table.cache
+    if cache is None or verbose or profile is not None:
+        return _parse_resolved(
+            resolved_tokens=_iter_resolved_tokens(input_tokens, table, profile),
+            table=table,
+            beam_limit=beam_limit,
+            verbose=verbose,
+            root_productions=(root_production, ),
+            max_skip=max_skip,
+            max_span=max_span,
+            deadline=deadline,
+            max_nodes=max_nodes,
+            max_step_nodes=max_step_nodes,
+            profile=profile
+        )
 
-    # GLR Parse tree root node
-    root = _Node(symbol=None, state=0, start_pos=-1, end_pos=0)
-
-    # Input stream variables
-    token_stream = iter(enumerate(input_tokens))
+    input_tokens = tuple(input_tokens)
+    key = (_cache_key_tokens(input_tokens, table), beam_limit, root_production, max_skip, max_span)
+    version = table.version
     try:
-        look_ahead_token_position, look_ahead_token = next(token_stream)
-    except StopIteration:
-        # Empty token stream
-        return []
+        found, cached = cache.get(key, version)
+    except TypeError:
+        # Unhashable tokens (i.e. lists) are parsed without the cache
+        cache = None
+        found = False
+    if found:
+        parses, cached_tokens = cached
+        if any(a is not b and (type(a) is not type(b) or type(a) not in _VALUE_TYPES or a != b)
+               for a, b in zip(input_tokens, cached_tokens)):
+            # Tokens are resolved the same way but differ (i.e. offsets of the text tokens)
+            parses = _rebind(parses, input_tokens)
+        return ParseResults(parses)
+
+    results = _parse_resolved(
+        resolved_tokens=_iter_resolved_tokens(input_tokens, table),
+        table=table,
+        beam_limit=beam_limit,
+        verbose=verbose,
+        root_productions=(root_production, ),
+        max_skip=max_skip,
+        max_span=max_span,
+        deadline=deadline,
+        max_nodes=max_nodes,
+        max_step_nodes=max_step_nodes
+    )
+    if cache is None or results.truncated:
+        # Results that are not truncated are the same for any limits, truncated ones are not
+        return results
+    parses = _freeze(results)
+    cache.put(key, (parses, input_tokens), version)
+    return ParseResults(parses)
+
+
+def parse_encoded(
+        token_ids: Iterable[int],
+        vocabulary: Vocabulary,
+        beam_limit: int = 100,
+        verbose: bool = False,
+        root_production: str = 'ROOT',
+        max_skip: Optional[int] = None,
+        max_span: Optional[int] = None,
+        deadline: Optional[float] = None,
+        max_nodes: Optional[int] = None,
+        max_step_nodes: Optional[int] = None,
+        profile: Optional[ParseProfile] = None,
+) -> ParseResults:
+    """Parses tokens encoded by the `vocabulary` (see `Vocabulary.encode`)
+
+    Token resolution is replaced with a lookup of the precomputed action entry by token id,
+    so resolvers are not profiled.
+    Parameters and results are the same as in `parse`.
+
+    :param token_ids: Sequence of token ids (array, list or numpy array)
+    :param vocabulary: Vocabulary used to encode tokens
+    """
+    vocabulary.refresh()
+    tokens = vocabulary.tokens
+    entries = vocabulary.entries
+    metas = vocabulary.metas
+    return _parse_resolved(
+        resolved_tokens=(
+            (position, tokens[token_id], entries[token_id], metas[token_id])
+            for position, token_id in enumerate(token_ids)
+        ),
+        table=vocabulary.table,
+        beam_limit=beam_limit,
+        verbose=verbose,
+        root_productions=(root_production, ),
+        max_skip=max_skip,
+        max_span=max_span,
+        deadline=deadline,
+        max_nodes=max_nodes,
+        max_step_nodes=max_step_nodes,
+        profile=profile
+    )
+
+
+def parse_grouped(
+        input_tokens: Iterable,
+        table: ParsingTable,
+        root_productions: Optional[Iterable[str]] = None,
+        beam_limit: int = 100,
+        verbose: bool = False,
+        max_skip: Optional[int] = None,
+        max_span: Optional[int] = None,
+) -> Dict[str, List[ParseNode]]:
+    """Parses input tokens once, collecting parses of several root productions
+
+    Table should be built with all of the productions as roots
+    (see `roots` argument of `build_parsing_table`), so that one pass shares token
+    resolution and the parser state among all of them.
+    Parses of each root are the same as of `parse` with a table built for that root only.
+
+    :param input_tokens: Stream of input tokens (i.e. strings)
+    :param table: GLR-compatible Parsing table
+    :param root_productions: Productions to collect parses of, table roots by default
+    :param beam_limit: inactive nodes size limit, 0 - no limit
+    :param verbose: Algorithm prints a lot of debug output if True
+    :param max_skip: See `parse`
+    :param max_span: See `parse`
+
+    :returns: Found parses grouped by root production
+    """
+    if root_productions is None:
+        root_productions = table.roots
+    groups: Dict[str, List[ParseNode]] = {p: [] for p in root_productions}
+
+    parses = _parse_resolved(
+        resolved_tokens=_iter_resolved_tokens(input_tokens, table),
+        table=table,
+        beam_limit=beam_limit,
+        verbose=verbose,
+        root_productions=frozenset(groups),
+        max_skip=max_skip,
+        max_span=max_span
+    )
+    for p in parses:
+        groups[p.rule.production].append(p)
+    return groups
+
+
+def parse_batch(
+        inputs: Iterable[Iterable],
+        table: ParsingTable,
+        beam_limit: int = 100,
+        verbose: bool = False,
+        root_production: str = 'ROOT',
+        max_skip: Optional[int] = None,
+        max_span: Optional[int] = None,
+) -> List[List[ParseNode]]:
+    """Parses a batch of inputs, parsing common token prefixes only once
+
+    Inputs are arranged into a token trie. The parser walks the trie depth first,
+    resolving and shifting each trie edge once, and the parser state is forked
+    at branch points for every continuation.
+    Results are the same as of `parse` called for each input separately,
+    but parse trees of the shared prefixes may be shared between results.
+
+    :param inputs: Token sequences, tokens must be hashable
+    :param table: GLR-compatible Parsing table
+    :param beam_limit: inactive nodes size limit, 0 - no limit
+    :param verbose: Algorithm prints a lot of debug output if True
+    :param root_production:
+    :param max_skip: See `parse`
+    :param max_span: See `parse`
+
+    :returns: List of found parses for each input, in the order of inputs
+    """
+    trie = _TrieNode()
+    count = 0
+    for index, input_tokens in enumerate(inputs):
+        trie_node = trie
+        for token in input_tokens:
+            child = trie_node.children.get(token)
+            if child is None:
+                child = _TrieNode()
+                trie_node.children[token] = child
+            trie_node = child
+        trie_node.ends.append(index)
+        count = index + 1
+
+    results: List[List[ParseNode]] = [[] for _ in range(count)]
+    resolve = table.resolve
+    root_state = _ParserState(
+        table=table,
+        beam_limit=beam_limit,
+        verbose=verbose,
+        root_productions=(root_production, ),
+        max_skip=max_skip,
+        max_span=max_span
+    )
+
+    # (trie node, token of the edge leading to it, its depth, parser state before the edge)
+    stack: List[Tuple[_TrieNode, Any, int, _ParserState]] = [(trie, None, 0, root_state)]
+    while stack:
+        trie_node, token, depth, state = stack.pop()
+        if trie_node is not trie:
+            entry, meta = resolve(token)
+            state.step(depth - 1, token, entry, meta)
+
+        if trie_node.ends:
+            parses = state.get_parses()
+            for index in trie_node.ends:
+                results[index] = list(parses)
+
+        # The last continuation takes over the state, others get its forks
+        children = list(trie_node.children.items())
+        for i, (child_token, child) in enumerate(children):
+            child_state = state if i == len(children) - 1 else state.fork()
+            stack.append((child, child_token, depth + 1, child_state))
+
+    return results
+
+
+def parse_first(
+        input_tokens: Iterable,
+        table: ParsingTable,
+        beam_limit: int = 100,
+        verbose: bool = False,
+        root_production: str = 'ROOT',
+        max_skip: Optional[int] = None,
+        max_span: Optional[int] = None,
+) -> Optional[ParseNode]:
+    """Parses input tokens until the first parse of the `root_production` is found
 
-    # Non-active node, states that will be shifted by input token on the shift phase
-    inactive_nodes: List[_Node] = [root]
+    Remaining tokens are neither resolved nor parsed, so checking whether the input
+    contains a parse at all costs only the tokens up to the end of the first one.
+    If several parses end at the same token, the one with the fewest skipped tokens is returned.
+    Parameters are the same as in `parse`.
 
-    # Nodes queue to check for reductions.
-    # Each reduction produces a new node and adds it to the queue
-    # Reductions happens until queue is empty
-    active_nodes_queue: List[_Node] = []
+    :returns: First found parse or None
+    """
+    return _parse_early(
+        resolved_tokens=_iter_resolved_tokens(input_tokens, table),
+        table=table,
+        beam_limit=beam_limit,
+        verbose=verbose,
+        root_production=root_production,
+        max_skip=max_skip,
+        max_span=max_span,
+        best=False
+    )
+
+
+def parse_best(
+        input_tokens: Iterable,
+        table: ParsingTable,
+        beam_limit: int = 100,
+        verbose: bool = False,
+        root_production: str = 'ROOT',
+        max_skip: Optional[int] = None,
+        max_span: Optional[int] = None,
+) -> Optional[ParseNode]:
+    """Parses input tokens until the parse of the `root_production` with the fewest skipped
+    tokens is found
+
+    Skipped tokens are counted from the start of the input (the same as `skipped_symbols`
+    of the parser nodes), so parses found earlier usually win. Parsing stops as soon as
+    no node left in the parser state can lead to a parse with fewer skipped tokens:
+    a parse built on a node skips at least the tokens between the node and the next token,
+    and, if the root production is not referenced by other rules, the tokens skipped
+    by the node and its parents.
+
+    Unlike `parse`, parses dropped by the `beam_limit` are still considered.
+    Parameters are the same as in `parse`.
+
+    :returns: Parse with the fewest skipped tokens or None
+    """
+    return _parse_early(
+        resolved_tokens=_iter_resolved_tokens(input_tokens, table),
+        table=table,
+        beam_limit=beam_limit,
+        verbose=verbose,
+        root_production=root_production,
+        max_skip=max_skip,
+        max_span=max_span,
+        best=True
+    )
+
+
+def _parse_early(
+        resolved_tokens: Iterable[Tuple[int, Any, Optional[Dict[int, Action]], Any]],
+        table: ParsingTable,
+        beam_limit: int,
+        verbose: bool,
+        root_production: str,
+        max_skip: Optional[int],
+        max_span: Optional[int],
+        best: bool
+) -> Optional[ParseNode]:
+    """GLR* driver stopping once the found parse can't be beaten (see `parse_best`)
+    or at the first found parse
+    """
+    root_productions = (root_production, )
+    state = _ParserState(
+        table=table,
+        beam_limit=beam_limit,
+        verbose=verbose,
+        root_productions=root_productions,
+        max_skip=max_skip,
+        max_span=max_span
+    )
+
+    # Parses of the root production include the whole stack below them
+    # only if it is not referenced by other rules
+    whole_stack = not any(
+        isinstance(q, ReferenceQuery) and q.reference == root_production
+        for rule in table.rules for q in rule.queries
+    )
+
+    found: Optional[_Node] = None
+    for look_ahead_token_position, look_ahead_token, entry, meta in resolved_tokens:
+        state.step(look_ahead_token_position, look_ahead_token, entry, meta)
+        for node in state.iter_step_root_nodes():
+            if found is None or node.skipped_symbols < found.skipped_symbols:
+                found = node
+
+        if found is not None and (not best or found.skipped_symbols == 0 or
+                                  not _can_improve(state, look_ahead_token_position + 1,
+                                                   found.skipped_symbols, whole_stack)):
+            break
 
-    # Parsing step
-    step = 0
+    if found is None:
+        return None
+    parse = _flatten(found.symbol)
+    if verbose:
+        print('\n--- RESULT ---\n')
+        print_parse_node(parse)
+    return parse
 
-    while True:
-        step += 1
+
+def parse_viterbi(
+        input_tokens: Iterable,
+        table: ParsingTable,
+        beam_limit: int = 100,
+        verbose: bool = False,
+        root_production: str = 'ROOT',
+        max_skip: Optional[int] = None,
+        max_span: Optional[int] = None,
+) -> Optional[ParseNode]:
+    """Parses input tokens and returns the parse of the `root_production` with the highest score
+
+    Score of a parse is the sum of the weights of its rules (see `Rule.weight`)
+    and the match scores of its tokens (see `tokema.table.ScoredMatch`), see `parse_score`.
+    Parser nodes carry the scores of their subtrees, so the score of a reduction is
+    the sum of its children scores and the best parse is tracked as parses are found,
+    without collecting and sorting all of them. Parses with equal scores are ranked
+    by the fewest skipped tokens (see `parse_best`), then by the order they are found.
+
+    Ambiguous reductions (alternatives of a production over the same tokens that continue
+    the same way) are resolved by the score instead of the skipped tokens, so the parse
+    can skip more tokens than the ones `parse` returns. Nodes dropped by the `beam_limit`,
+    `max_skip` and `max_span` are not extended, so the result is exact only if the limits
+    don't drop a part of the best parse. Unlike `parse`, parses dropped by the `beam_limit`
+    are still considered. Parameters are the same as in `parse`.
+
+    :returns: Parse with the highest score or None
+    """
+    best = _parse_ranked(
+        resolved_tokens=_iter_resolved_tokens(input_tokens, table),
+        table=table,
+        beam_limit=beam_limit,
+        verbose=verbose,
+        root_production=root_production,
+        max_skip=max_skip,
+        max_span=max_span,
+        k=1
+    )
+    return best[0][1] if best else None
+
+
+def parse_k_best(
+        input_tokens: Iterable,
+        table: ParsingTable,
+        k: int,
+        beam_limit: int = 100,
+        verbose: bool = False,
+        root_production: str = 'ROOT',
+        max_skip: Optional[int] = None,
+        max_span: Optional[int] = None,
+) -> List[Tuple[float, ParseNode]]:
+    """Parses input tokens and returns `k` parses of the `root_production` with the highest scores
+
+    Up to `k` best scored alternatives of every ambiguous reduction are kept, which is enough
+    for the `k` best parses since scores of the subtrees are added up. Only the `k` best
+    parser nodes of the root production found so far are kept in a heap, and only they
+    are turned into parse trees at the end, so the cost of ranking is `O(log k)` per found parse.
+    Ranking and limits are the same as in `parse_viterbi`, other parameters are the same
+    as in `parse`.
+
+    :param k: Number of parses to return
+
+    :returns: (score, parse) pairs, the best first
+    """
+    if k < 1:
+        raise ValueError(f'Number of parses should be positive, got {k}')
+    return _parse_ranked(
+        resolved_tokens=_iter_resolved_tokens(input_tokens, table),
+        table=table,
+        beam_limit=beam_limit,
+        verbose=verbose,
+        root_production=root_production,
+        max_skip=max_skip,
+        max_span=max_span,
+        k=k
+    )
+
+
+def _parse_ranked(
+        resolved_tokens: Iterable[Tuple[int, Any, Optional[Dict[int, Action]], Any]],
+        table: ParsingTable,
+        beam_limit: int,
+        verbose: bool,
+        root_production: str,
+        max_skip: Optional[int],
+        max_span: Optional[int],
+        k: int
+) -> List[Tuple[float, ParseNode]]:
+    """GLR* driver keeping the `k` best parses by score (see `parse_k_best`)"""
+    state = _ParserState(
+        table=table,
+        beam_limit=beam_limit,
+        verbose=verbose,
+        root_productions=(root_production, ),
+        max_skip=max_skip,
+        max_span=max_span,
+        ranked=k
+    )
+
+    # Min-heap of the best root nodes: (score, -skipped symbols, -found index, node),
+    # found index is unique, so nodes are never compared
+    heap: List[Tuple[float, int, int, _Node]] = []
+    found = 0
+    for look_ahead_token_position, look_ahead_token, entry, meta in resolved_tokens:
+        state.step(look_ahead_token_position, look_ahead_token, entry, meta)
+        for node in state.iter_step_root_nodes():
+            item = (node.score, -node.skipped_symbols, -found, node)
+            found += 1
+            if len(heap) < k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+    results = [(item[0], _flatten(item[-1].symbol)) for item in sorted(heap, reverse=True)]
+    if verbose:
+        print('\n--- RESULT ---')
+        for score, parse in results:
+            print(f'\nScore: {score}')
+            print_parse_node(parse)
+    return results
+
+
+def parse_score(node: Union[ParseNode, Symbol]) -> float:
+    """Score of the parse tree: the sum of the weights of its rules (see `Rule.weight`)
+    and the match scores of its tokens (see `tokema.table.ScoredMatch`)
+    """
+    score = 0.0
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        if isinstance(n, ParseNode):
+            score += n.rule.weight
+            stack.extend(n.args)
+        else:
+            score += _match_score(n.meta)
+    return score
+
+
+def _match_score(meta) -> float:
+    return getattr(meta, 'score', 0.0)
+
+
+def _can_improve(state: '_ParserState', position: int, skipped: int, whole_stack: bool) -> bool:
+    """Whether a parse with fewer than `skipped` skipped tokens may still be built on the nodes
+    of the state, when the next token is at the `position`
+    """
+    for node in state.inactive_nodes:
+        cost = position - node.end_pos
+        if whole_stack:
+            # Skipped tokens of the node and its parents, the root has none
+            n = node
+            while n is not None and cost < skipped:
+                cost += n.skipped_symbols
+                n = n.parent
+        if cost < skipped:
+            return True
+    return False
+
+
+def parse_many(
+        inputs: Iterable[Iterable],
+        table: ParsingTable,
+        executor: Optional[Executor] = None,
+        beam_limit: int = 100,
+        root_production: str = 'ROOT',
+        max_skip: Optional[int] = None,
+        max_span: Optional[int] = None,
+        deadline: Optional[float] = None,
+        max_nodes: Optional[int] = None,
+        max_step_nodes: Optional[int] = None,
+) -> List[ParseResults]:
+    """Parses each of the inputs with `parse`, optionally in the threads of the executor
+
+    All threads share the same table, so it should be frozen (see `ParsingTable.freeze`)
+    to use an executor. Parser state is local to each call, so parses of different inputs
+    don't interfere. Threads run in parallel only on free-threaded CPython builds,
+    otherwise the executor helps only if resolvers release the GIL.
+
+    :param inputs: Token sequences
+    :param table: GLR-compatible Parsing table
+    :param executor: Executor running parses, i.e. `concurrent.futures.ThreadPoolExecutor`,
+        None - parse in the calling thread
+    :param beam_limit: See `parse`
+    :param root_production: See `parse`
+    :param max_skip: See `parse`
+    :param max_span: See `parse`
+    :param deadline: Time limit of each parse in seconds, see `parse`
+    :param max_nodes: See `parse`
+    :param max_step_nodes: See `parse`
+
+    :returns: Parse results for each input, in the order of inputs
+    """
+    parse_fn = partial(
+        parse,
+        table=table,
+        beam_limit=beam_limit,
+        root_production=root_production,
+        max_skip=max_skip,
+        max_span=max_span,
+        deadline=deadline,
+        max_nodes=max_nodes,
+        max_step_nodes=max_step_nodes
+    )
+    if executor is None:
+        return [parse_fn(input_tokens) for input_tokens in inputs]
+
+    if not table.frozen:
+        raise ValueError('Table should be frozen (see ParsingTable.freeze) '
+                         'to be shared by executor threads')
+    return list(executor.map(parse_fn, inputs))
+
+
+class _TrieNode:
+    """Node of the token trie used by `parse_batch`"""
+
+    __slots__ = 'children', 'ends'
+
+    def __init__(self):
+        self.children: Dict[Any, '_TrieNode'] = {}
+
+        # Indices of the inputs ending at this node
+        self.ends: List[int] = []
+
+
+def _freeze(parses: List[ParseNode]) -> Tuple[ParseNode, ...]:
+    """Replaces args of all nodes with tuples so that trees can be shared"""
+    stack = list(parses)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ParseNode) and not isinstance(node.args, tuple):
+            node.args = tuple(node.args)
+            stack.extend(node.args)
+    return tuple(parses)
+
+
+# Tokens of these types are indistinguishable if equal
+_VALUE_TYPES = (str, int, float, bool, bytes)
+
+
+def _cache_key_tokens(input_tokens: Tuple, table: ParsingTable) -> Tuple:
+    """Tokens of the result cache key, equal for the tokens the table resolves the same way
+
+    Text tokens are keyed by their text, or by the first normalized form if all resolvers
+    expect normalized tokens, other tokens are keyed by their type and value,
+    so that i.e. `1`, `1.0` and `True` are not confused.
+    """
+    normalizer = table.normalizer
+    form = None
+    if normalizer is not None:
+        forms = [getattr(r, 'form', None) for r in table.resolvers]
+        if all(f is not None for f in forms):
+            form = min(forms, key=normalizer.stage_index)
+
+    key = []
+    for token in input_tokens:
+        if isinstance(token, str):
+            key.append(str(token) if form is None else normalizer.normalize(token, form))
+        else:
+            key.append((type(token), token))
+    return tuple(key)
+
+
+def _rebind(parses: Tuple[ParseNode, ...], input_tokens: Tuple) -> Tuple[ParseNode, ...]:
+    """Copies frozen parse trees with symbol values replaced by the tokens at their positions"""
+    copies: Dict[int, Any] = {}
+    stack: List[Any] = list(parses)
+    while stack:
+        item = stack[-1]
+        if id(item) in copies:
+            stack.pop()
+        elif isinstance(item, Symbol):
+            stack.pop()
+            copies[id(item)] = Symbol(input_tokens[item.position], item.position, item.meta)
+        else:
+            pending = [arg for arg in item.args if id(arg) not in copies]
+            if pending:
+                stack.extend(pending)
+            else:
+                stack.pop()
+                copies[id(item)] = ParseNode(item.rule, tuple(copies[id(arg)] for arg in item.args))
+    return tuple(copies[id(p)] for p in parses)
+
+
+def _iter_resolved_tokens(
+        input_tokens: Iterable,
+        table: ParsingTable,
+        profile: Optional[ParseProfile] = None
+) -> Iterator[Tuple[int, Any, Optional[Dict[int, Action]], Any]]:
+    if profile is not None:
+        for position, token in enumerate(input_tokens):
+            entry, meta = profile.resolve(table, token)
+            yield position, token, entry, meta
+        return
+
+    resolve = table.resolve
+    for position, token in enumerate(input_tokens):
+        entry, meta = resolve(token)
+        yield position, token, entry, meta
+
+
+def _parse_resolved(
+        resolved_tokens: Iterable[Tuple[int, Any, Optional[Dict[int, Action]], Any]],
+        table: ParsingTable,
+        beam_limit: int,
+        verbose: bool,
+        root_productions: Collection[str],
+        max_skip: Optional[int] = None,
+        max_span: Optional[int] = None,
+        deadline: Optional[float] = None,
+        max_nodes: Optional[int] = None,
+        max_step_nodes: Optional[int] = None,
+        profile: Optional[ParseProfile] = None,
+) -> ParseResults:
+    """GLR* driver over already resolved tokens: (position, token, action entry, meta)"""
+    started = time.perf_counter()
+    state = _ParserState(
+        table=table,
+        beam_limit=beam_limit,
+        verbose=verbose,
+        root_productions=root_productions,
+        max_skip=max_skip,
+        max_span=max_span,
+        deadline=None if deadline is None else time.monotonic() + deadline,
+        max_nodes=max_nodes,
+        max_step_nodes=max_step_nodes,
+        profile=profile
+    )
+    for look_ahead_token_position, look_ahead_token, entry, meta in resolved_tokens:
+        state.step(look_ahead_token_position, look_ahead_token, entry, meta)
+        if state.truncated:
+            break
+    parses = ParseResults(state.get_parses(), truncated=state.truncated)
+
+    if profile is not None:
+        profile.parses += 1
+        profile.time += time.perf_counter() - started
+
+    if verbose:
+        if parses.truncated:
+            print(f'\n--- TRUNCATED AFTER {state.node_count} NODES ---')
+        print('\n--- RESULT ---')
+        for n in parses:
+            print()
+            print_parse_node(n)
+
+    return parses
+
+
+class _ParserState:
+    """State of the GLR* parser between input tokens
+
+    Nodes are never modified after creation and refer only to their parents,
+    so the state is forked by copying the lists of the current nodes
+    while the node graph itself is shared.
+    """
+
+    __slots__ = (
+        'table', 'beam_limit', 'verbose', 'root_productions', 'max_skip', 'max_span',
+        'root', 'inactive_nodes', 'bounded', 'window', 'buckets', 'bucket_nodes',
+        'bounded_parses', 'step_index', 'deadline', 'max_nodes', 'max_step_nodes',
+        'node_count', 'truncated', 'profile', 'step_start', 'ranked'
+    )
+
+    def __init__(
+            self,
+            table: ParsingTable,
+            beam_limit: int,
+            verbose: bool,
+            root_productions: Collection[str],
+            max_skip: Optional[int] = None,
+            max_span: Optional[int] = None,
+            deadline: Optional[float] = None,
+            max_nodes: Optional[int] = None,
+            max_step_nodes: Optional[int] = None,
+            profile: Optional[ParseProfile] = None,
+            ranked: int = 0,
+    ):
+        self.table = table
+        self.beam_limit = beam_limit
+        self.verbose = verbose
+        self.root_productions = root_productions
+        self.max_skip = max_skip
+        self.max_span = max_span
+
+        # GLR Parse tree root node
+        self.root = _Node(symbol=None, state=0, start_pos=-1, end_pos=0)
+
+        # Non-active node, states that will be shifted by input token on the shift phase
+        self.inactive_nodes: List[_Node] = [self.root]
+
+        # Bounded mode: inactive nodes (except root) are grouped by end_pos, oldest first.
+        # Every step creates nodes with the same end_pos, so a bucket per step is enough.
+        self.bounded = max_skip is not None or max_span is not None
+        self.window = min(x for x in (max_skip, max_span) if x is not None) if self.bounded else 0
+        self.buckets: Deque[List[_Node]] = deque()
+        self.bucket_nodes = 0
+        self.bounded_parses: List[ParseNode] = []
+
+        # Parsing step
+        self.step_index = 0
+
+        # Limits: deadline is an absolute `time.monotonic()` value.
+        # Once any of them is hit, the state is truncated and should not be stepped anymore.
+        self.deadline = deadline
+        self.max_nodes = max_nodes
+        self.max_step_nodes = max_step_nodes
+        self.node_count = 0
+        self.truncated = False
+
+        self.profile = profile
+
+        # Index of the first node of the inactive nodes created by the last step
+        self.step_start = len(self.inactive_nodes)
+
+        # Number of the best scored alternatives kept per ambiguous node (see `parse_k_best`),
+        # 0 - ambiguous nodes are resolved by skipped tokens
+        self.ranked = ranked
+
+    def fork(self) -> '_ParserState':
+        """Independent copy of the state sharing the nodes"""
+        state = _ParserState.__new__(_ParserState)
+        for attr in _ParserState.__slots__:
+            setattr(state, attr, getattr(self, attr))
+        state.inactive_nodes = list(self.inactive_nodes)
+        state.buckets = deque(self.buckets)
+        state.bounded_parses = list(self.bounded_parses)
+        return state
+
+    def step(
+            self,
+            look_ahead_token_position: int,
+            look_ahead_token,
+            entry: Optional[Dict[int, Action]],
+            meta
+    ):
+        """Shifts the token and performs all reductions"""
+        table = self.table
+        verbose = self.verbose
+        bounded = self.bounded
+        max_skip = self.max_skip
+        max_span = self.max_span
+        root = self.root
+        buckets = self.buckets
+        profile = self.profile
+
+        deadline = self.deadline
+        if deadline is not None and time.monotonic() > deadline:
+            self.truncated = True
+            return
+
+        if self.step_index:
+            self._limit()
+        self.step_index += 1
+
+        # Number of nodes that can be created in this step, None - no limit
+        budget = self.max_step_nodes
+        if self.max_nodes is not None:
+            remaining = max(self.max_nodes - self.node_count, 0)
+            budget = remaining if budget is None else min(budget, remaining)
+        created = 0
+
+        if bounded:
+            # Nodes that ended more than `window` tokens ago can't shift anymore
+            while buckets and look_ahead_token_position - buckets[0][0].end_pos > self.window:
+                bucket = buckets.popleft()
+                self.bucket_nodes -= len(bucket)
+                self.bounded_parses.extend(_iter_root_parses(bucket, self.root_productions))
+
+            self.inactive_nodes = [root]
+            for bucket in buckets:
+                self.inactive_nodes.extend(bucket)
+        inactive_nodes = self.inactive_nodes
+        first_new_node = len(inactive_nodes)
+        self.step_start = first_new_node
+
+        # Nodes queue to check for reductions.
+        # Each reduction produces a new node and adds it to the queue
+        # Reductions happens until queue is empty
+        active_nodes_queue: List[_Node] = []
 
         if verbose:
-            print(f'\n------------- STEP {step} ---------------\n')
+            print(f'\n------------- STEP {self.step_index} ---------------\n')
             _print_parser_state(inactive_nodes=inactive_nodes, active_nodes=active_nodes_queue)
             print(f'\n--- SHIFTING {look_ahead_token} \n')
 
-        # Shift phase
-        for node in inactive_nodes:
-            shift_to_state, meta = table.get_shift_state(node.state, look_ahead_token)
-            if shift_to_state:
-                new_node = _Node(
-                    parent=node,
-                    symbol=Symbol(
-                        value=look_ahead_token,
-                        position=look_ahead_token_position,
-                        meta=meta
-                    ),
-                    state=shift_to_state,
-                    start_pos=look_ahead_token_position,
-                    end_pos=look_ahead_token_position + 1,
-                    skipped_symbols=look_ahead_token_position - node.end_pos
-                )
-                inactive_nodes.append(new_node)  # Add to graph
-                active_nodes_queue.append(new_node)  # Enqueue for potential reductions
+        # Token is a noise for the grammar if none of the resolvers accepted it
+        if entry is not None:
+            token_score = _match_score(meta)
+
+            # Shift phase
+            # Only nodes of the previous steps, new nodes already hold this token
+            for node in inactive_nodes[:first_new_node]:
+                action = entry.get(node.state)
+                if profile is not None:
+                    profile.add_attempt(node.state, isinstance(action, ShiftToStateAction))
+                if isinstance(action, ShiftToStateAction):
+                    if bounded and node is not root and (
+                            (max_skip is not None and
+                             look_ahead_token_position - node.end_pos > max_skip) or
+                            (max_span is not None and
+                             look_ahead_token_position + 1 - node.start_pos > max_span)
+                    ):
+                        continue
+
+                    if budget is not None and created >= budget:
+                        self.truncated = True
+                        break
+                    created += 1
+
+                    new_node = _Node(
+                        parent=node,
+                        symbol=Symbol(
+                            value=look_ahead_token,
+                            position=look_ahead_token_position,
+                            meta=meta
+                        ),
+                        state=action.state,
+                        start_pos=look_ahead_token_position,
+                        end_pos=look_ahead_token_position + 1,
+                        skipped_symbols=look_ahead_token_position - node.end_pos,
+                        score=token_score
+                    )
+                    inactive_nodes.append(new_node)  # Add to graph
+                    active_nodes_queue.append(new_node)  # Enqueue for potential reductions
 
         if verbose:
             _print_parser_state(inactive_nodes=inactive_nodes, active_nodes=active_nodes_queue)
@@ -173,32 +1359,83 @@ def parse(
         while active_nodes_queue:
             node = active_nodes_queue.pop()
 
-            rule = table.get_rule_reduction(node.state, look_ahead_token)
-            if rule:
+            action = entry.get(node.state)
+            if isinstance(action, ReduceByRuleAction):
+                rule = action.rule
                 skipped_symbols = 0
+                score = rule.weight
                 production_args = []
                 production_root = node
+                first_child = node
                 for _ in range(len(rule.queries)):
                     production_args.insert(0, production_root.symbol)
                     skipped_symbols += production_root.skipped_symbols
+                    score += production_root.score
+                    first_child = production_root
                     production_root = production_root.parent
 
+                if max_span is not None and node.end_pos - first_child.start_pos > max_span:
+                    continue
+
+                if budget is not None and created >= budget or \
+                        deadline is not None and created % 64 == 0 and time.monotonic() > deadline:
+                    self.truncated = True
+                    break
+                created += 1
+
+                if isinstance(rule, RepetitionRule):
+                    # Repeated matches are accumulated without nesting
+                    if rule.accumulate:
+                        symbol = _Repetition(rule, production_args[0], production_args[1])
+                    else:
+                        symbol = _Repetition(rule, None, production_args[0])
+                elif any(isinstance(a, _UNFLATTENED) for a in production_args):
+                    symbol = _PendingNode(rule=rule, args=production_args)
+                else:
+                    symbol = ParseNode(rule=rule, args=production_args)
+
                 next_state = table.get_goto_state(production_root.state, rule.production)
                 new_node = _Node(
                     state=next_state,
-                    symbol=ParseNode(rule=rule, args=production_args),
+                    symbol=symbol,
                     parent=production_root,
-                    start_pos=production_root.start_pos,
+                    start_pos=first_child.start_pos,
                     end_pos=node.end_pos,
-                    skipped_symbols=skipped_symbols
+                    skipped_symbols=skipped_symbols,
+                    score=score
                 )
 
+                if self.ranked:
+                    # Alternatives of the same production continue the same way,
+                    # only the best scored ones can be a part of the best scored parses
+                    better = 0
+                    for n in reduction_results:
+                        if n.parent is production_root and n.state == next_state and \
+                                n.start_pos == new_node.start_pos and \
+                                not isinstance(n.symbol, Symbol) and \
+                                n.symbol.rule.production == rule.production and \
+                                (n.score, -n.skipped_symbols) >= (score, -skipped_symbols):
+                            better += 1
+                    rejected = better >= self.ranked
+                    if profile is not None:
+                        profile.add_reduction(rule, rejected=rejected)
+                    if not rejected:
+                        active_nodes_queue.append(new_node)
+                        reduction_results.append(new_node)
+                    elif verbose:
+                        print(f'New node {new_node} (with score {score}) is worse than '
+                              f'{better} ambiguous nodes, skipping')
+                    continue
+
                 # ---- LOCAL AMBIGUOUS NODE CHECK ----
-                # Ambiguous nodes - nodes that share production_root
+                # Ambiguous nodes - reductions of the same production that share
+                # production_root, other productions (e.g. other roots) are not alternatives
                 amb_reduction_results = []
                 inamb_reduction_results = []
                 for n in reduction_results:
-                    if n.parent == new_node.parent and isinstance(n.symbol, ParseNode):
+                    if n.parent == new_node.parent and \
+                            not isinstance(n.symbol, Symbol) and \
+                            n.symbol.rule.production == rule.production:
                         amb_reduction_results.append(n)
                     else:
                         inamb_reduction_results.append(n)
@@ -215,6 +1452,9 @@ def parse(
                             resolved_node = n
                             new_node_is_best = False
 
+                    if profile is not None:
+                        profile.add_reduction(rule, rejected=not new_node_is_best)
+
                     if new_node_is_best:
                         # TODO: Should we keep ambiguous nodes in the graph or replace it?
 
@@ -232,6 +1472,8 @@ def parse(
                                   f' skipping')
 
                 else:
+                    if profile is not None:
+                        profile.add_reduction(rule, rejected=False)
                     active_nodes_queue.append(new_node)
                     reduction_results.append(new_node)
 
@@ -243,34 +1485,87 @@ def parse(
 
         for node in reduction_results:
             inactive_nodes.append(node)
-
-        try:
-            look_ahead_token_position, look_ahead_token = next(token_stream)
-        except StopIteration:
-            # End of stream
-            break
-
-        # Limiting
-        inactive_nodes[:] = inactive_nodes[-beam_limit:]
-
-    # Result gathering
-    parses: List[ParseNode] = [
-        n.symbol for n in inactive_nodes
-        if (
-                isinstance(n.symbol, ParseNode) and
-                n.symbol.rule.production == root_production
-        )
-    ]
-    # parses = sorted(parses, key=lambda _: _.skipped_symbols)
-    # parses = sorted(parses, key=lambda x: x.end_pos - x.start_pos)  # Better sorting ?
-
-    if verbose:
-        print('\n--- RESULT ---')
-        for n in parses:
-            print()
-            print_parse_node(n)
-
-    return parses
+        self.node_count += created
+
+        if bounded and len(inactive_nodes) > first_new_node:
+            bucket = inactive_nodes[first_new_node:]
+            buckets.append(bucket)
+            self.bucket_nodes += len(bucket)
+
+    def _limit(self):
+        """Limits the number of nodes before the next step"""
+        beam_limit = self.beam_limit
+        if self.bounded:
+            # Root node is never dropped, oldest nodes are dropped first
+            buckets = self.buckets
+            while beam_limit and self.bucket_nodes > beam_limit:
+                bucket = buckets[0]
+                excess = self.bucket_nodes - beam_limit
+                dropped = bucket[:excess]
+                if len(dropped) == len(bucket):
+                    buckets.popleft()
+                else:
+                    buckets[0] = bucket[excess:]
+                self.bucket_nodes -= len(dropped)
+                self.bounded_parses.extend(_iter_root_parses(dropped, self.root_productions))
+        elif beam_limit:
+            self.inactive_nodes[:] = self.inactive_nodes[-beam_limit:]
+
+    def iter_step_root_nodes(self) -> Iterator[_Node]:
+        """Nodes of the root productions created by the last step"""
+        root_productions = self.root_productions
+        for n in self.inactive_nodes[self.step_start:]:
+            if isinstance(n.symbol, (ParseNode, _Repetition)) and \
+                    n.symbol.rule.production in root_productions:
+                yield n
+
+    def get_parses(self) -> List[ParseNode]:
+        """Parses of the root productions found in the input so far"""
+        if self.bounded:
+            parses = list(self.bounded_parses)
+            for bucket in self.buckets:
+                parses.extend(_iter_root_parses(bucket, self.root_productions))
+        else:
+            # parses = sorted(parses, key=lambda _: _.skipped_symbols)
+            # parses = sorted(parses, key=lambda x: x.end_pos - x.start_pos)  # Better sorting ?
+            parses = list(_iter_root_parses(self.inactive_nodes, self.root_productions))
+        if len(self.table.roots) > 1:
+            # A root matched inside a match of another root is reduced from both of them,
+            # while a single root table finds it once
+            parses = _unique_parses(parses)
+        return parses
+
+
+def _iter_root_parses(
+        nodes: Iterable[_Node],
+        root_productions: Collection[str]
+) -> Iterator[ParseNode]:
+    for n in nodes:
+        if isinstance(n.symbol, (ParseNode, _Repetition)) and \
+                n.symbol.rule.production in root_productions:
+            yield _flatten(n.symbol)
+
+
+def _unique_parses(parses: Iterable[ParseNode]) -> List[ParseNode]:
+    """Parses without repeated trees (same rules over the same tokens)"""
+    seen = set()
+    unique = []
+    for p in parses:
+        # Rules and arities of the nodes and positions of the tokens in pre-order
+        key = []
+        stack = [p]
+        while stack:
+            n = stack.pop()
+            if isinstance(n, ParseNode):
+                key.append((id(n.rule), len(n.args)))
+                stack.extend(reversed(n.args))
+            else:
+                key.append(n.position)
+        key = tuple(key)
+        if key not in seen:
+            seen.add(key)
+            unique.append(p)
+    return unique
 
 
 def _print_parser_state(active_nodes: Iterable[_Node], inactive_nodes: Iterable[_Node]):
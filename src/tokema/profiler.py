@@ -0,0 +1,246 @@
+"""Grammar hot-spot profiling aggregated over many parses
+
+Pass the same `ParseProfile` to `tokema.parsing.parse` calls (`profile` argument)
+to collect per rule, per parser state and per resolver counters over a corpus.
+`ParseProfile.report` shows the most expensive rules, states and resolvers,
+`ParseProfile.to_json` dumps all counters.
+"""
+
+import json
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Any, Tuple
+
+from .grammar import Rule
+from .table import ParsingTable, Action, Resolver
+
+__all__ = [
+    'ParseProfile',
+    'RuleStats',
+    'StateStats',
+    'ResolverStats'
+]
+
+
+class RuleStats:
+    """Counters of a rule
+
+    :param reductions: Number of nodes produced by reductions by the rule
+    :param rejected: Number of reductions rejected as worse ambiguous alternatives
+    """
+    __slots__ = 'rule', 'reductions', 'rejected'
+
+    def __init__(self, rule: Rule, reductions: int = 0, rejected: int = 0):
+        self.rule = rule
+        self.reductions = reductions
+        self.rejected = rejected
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'rule': str(self.rule), 'reductions': self.reductions, 'rejected': self.rejected}
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {self.rule} reductions: {self.reductions}, ' \
+               f'rejected: {self.rejected}>'
+
+
+class StateStats:
+    """Counters of a parser state
+
+    :param attempts: Number of times a node in the state was tried against an accepted token
+    :param shifts: Number of attempts the token had a shift action from the state
+    """
+    __slots__ = 'state', 'attempts', 'shifts'
+
+    def __init__(self, state: int, attempts: int = 0, shifts: int = 0):
+        self.state = state
+        self.attempts = attempts
+        self.shifts = shifts
+
+    @property
+    def shift_rate(self) -> float:
+        if not self.attempts:
+            return 0.0
+        return self.shifts / self.attempts
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'state': self.state, 'attempts': self.attempts, 'shifts': self.shifts}
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {self.state} attempts: {self.attempts}, ' \
+               f'shifts: {self.shifts}>'
+
+
+class ResolverStats:
+    """Counters of a resolver
+
+    :param calls: Number of tokens passed to the resolver
+    :param hits: Number of tokens accepted by the resolver
+    :param time: Total time spent in the resolver in seconds
+    """
+    __slots__ = 'resolver', 'calls', 'hits', 'time'
+
+    def __init__(self, resolver: Resolver, calls: int = 0, hits: int = 0, time: float = 0.0):
+        self.resolver = resolver
+        self.calls = calls
+        self.hits = hits
+        self.time = time
+
+    @property
+    def name(self) -> str:
+        return self.resolver.__class__.__name__
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'resolver': self.name, 'calls': self.calls, 'hits': self.hits, 'time': self.time}
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {self.name} calls: {self.calls}, ' \
+               f'hits: {self.hits}, time: {self.time:.6f}>'
+
+
+class ParseProfile:
+    """Aggregated counters of many parses
+
+    Profiling slows parsing down, results of profiled parses are never taken from the
+    table result cache.
+    """
+
+    def __init__(self):
+        self.parses = 0
+        self.tokens = 0
+        self.noise_tokens = 0
+        self.time = 0.0
+
+        self.rules: Dict[Rule, RuleStats] = {}
+        self.states: Dict[int, StateStats] = {}
+        self.resolvers: Dict[int, ResolverStats] = {}
+
+        # Hot counters, merged into stats objects on demand
+        self._reductions: Dict[Rule, int] = defaultdict(int)
+        self._rejected: Dict[Rule, int] = defaultdict(int)
+        self._attempts: Dict[int, int] = defaultdict(int)
+        self._shifts: Dict[int, int] = defaultdict(int)
+
+    def resolve(
+            self,
+            table: ParsingTable,
+            input_token
+    ) -> Tuple[Optional[Dict[int, Action]], Any]:
+        """Same as `ParsingTable.resolve` measuring each resolver"""
+        self.tokens += 1
+        for resolver, resolver_input in table.iter_resolver_inputs(input_token):
+            stats = self.resolvers.get(id(resolver))
+            if stats is None:
+                stats = self.resolvers[id(resolver)] = ResolverStats(resolver)
+
+            started = time.perf_counter()
+            entry = resolver.resolve(resolver_input)
+            stats.time += time.perf_counter() - started
+            stats.calls += 1
+
+            if entry is not None:
+                stats.hits += 1
+                meta = None
+                if isinstance(entry, tuple):
+                    entry, meta = entry
+                return entry, meta
+        self.noise_tokens += 1
+        return None, None
+
+    def add_reduction(self, rule: Rule, rejected: bool):
+        self._reductions[rule] += 1
+        if rejected:
+            self._rejected[rule] += 1
+
+    def add_attempt(self, state: int, shifted: bool):
+        self._attempts[state] += 1
+        if shifted:
+            self._shifts[state] += 1
+
+    def _merge(self):
+        for rule, count in self._reductions.items():
+            stats = self.rules.get(rule)
+            if stats is None:
+                stats = self.rules[rule] = RuleStats(rule)
+            stats.reductions += count
+            stats.rejected += self._rejected.get(rule, 0)
+        for state, count in self._attempts.items():
+            stats = self.states.get(state)
+            if stats is None:
+                stats = self.states[state] = StateStats(state)
+            stats.attempts += count
+            stats.shifts += self._shifts.get(state, 0)
+        self._reductions.clear()
+        self._rejected.clear()
+        self._attempts.clear()
+        self._shifts.clear()
+
+    def rule_stats(self, sort_by: str = 'reductions') -> List[RuleStats]:
+        """Rule counters, highest first
+
+        :param sort_by: `reductions` or `rejected`
+        """
+        self._merge()
+        return sorted(self.rules.values(), key=lambda s: getattr(s, sort_by), reverse=True)
+
+    def state_stats(self, sort_by: str = 'attempts') -> List[StateStats]:
+        """State counters, highest first
+
+        :param sort_by: `attempts`, `shifts` or `shift_rate`
+        """
+        self._merge()
+        return sorted(self.states.values(), key=lambda s: getattr(s, sort_by), reverse=True)
+
+    def resolver_stats(self, sort_by: str = 'time') -> List[ResolverStats]:
+        """Resolver counters, highest first
+
+        :param sort_by: `time`, `calls` or `hits`
+        """
+        return sorted(self.resolvers.values(), key=lambda s: getattr(s, sort_by), reverse=True)
+
+    def reset(self):
+        self.__init__()
+
+    def report(self, top: Optional[int] = 10) -> str:
+        """Human readable report of the most expensive rules, states and resolvers
+
+        :param top: Number of rows in each section, None - all
+        """
+        lines = [
+            f'Parses: {self.parses}, tokens: {self.tokens} ({self.noise_tokens} noise), '
+            f'time: {self.time:.6f}s',
+            '',
+            f'{"reductions":>12} {"rejected":>10}  rule'
+        ]
+        for s in self.rule_stats()[:top]:
+            lines.append(f'{s.reductions:>12} {s.rejected:>10}  {s.rule}')
+
+        lines += ['', f'{"attempts":>12} {"shifts":>10}  state']
+        for s in self.state_stats()[:top]:
+            lines.append(f'{s.attempts:>12} {s.shifts:>10}  {s.state}')
+
+        lines += ['', f'{"time":>12} {"calls":>10} {"hits":>10}  resolver']
+        for s in self.resolver_stats()[:top]:
+            lines.append(f'{s.time:>12.6f} {s.calls:>10} {s.hits:>10}  {s.name}')
+        return '\n'.join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'parses': self.parses,
+            'tokens': self.tokens,
+            'noise_tokens': self.noise_tokens,
+            'time': self.time,
+            'rules': [s.to_dict() for s in self.rule_stats()],
+            'states': [s.to_dict() for s in self.state_stats()],
+            'resolvers': [s.to_dict() for s in self.resolver_stats()],
+        }
+
+    def to_json(self, path: Optional[str] = None, **kwargs) -> str:
+        """Dumps all counters as JSON, writing them to the file if `path` is given"""
+        dump = json.dumps(self.to_dict(), **kwargs)
+        if path is not None:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(dump)
+        return dump
+
+    def __str__(self):
+        return self.report()
@@ -0,0 +1,188 @@
+"""Compact read-only string to integer index
+
+Keys are encoded to UTF-8, sorted and packed into a single bytes blob with an offsets array,
+lookups are binary searches over the blob. Compared to a dict of str objects it takes
+a few bytes of overhead per key and can be saved to a file and mapped to memory (mmap),
+so that many processes share a single copy of the index.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Mapping, Optional, Iterator, Tuple, Union, BinaryIO, List
+
+__all__ = [
+    'FrozenStringIndex'
+]
+
+
+# magic, number of keys, size of the blob in bytes
+_HEADER = struct.Struct('<4sIQ')
+_MAGIC = b'TKSI'
+_ALIGN = 8
+
+
+def _to_little_endian(a: array) -> bytes:
+    if sys.byteorder != 'little':
+        a = array(a.typecode, a)
+        a.byteswap()
+    return a.tobytes()
+
+
+def _from_little_endian(buffer: memoryview, typecode: str) -> Union[memoryview, array]:
+    if sys.byteorder != 'little':
+        a = array(typecode, buffer.tobytes())
+        a.byteswap()
+        return a
+    return buffer.cast(typecode)
+
+
+def _padding(size: int) -> int:
+    return -size % _ALIGN
+
+
+class FrozenStringIndex:
+    """Read-only mapping of strings to non-negative integers (i.e. entry ids)
+
+    :param blob: UTF-8 encoded keys sorted by their bytes, one after another
+        (bytes or mmap, slicing should return bytes)
+    :param offsets: Start of each key in the blob (plus the end of the last one)
+    :param values: Value of each key
+    :param base: Offset of the first key in the blob
+    """
+    __slots__ = 'blob', 'offsets', 'values', 'base'
+
+    def __init__(self, blob, offsets, values, base: int = 0):
+        self.blob = blob
+        self.offsets = offsets
+        self.values = values
+        self.base = base
+
+    @classmethod
+    def from_mapping(cls, mapping: Mapping[str, int]) -> 'FrozenStringIndex':
+        items = sorted((key.encode('utf-8'), value) for key, value in mapping.items())
+        offsets = array('I', [0])
+        values = array('i')
+        size = 0
+        for key, value in items:
+            size += len(key)
+            offsets.append(size)
+            values.append(value)
+        return cls(blob=b''.join(key for key, _ in items), offsets=offsets, values=values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def _key(self, i: int) -> bytes:
+        base = self.base
+        return self.blob[base + self.offsets[i]:base + self.offsets[i + 1]]
+
+    def _find(self, key: bytes) -> int:
+        blob = self.blob
+        offsets = self.offsets
+        base = self.base
+        lo = 0
+        hi = len(self.values)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if blob[base + offsets[mid]:base + offsets[mid + 1]] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self.values) and self._key(lo) == key:
+            return lo
+        return -1
+
+    def get(self, key: str, default: Optional[int] = None) -> Optional[int]:
+        try:
+            i = self._find(key.encode('utf-8'))
+        except UnicodeEncodeError:
+            return default
+        if i < 0:
+            return default
+        return self.values[i]
+
+    def __getitem__(self, key: str) -> int:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return isinstance(key, str) and self.get(key) is not None
+
+    def keys(self) -> Iterator[str]:
+        for i in range(len(self.values)):
+            yield self._key(i).decode('utf-8')
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        return zip(self.keys(), self.values)
+
+    def __iter__(self):
+        return self.keys()
+
+    def write(self, f: BinaryIO):
+        """Writes the index to a binary file (see `read`)"""
+        blob = self.blob[self.base:self.base + self.offsets[-1]]
+        f.write(_HEADER.pack(_MAGIC, len(self.values), len(blob)))
+        for data in (
+                _to_little_endian(array('I', self.offsets)),
+                _to_little_endian(array('i', self.values)),
+                blob
+        ):
+            f.write(data)
+            f.write(b'\0' * _padding(len(data)))
+
+    @classmethod
+    def read(cls, buffer, offset: int = 0) -> Tuple['FrozenStringIndex', int]:
+        """Reads the index written by `write` from the buffer (bytes or mmap) without copying
+
+        :returns: The index and the offset right after it in the buffer
+        """
+        view = memoryview(buffer)
+        magic, count, blob_size = _HEADER.unpack_from(view, offset)
+        if magic != _MAGIC:
+            raise ValueError(f'Not a frozen string index at offset {offset}')
+        offset += _HEADER.size
+
+        def _take(size: int) -> memoryview:
+            nonlocal offset
+            data = view[offset:offset + size]
+            offset += size + _padding(size)
+            return data
+
+        offsets = _from_little_endian(_take(4 * (count + 1)), 'I')
+        values = _from_little_endian(_take(4 * count), 'i')
+        base = offset
+        _take(blob_size)
+        return cls(blob=buffer, offsets=offsets, values=values, base=base), offset
+
+    def save(self, path: str):
+        with open(path, 'wb') as f:
+            self.write(f)
+
+    @classmethod
+    def load(cls, path: str, use_mmap: bool = True) -> 'FrozenStringIndex':
+        """Loads the index saved by `save`, mapping the file to memory if `use_mmap`"""
+        return cls.load_many(path, use_mmap=use_mmap)[0]
+
+    @classmethod
+    def load_many(cls, path: str, use_mmap: bool = True) -> List['FrozenStringIndex']:
+        """Loads all indexes written to the file one after another"""
+        with open(path, 'rb') as f:
+            if use_mmap and os.fstat(f.fileno()).st_size:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                buffer = f.read()
+
+        indexes = []
+        offset = 0
+        while offset < len(buffer):
+            index, offset = cls.read(buffer, offset)
+            indexes.append(index)
+        return indexes
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} with {len(self)} keys>'
@@ -1,7 +1,17 @@
-from typing import Optional, Tuple, Mapping, Dict, List, Set, Iterable, Union, Any
+from typing import (
+    Optional, Tuple, Mapping, Dict, List, Set, Iterable, Iterator, Union, Any, Callable, Sequence,
+    TYPE_CHECKING
+)
+from array import array
 from collections import defaultdict
+from itertools import repeat
 
-from .grammar import Rule, TerminalQuery, ReferenceQuery, Query
+from .grammar import Rule, TerminalQuery, ReferenceQuery, Query, expand_repetitions
+from .cache import ResultCache
+
+if TYPE_CHECKING:
+    from .normalize import TokenNormalizer
+    from .adaptive import AdaptiveResolverOrder
 
 
 __all__ = [
@@ -10,7 +20,11 @@ __all__ = [
     'Action',
     'ParsingTable',
     'Resolver',
-    'build_parsing_table'
+    'MergedEntry',
+    'FrozenDict',
+    'ScoredMatch',
+    'build_parsing_table',
+    'measure_automaton'
 ]
 
 
@@ -43,104 +57,332 @@ class ReduceByRuleAction:
 Action = Union[ShiftToStateAction, ReduceByRuleAction]
 
 
-class Item:
-    __slots__ = 'rule', 'expected_token_index', '_hash'
+class Resolver:
+    """Base class for query resolution
 
-    def __init__(self, rule: Rule, expected_token_index: int):
-        self.rule = rule
-        self.expected_token_index = expected_token_index
+    Resolver with `form` attribute set gets tokens normalized by the table normalizer
+    (see `tokema.normalize`) instead of the original ones.
+    """
 
-        # Precomputed hash for performance
-        self._hash = hash((rule, expected_token_index))
+    # Name of the normalized token form the resolver expects, None - original token
+    form: Optional[str] = None
 
-    def __str__(self):
+    # Types of the tokens the resolver can accept, None - any token.
+    # Resolvers accepting unrelated types never accept the same token (see `tokema.adaptive`)
+    token_types: Optional[Tuple[type, ...]] = None
 
-        def _iter():
-            for t in self.rule.queries[:self.expected_token_index]:
-                yield str(t)
-            yield '•'
-            for t in self.rule.queries[self.expected_token_index:]:
-                yield str(t)
+    def add_query(self, query: TerminalQuery, doc):
+        """Registers query if accepted by resolver"""
+        raise NotImplementedError
 
-        tokens = ' '.join(_iter())
-        return f'{self.rule.production}={tokens}'
+    def resolve(self, token):
+        """Tries to resolve token, returning None otherwise"""
+        raise NotImplementedError
 
-    def __repr__(self):
-        return f'{self.__class__.__name__}({self.rule!r}, {self.expected_token_index!r})'
+    def replace_entries(self, replace: Callable[[Any], Any]):
+        """Replaces each registered action entry with `replace(entry)` (see `tokema.compact`)"""
+        raise NotImplementedError
 
-    def __hash__(self):
-        return self._hash
+    def freeze(self):
+        """Finishes lazy initialization and makes indexes read-only, after that `resolve`
+        does not modify the resolver except for thread-safe caches (see `ParsingTable.freeze`)
+        """
 
-    def __eq__(self, other):
-        if isinstance(other, Item):
-            return self._hash == other._hash
-        return False
 
+class MergedEntry(dict):
+    """Action entry of a token matching several queries of a resolver
+    (i.e. overlapping regex or prefix queries)
 
-class State:
-    def __init__(self, id: int, items: Tuple[Item]):
-        self.id = id
-        self.items = items
+    Token matches every query of the `sources` entries, so they are used instead
+    of the merged entry to check which queries the token matches (see `tokema.analysis`).
 
-        # Precomputed hash for performance
-        self._hash = hash(items)
+    :param sources: Action entries of the matched queries, actions of the earlier ones win
+    """
+    __slots__ = 'sources'
 
-    def __hash__(self):
-        return self._hash
+    def __init__(self, sources: Sequence[Mapping[int, Action]]):
+        super().__init__()
+        for entry in reversed(sources):
+            self.update(entry)
+        self.sources = tuple(sources)
 
-    def __iter__(self):
-        return iter(self.items)
 
-    def __str__(self):
-        return ', '.join(str(i) for i in self.items)
+class FrozenDict(dict):
+    """Read-only dict of the frozen tables and resolvers (see `ParsingTable.freeze`)
+
+    Lookups are the ones of a plain dict, unlike `types.MappingProxyType` it can be pickled.
+    """
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(f'{self.__class__.__name__} is read-only')
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return self.__class__, (dict(self), )
+
+
+class ScoredMatch:
+    """Resolver meta carrying the match score of the token
+
+    Any meta with a numeric `score` attribute is scored the same way,
+    score of a parse is the sum of the scores of its tokens and the weights of its rules
+    (see `tokema.parsing.parse_viterbi`).
+
+    :param score: Match quality, i.e. a negative penalty for a fuzzy match
+    :param value: Additional meta information
+    """
+    __slots__ = 'score', 'value'
+
+    def __init__(self, score: float, value=None):
+        self.score = score
+        self.value = value
 
     def __eq__(self, other):
-        if isinstance(other, self.__class__):
-            return self._hash == other._hash
+        if isinstance(other, ScoredMatch):
+            return self.score == other.score and self.value == other.value
         return False
 
+    def __hash__(self):
+        return hash((self.score, self.value))
 
-class Resolver:
-    """Base class for query resolution"""
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.score!r}, {self.value!r})'
 
-    def add_query(self, query: TerminalQuery, doc):
-        """Registers query if accepted by resolver"""
-        raise NotImplementedError
 
-    def resolve(self, token):
-        """Tries to resolve token, returning None otherwise"""
-        raise NotImplementedError
+def _replaces_entries(resolver: Resolver) -> bool:
+    """Whether the resolver implements `Resolver.replace_entries`"""
+    return getattr(type(resolver), 'replace_entries', None) not in (None, Resolver.replace_entries)
 
 
 class ParsingTable:
-    def __init__(self, resolvers: List[Resolver]):
+    def __init__(
+            self,
+            resolvers: List[Resolver],
+            rules: Optional[List[Rule]] = None,
+            roots: Optional[List[str]] = None,
+            normalizer: Optional['TokenNormalizer'] = None
+    ):
         self._goto: Mapping[int, Dict[str, int]] = defaultdict(dict)
         self._resolvers = resolvers
+        self.normalizer = normalizer
+
+        # Resolvers expecting normalized tokens are bound to the normalizer of the table
+        for resolver in resolvers:
+            form = getattr(resolver, 'form', None)
+            if form is not None:
+                if normalizer is None:
+                    raise ValueError(f'{resolver.__class__.__name__} expects {form!r} '
+                                     f'token form, but table has no normalizer')
+                normalizer.stage_index(form)
+                if hasattr(resolver, 'normalizer'):
+                    resolver.normalizer = normalizer
         self._action_pre_table = defaultdict(dict)
 
+        # Grammar the table was built from and productions parser starts from
+        self.rules: List[Rule] = rules if rules is not None else []
+        self.roots: List[str] = roots if roots is not None else []
+
+        # Incremented on every change, results computed with another version are stale
+        self.version = 0
+        self.cache: Optional[ResultCache] = None
+
+        # Compacted table is read-only (see `tokema.compact`)
+        self.compacted = False
+
+        # Frozen table is immutable and can be shared by threads (see `freeze`)
+        self.frozen = False
+        self.adaptive: Optional['AdaptiveResolverOrder'] = None
+
+    @property
+    def resolvers(self) -> Sequence[Resolver]:
+        return self._resolvers
+
+    @property
+    def resolver_order(self) -> List[Resolver]:
+        """Resolvers in the order they are called to resolve a token"""
+        if self.adaptive is not None:
+            return list(self.adaptive.order)
+        return list(self._resolvers)
+
+    def enable_adaptive_order(
+            self,
+            priority: Iterable[Resolver] = (),
+            disjoint: Iterable[Iterable[Resolver]] = (),
+            interval: int = 4096,
+            sample_interval: int = 16
+    ) -> 'AdaptiveResolverOrder':
+        """Reorders resolvers by observed hit rates and costs (see `tokema.adaptive`)
+
+        :param priority: Resolvers always called first in the declared order
+        :param disjoint: Groups of resolvers that never accept the same token,
+            only such resolvers and resolvers of unrelated token types are swapped
+        :param interval: Number of resolved tokens between reorderings
+        :param sample_interval: Every `sample_interval`-th token is passed to all resolvers
+            to collect statistics
+        """
+        from .adaptive import AdaptiveResolverOrder
+
+        if self.frozen:
+            raise ValueError('Adaptive ordering modifies the table, it can not be enabled '
+                             'for a frozen table')
+        priority = list(priority)
+        disjoint = [list(group) for group in disjoint]
+        unknown = [r for r in priority if all(r is not t for t in self._resolvers)]
+        if unknown:
+            raise ValueError(f'Priority resolvers {unknown} are not resolvers of the table')
+        unknown = [r for group in disjoint for r in group
+                   if all(r is not t for t in self._resolvers)]
+        if unknown:
+            raise ValueError(f'Disjoint resolvers {unknown} are not resolvers of the table')
+        if interval < 1 or sample_interval < 1:
+            raise ValueError('interval and sample_interval should be positive')
+
+        self.adaptive = AdaptiveResolverOrder(
+            self._resolvers,
+            priority=priority,
+            disjoint=disjoint,
+            interval=interval,
+            sample_interval=sample_interval
+        )
+        return self.adaptive
+
+    def disable_adaptive_order(self):
+        self.adaptive = None
+
+    def enable_cache(self, max_size: int = 1024) -> ResultCache:
+        """Attaches LRU cache of parse results to the table (see `tokema.cache`)
+
+        Note that changes made directly to the resolvers are not tracked,
+        clear the cache manually in such case.
+        """
+        self.cache = ResultCache(max_size=max_size)
+        return self.cache
+
+    def disable_cache(self):
+        self.cache = None
+
     def add_action(self, state: int, terminal_query: TerminalQuery, action: Action):
+        self._check_writable()
+        self.version += 1
         entry = self._action_pre_table[terminal_query]  # e.g. get_or_create_entry(query)
         entry[state] = action
         for resolver in self._resolvers:
             resolver.add_query(terminal_query, entry)
 
+    def _check_writable(self):
+        if self.frozen:
+            raise ValueError('Frozen table is read-only')
+        if self.compacted:
+            raise ValueError('Compacted table is read-only')
+
+    def freeze(self):
+        """Makes the table immutable, so that one table can be shared by parsing threads
+
+        Goto rows, action entries and indexes of the resolvers are replaced with `FrozenDict`
+        and resolvers finish their lazy initialization (see `Resolver.freeze`).
+        Lookups never insert missing keys. Frozen table can be pickled,
+        i.e. sent to the worker processes of `tokema.document.parse_document`.
+        Result cache is thread-safe and can be used with a frozen table,
+        adaptive resolver ordering can not.
+
+        Replacing action entries increments `version`, so `tokema.vocab.Vocabulary` and
+        `tokema.analysis.Prefilter` built before freezing resolve their tokens again.
+        """
+        if self.frozen:
+            return
+        if self.adaptive is not None:
+            raise ValueError('Table with adaptive resolver ordering can not be frozen')
+
+        self._goto = FrozenDict({
+            state: FrozenDict(row) for state, row in self._goto.items() if row
+        })
+
+        # Entries are wrapped only if every resolver can receive the wrapped ones
+        if all(_replaces_entries(r) for r in self._resolvers):
+            replaced = {
+                id(entry): FrozenDict(entry)
+                for entry in self._action_pre_table.values() if isinstance(entry, dict)
+            }
+
+            def _replace(entry):
+                return replaced.get(id(entry), entry)
+
+            for resolver in self._resolvers:
+                resolver.replace_entries(_replace)
+            self._action_pre_table = {q: _replace(e) for q, e in self._action_pre_table.items()}
+            self.version += 1
+        self._action_pre_table = FrozenDict(self._action_pre_table)
+
+        for resolver in self._resolvers:
+            freeze = getattr(resolver, 'freeze', None)
+            if freeze is not None:
+                freeze()
+        self._resolvers = tuple(self._resolvers)
+        self.frozen = True
+
+    def get_entry(self, terminal_query: TerminalQuery) -> Optional[Dict[int, Action]]:
+        """Returns action entry (state -> action mapping) registered for the query"""
+        return self._action_pre_table.get(terminal_query)
+
     def add_goto(self, state: int, variable: str, next_state: int):
+        self._check_writable()
+        self.version += 1
         self._goto[state][variable] = next_state
 
-    def get_action(self, state: int, input_token) -> Tuple[Optional[Action], Any]:
+    def resolve(self, input_token) -> Tuple[Optional[Dict[int, Action]], Any]:
+        """Resolves input token to the action entry (state -> action mapping) and resolver meta
+
+        Resolution does not depend on the parser state, so it is enough to do it once per token.
+        """
+        if self.adaptive is not None:
+            return self.adaptive.resolve(self, input_token)
+
+        if self.normalizer is None:
+            resolver_inputs = zip(self._resolvers, repeat(input_token))
+        else:
+            resolver_inputs = self.iter_resolver_inputs(input_token)
+
         # Calling each resolver and ask them if they can handle give input token
-        for resolver in self._resolvers:
-            entry = resolver.resolve(input_token)
+        for resolver, resolver_input in resolver_inputs:
+            entry = resolver.resolve(resolver_input)
             if entry is not None:
                 meta = None
                 if isinstance(entry, tuple):
                     # Extracting additional metadata information from the resolver
                     entry, meta = entry
-                return entry.get(state), meta
+                return entry, meta
+        return None, None
+
+    def iter_resolver_inputs(self, input_token) -> Iterator[Tuple[Resolver, Any]]:
+        """Yields resolvers in order with the token form each of them expects
+
+        Normalized forms of a text token are computed once and only when requested.
+        """
+        normalizer = self.normalizer
+        if normalizer is None or not isinstance(input_token, str):
+            for resolver in self._resolvers:
+                yield resolver, input_token
+            return
+
+        forms = normalizer.token_forms(input_token)
+        for resolver in self._resolvers:
+            form = getattr(resolver, 'form', None)
+            yield resolver, (input_token if form is None else forms[form])
+
+    def get_action(self, state: int, input_token) -> Tuple[Optional[Action], Any]:
+        entry, meta = self.resolve(input_token)
+        if entry is not None:
+            return entry.get(state), meta
         return None, None
 
     def get_goto_state(self, state: int, variable: str) -> Optional[int]:
-        return self._goto[state].get(variable)
+        row = self._goto.get(state)
+        if row is None:
+            return None
+        return row.get(variable)
 
     def get_shift_state(self, state: int, look_ahead_token) -> Tuple[Optional[int], Any]:
         action, meta = self.get_action(state, look_ahead_token)
@@ -155,140 +397,173 @@ class ParsingTable:
         return None
 
 
-def expand_items(items: List[Item], rules: List[Rule], idx: int = -1):
-    """Closure: Expands `items` from rules by its expectation tokens from last item recursively
+class _ItemEncoding:
+    """Integer encoding of LR(0) items of the grammar
 
-    `items` array is modified during execution to reduce list allocations
+    Item of the rule `i` with the dot before the query `dot` is `offsets[i] + dot`,
+    so items of a rule are consecutive integers and the next item is `item + 1`.
+    Per-item properties are precomputed into flat lists indexed by item,
+    item sets are `array('I')` of items, 4 bytes per item.
     """
-    root = items[idx]
-    if root.expected_token_index < len(root.rule.queries):
-        expected_token = root.rule.queries[root.expected_token_index]
-        if isinstance(expected_token, ReferenceQuery):
-            for rule in rules:
-                if rule.production == expected_token.reference:
-
-                    # Checks if the items we are going to build is already in the items array
-                    # This could happen if we have multiple rules with same reference expectation
-                    # A = . <X>
-                    # B = . <X>
-                    # So we need to check if <X> is already expanded
-                    if not item_is_in_collection(rule, 0, items):
-                        items.append(Item(rule=rule, expected_token_index=0))
-
-                        # Expand further recursively (depth-first)
-                        expand_items(items, rules)
-
-
-def item_is_in_collection(
-        rule: Rule,
-        expected_token_index: int,
-        collection: Iterable[Item]
-) -> bool:
-    for item in collection:
-        if rule == item.rule and expected_token_index == item.expected_token_index:
-            return True
-    return False
-
-
-def find_state_containing_items(states: List[State], items: Iterable[Item]) -> Optional[State]:
-    for state in states:
-        all_items_present_in_state = True
-        for item in items:
-            if not item_is_in_collection(item.rule, item.expected_token_index, state.items):
-                all_items_present_in_state = False
-                break
-        if all_items_present_in_state:
-            return state
-    return None
-
-
-def expand_states(states: List[State], rules: List[Rule], transitions: Set[Tuple]):
-    # TODO: Optimize performance
-    root = states[-1]
-
-    for transition_token, new_core_items in iter_transitions_from_state(root):
-
-        # Expand all items for each basic core item
-        # Because multiple items could produce same new state using same transition token
-        for i in range(len(new_core_items)):
-            expand_items(new_core_items, rules, idx=i)
 
-        new_state = find_state_containing_items(states, new_core_items)
-        if not new_state:
-            # There is no state with these items - create a new one
-            new_state = State(id=len(states), items=tuple(new_core_items))
-            states.append(new_state)
-
-            # expand new state recursively (depth-first)
-            expand_states(states, rules, transitions)
-
-        # Add transition in any case
-        transitions.add((root.id, transition_token, new_state.id))
-
-
-def iter_transitions_from_state(state: State) -> Iterable[Tuple[Query, List[Item]]]:
-    """Iterates transitions from state returning transition token and list of new state's core
-    items
-    """
-
-    # TODO: REFACTOR
-    transitions = defaultdict(list)
-    for item in state:
-
-        # If there is expectation in item
-        if item.expected_token_index < len(item.rule.queries):
-            transition_token = item.rule.queries[item.expected_token_index]
-
-            # Create new item from current by shifting expectation token index (the dot) right
-            new_state_root = Item(
-                rule=item.rule,
-                expected_token_index=item.expected_token_index + 1
-            )
-            transitions[transition_token].append(new_state_root)
-
-    return transitions.items()
+    __slots__ = (
+        'rules', 'offsets', 'item_rule', 'item_symbol', 'symbols', 'references',
+        '_production_rules', '_closures'
+    )
+
+    def __init__(self, rules: List[Rule]):
+        # Rules are compared by identity, the same rule object is a single rule
+        self.rules: List[Rule] = list({id(rule): rule for rule in rules}.values())
+
+        # Distinct queries, the first of equal queries represents all of them
+        symbol_ids: Dict[Query, int] = {}
+        self.symbols: List[Query] = []
+
+        # Production referenced by a symbol, None for terminals
+        self.references: List[Optional[str]] = []
+
+        self.offsets = array('I')
+        self.item_rule = array('I')
+
+        # Symbol expected by an item, -1 for completed items
+        self.item_symbol = array('i')
+
+        self._production_rules: Dict[str, List[int]] = defaultdict(list)
+        for rule_index, rule in enumerate(self.rules):
+            self._production_rules[rule.production].append(rule_index)
+            self.offsets.append(len(self.item_rule))
+            for query in rule.queries:
+                symbol = symbol_ids.get(query)
+                if symbol is None:
+                    symbol = len(self.symbols)
+                    symbol_ids[query] = symbol
+                    self.symbols.append(query)
+                    self.references.append(
+                        query.reference if isinstance(query, ReferenceQuery) else None
+                    )
+                self.item_rule.append(rule_index)
+                self.item_symbol.append(symbol)
+            self.item_rule.append(rule_index)
+            self.item_symbol.append(-1)
+
+        self._closures: Dict[str, array] = {}
+
+    def expand(self, production: str, present: Set[int], items: List[int]):
+        """Appends initial items of the `production` rules missing in `present` to `items`,
+        expanding the references they start with depth-first
+        """
+        production_rules = self._production_rules
+        offsets = self.offsets
+        item_symbol = self.item_symbol
+        references = self.references
+
+        stack = [iter(production_rules.get(production, ()))]
+        while stack:
+            rule_index = next(stack[-1], None)
+            if rule_index is None:
+                stack.pop()
+                continue
+            item = offsets[rule_index]
+            if item in present:
+                continue
+            present.add(item)
+            items.append(item)
+            symbol = item_symbol[item]
+            if symbol >= 0 and references[symbol] is not None:
+                stack.append(iter(production_rules.get(references[symbol], ())))
+
+    def closure(self, production: str) -> array:
+        """Initial items expanded from the `production` in order, cached"""
+        items = self._closures.get(production)
+        if items is None:
+            expanded: List[int] = []
+            self.expand(production, set(), expanded)
+            items = array('I', expanded)
+            self._closures[production] = items
+        return items
+
+    def close(self, kernel: Iterable[int]) -> array:
+        """Kernel items followed by the items expanded from them
+
+        Expanded items of a closed item set are closed as well, so expansions
+        of the kernel items are precomputed per production (see `closure`).
+        """
+        items = array('I', kernel)
+        present: Set[int] = set()
+        item_symbol = self.item_symbol
+        references = self.references
+        for kernel_item in kernel:
+            symbol = item_symbol[kernel_item]
+            if symbol < 0 or references[symbol] is None:
+                continue
+            for item in self.closure(references[symbol]):
+                if item not in present:
+                    present.add(item)
+                    items.append(item)
+        return items
+
+    def is_complete(self, item: int) -> bool:
+        return self.item_symbol[item] < 0
+
+    def rule(self, item: int) -> Rule:
+        return self.rules[self.item_rule[item]]
+
+    def format_item(self, item: int) -> str:
+        rule = self.rule(item)
+        dot = item - self.offsets[self.item_rule[item]]
+        tokens = ' '.join([
+            *(str(t) for t in rule.queries[:dot]), '•', *(str(t) for t in rule.queries[dot:])
+        ])
+        return f'{rule.production}={tokens}'
+
+    def format_state(self, items: Iterable[int]) -> str:
+        return ', '.join(self.format_item(i) for i in items)
 
 
 def build_parsing_table(
         rules: List[Rule],
         resolvers: Iterable[Resolver],
-        verbose: bool = False
+        verbose: bool = False,
+        roots: Optional[Iterable[str]] = None,
+        normalizer: Optional['TokenNormalizer'] = None
 ) -> ParsingTable:
-    terminal_queries: Set[TerminalQuery] = set()
-
-    # Collect all terminal queries
-    for rule in rules:
-        for token in rule.queries:
-            if isinstance(token, TerminalQuery):
-                terminal_queries.add(token)
-
-    # Create root state
-    root_rule = rules[0]
-    root_item = Item(rule=root_rule, expected_token_index=0)
-    root_state_items = [root_item]
-    expand_items(root_state_items, rules)
-    root_state = State(0, tuple(root_state_items))
-
-    # Expand all states and transitions
-    states = [root_state]
-    transitions: Set[Tuple[int, TerminalQuery, int]] = set()
-    expand_states(states, rules, transitions)
+    """Builds GLR parsing table
+
+    :param rules: Grammar rules
+    :param resolvers: Resolvers used to match input tokens with terminal queries
+    :param verbose: Print states and transitions
+    :param roots: Productions parser starts from, production of the first rule by default.
+        Parser starts from all rules of the root productions, so alternatives of the root
+        written as separate rules (or produced by optional queries) are parsed as well.
+        With multiple roots a single parse can find parses of each of them
+        (see `tokema.parsing.parse_grouped`)
+    :param normalizer: Token normalization pipeline shared by resolvers, see `tokema.normalize`
+    """
+    rules = expand_repetitions(rules)
+    terminal_queries = _collect_terminal_queries(rules)
+    roots = _get_roots(rules, roots)
+    encoding, states, transitions = _build_automaton(rules, roots)
 
     # Create terminal token resolution table
-    table = ParsingTable(resolvers=list(resolvers))
+    table = ParsingTable(
+        resolvers=list(resolvers),
+        rules=list(rules),
+        roots=roots,
+        normalizer=normalizer
+    )
 
     if verbose:
         print('States:')
-    for state in states:
-        for item in state.items:
+    for state_id, items in enumerate(states):
+        for item in items:
 
-            if item.expected_token_index >= len(item.rule.queries):
-                action = ReduceByRuleAction(item.rule)
+            if encoding.is_complete(item):
+                action = ReduceByRuleAction(encoding.rule(item))
                 for t in terminal_queries:
-                    table.add_action(state.id, t, action)
+                    table.add_action(state_id, t, action)
 
         if verbose:
-            print(f'{state.id}\t{state}')
+            print(f'{state_id}\t{encoding.format_state(items)}')
 
     if verbose:
         print('Edges:')
@@ -301,3 +576,112 @@ def build_parsing_table(
             table.add_action(from_id, token, ShiftToStateAction(to_id))
 
     return table
+
+
+def _collect_terminal_queries(rules: List[Rule]) -> Set[TerminalQuery]:
+    terminal_queries: Set[TerminalQuery] = set()
+    for rule in rules:
+        for token in rule.queries:
+            if isinstance(token, TerminalQuery):
+                terminal_queries.add(token)
+    return terminal_queries
+
+
+def _get_roots(rules: List[Rule], roots: Optional[Iterable[str]]) -> List[str]:
+    if roots is None:
+        return [rules[0].production]
+
+    roots = list(dict.fromkeys(roots))
+    missing = set(roots).difference(r.production for r in rules)
+    if missing:
+        raise ValueError(f'Root productions {sorted(missing)} are not defined by rules')
+    return roots
+
+
+def _build_automaton(
+        rules: List[Rule],
+        roots: List[str]
+) -> Tuple[_ItemEncoding, List[array], Set[Tuple[int, Query, int]]]:
+    """Builds LR(0) states and transitions between them
+
+    States are arrays of integer items (see `_ItemEncoding`), the state id is its index.
+    A transition leads to the state with exactly the kernel items reached by it,
+    states are numbered in the depth-first order of the transitions.
+    """
+    encoding = _ItemEncoding(rules)
+    item_symbol = encoding.item_symbol
+    symbols = encoding.symbols
+
+    # Create root state
+    root_items = [
+        encoding.offsets[i] for i, rule in enumerate(encoding.rules) if rule.production in roots
+    ]
+    present = set(root_items)
+    for item in tuple(root_items):
+        symbol = item_symbol[item]
+        if symbol >= 0 and encoding.references[symbol] is not None:
+            encoding.expand(encoding.references[symbol], present, root_items)
+    states: List[array] = [array('I', root_items)]
+
+    # Ids of the states by their sorted kernel items.
+    # A state is reused only for exactly the same kernel: a state with extra kernel items
+    # would also reduce by rules longer than the path leading to it.
+    state_ids: Dict[Tuple[int, ...], int] = {}
+
+    def _iter_transitions(items: array) -> Iterator[Tuple[int, List[int]]]:
+        # Kernels reached by each expected symbol, in the order of the items
+        kernels: Dict[int, List[int]] = {}
+        for item in items:
+            symbol = item_symbol[item]
+            if symbol >= 0:
+                kernel = kernels.get(symbol)
+                if kernel is None:
+                    kernels[symbol] = [item + 1]
+                else:
+                    kernel.append(item + 1)
+        return iter(kernels.items())
+
+    # Expand all states and transitions depth-first
+    transitions: Set[Tuple[int, Query, int]] = set()
+    stack = [(0, _iter_transitions(states[0]))]
+    while stack:
+        state_id, state_transitions = stack[-1]
+        transition = next(state_transitions, None)
+        if transition is None:
+            stack.pop()
+            continue
+
+        symbol, kernel = transition
+        key = tuple(sorted(kernel))
+        next_state_id = state_ids.get(key)
+        if next_state_id is None:
+            # There is no state with these items - create a new one
+            next_state_id = len(states)
+            state_ids[key] = next_state_id
+            items = encoding.close(kernel)
+            states.append(items)
+            stack.append((next_state_id, _iter_transitions(items)))
+
+        # Add transition in any case
+        transitions.add((state_id, symbols[symbol], next_state_id))
+
+    return encoding, states, transitions
+
+
+def measure_automaton(rules: List[Rule], roots: Optional[Iterable[str]] = None) -> Tuple[int, int]:
+    """Returns number of states and number of actions (including gotos) of the parsing table
+    that would be built from the `rules` without building the table itself
+    """
+    rules = expand_repetitions(rules)
+    terminal_queries = _collect_terminal_queries(rules)
+    encoding, states, transitions = _build_automaton(rules, _get_roots(rules, roots))
+
+    # Actions are counted without collecting them, reducing states have actions
+    # for all terminals, including the shifted ones
+    reducing = [any(encoding.is_complete(item) for item in items) for items in states]
+    actions = sum(reducing) * len(terminal_queries)
+    for from_id, token, _ in transitions:
+        if not (reducing[from_id] and isinstance(token, TerminalQuery)):
+            actions += 1
+
+    return len(states), actions
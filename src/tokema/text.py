@@ -1,23 +1,43 @@
 """Common text-based pipeline and set of queries and resolvers"""
 
-from typing import Iterable, List
+import re
+from typing import Iterable, Iterator, List, Tuple, Union, IO, Optional, Dict
 
 from .grammar import *
 from .table import *
 from .eof import EOF_TOKEN, EofQuery, EofResolver
+from .optimize import optimize_rules
+from .strindex import FrozenStringIndex
+from .normalize import TokenNormalizer, NormalizedTextResolver
+from .trie import CharTrie
 
 __all__ = [
     'TextQuery',
     'IntQuery',
     'FloatQuery',
+    'RegexQuery',
+    'PrefixQuery',
+    'RegexMatch',
     'ExactTextResolver',
     'CaseInsensitiveTextResolver',
     'IntResolver',
     'FloatResolver',
+    'RegexResolver',
+    'PrefixResolver',
     'LevenshteinTextResolver',
+    'FrozenTextIndex',
+    'text_entries',
+    'freeze_text_resolvers',
+    'save_text_resolvers',
+    'load_text_resolvers',
     'parse_rules_from_string',
     'build_text_parsing_table',
-    'tokenize'
+    'tokenize',
+    'TOKEN_PATTERN',
+    'TextToken',
+    'iter_token_spans',
+    'iter_tokens',
+    'iter_file_tokens'
 ]
 
 
@@ -71,8 +91,55 @@ class FloatQuery(TerminalQuery):
         return isinstance(other, self.__class__)
 
 
+class RegexQuery(TerminalQuery):
+    """Matches tokens fully matching the regular expression, `{re:pattern}` in rules strings"""
+    __slots__ = 'pattern',
+
+    def __init__(self, pattern: str):
+        # Fail early on invalid patterns
+        re.compile(pattern)
+        self.pattern = pattern
+
+    def __hash__(self):
+        return hash((self.__class__.__name__, self.pattern))
+
+    def __str__(self):
+        return f'{{re:{self.pattern}}}'
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.pattern!r})'
+
+    def __eq__(self, other):
+        if isinstance(other, self.__class__):
+            return self.pattern == other.pattern
+        return False
+
+
+class PrefixQuery(TerminalQuery):
+    """Matches tokens starting with the prefix, `{prefix:text}` in rules strings"""
+    __slots__ = 'prefix',
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+
+    def __hash__(self):
+        return hash((self.__class__.__name__, self.prefix))
+
+    def __str__(self):
+        return f'{{prefix:{self.prefix}}}'
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.prefix!r})'
+
+    def __eq__(self, other):
+        if isinstance(other, self.__class__):
+            return self.prefix == other.prefix
+        return False
+
+
 class ExactTextResolver(Resolver):
     __slots__ = 'index'
+    token_types = (str, )
 
     def __init__(self):
         self.index = {}
@@ -85,9 +152,17 @@ class ExactTextResolver(Resolver):
         if isinstance(token, str):
             return self.index.get(token)
 
+    def replace_entries(self, replace):
+        _replace_index_entries(self.index, replace)
+
+    def freeze(self):
+        if isinstance(self.index, dict):
+            self.index = FrozenDict(self.index)
+
 
 class CaseInsensitiveTextResolver(Resolver):
     __slots__ = 'index'
+    token_types = (str, )
 
     def __init__(self):
         self.index = {}
@@ -100,6 +175,13 @@ class CaseInsensitiveTextResolver(Resolver):
         if isinstance(token, str):
             return self.index.get(token.lower())
 
+    def replace_entries(self, replace):
+        _replace_index_entries(self.index, replace)
+
+    def freeze(self):
+        if isinstance(self.index, dict):
+            self.index = FrozenDict(self.index)
+
 
 class IntResolver(Resolver):
     def __init__(self):
@@ -116,6 +198,10 @@ class IntResolver(Resolver):
         except (ValueError, TypeError):
             return None
 
+    def replace_entries(self, replace):
+        if self.doc is not None:
+            self.doc = replace(self.doc)
+
 
 class FloatResolver(Resolver):
     def __init__(self):
@@ -132,6 +218,218 @@ class FloatResolver(Resolver):
         except (ValueError, TypeError):
             return None
 
+    def replace_entries(self, replace):
+        if self.doc is not None:
+            self.doc = replace(self.doc)
+
+
+class RegexMatch:
+    """Groups captured by the `RegexQuery` pattern, same as `re.Match.groups` and `groupdict`"""
+    __slots__ = 'query', 'groups', 'named'
+
+    def __init__(self, query: RegexQuery, groups: Tuple[Optional[str], ...], named: Dict[str, str]):
+        self.query = query
+        self.groups = groups
+        self.named = named
+
+    def __getitem__(self, item):
+        if isinstance(item, str):
+            return self.named[item]
+        return self.groups[item]
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.query!r}, {self.groups!r}, {self.named!r})'
+
+
+# Group references in patterns that have to be renumbered when patterns are combined.
+# Same as `re`, escapes starting with 0 or of three octal digits are octal escapes, not references
+_GROUP_SYNTAX = re.compile(
+    r'\\(?:0[0-7]{0,2}|[0-7]{3})|\\([1-9]\d?)|\\.|\(\?P<(\w+)>|\(\?P=(\w+)\)|\[(?:\\.|[^\]])*\]?'
+)
+
+
+def _prefix_groups(pattern: str, prefix: str, offset: int) -> str:
+    """Renames named groups and shifts numeric backreferences of the pattern,
+    so that it can be embedded into a combined pattern after `offset` groups
+    """
+
+    def _replace(m: re.Match) -> str:
+        if m.group(1) is not None:
+            return f'(?:\\{int(m.group(1)) + offset})'
+        if m.group(2) is not None:
+            return f'(?P<{prefix}{m.group(2)}>'
+        if m.group(3) is not None:
+            return f'(?P={prefix}{m.group(3)})'
+        return m.group(0)
+
+    return _GROUP_SYNTAX.sub(_replace, pattern)
+
+
+class RegexResolver(Resolver):
+    """Resolves all `RegexQuery` queries with a single match call per token
+
+    Patterns are combined into one compiled regex where each pattern is an optional lookahead
+    with a named group, so one match identifies all queries the token fully matches.
+    If several queries match, their action entries are merged into a `MergedEntry`,
+    earlier registered queries win.
+    Resolver meta is a tuple of `RegexMatch` of all matched queries.
+    """
+    token_types = (str, )
+
+    def __init__(self, cache_size: int = 1024):
+        self.queries: List[RegexQuery] = []
+        self.entries: List[Dict] = []
+        self.cache_size = cache_size
+
+        self._pattern: Optional[re.Pattern] = None
+
+        # Group index of each query in the combined pattern and its own groups
+        self._groups: List[Tuple[int, int, Dict[str, int]]] = []
+
+        # Matched queries -> merged action entry
+        self._merged: Dict[Tuple[int, ...], Dict] = {}
+
+    def add_query(self, query: TerminalQuery, doc):
+        if isinstance(query, RegexQuery):
+            if query not in self.queries:
+                self.queries.append(query)
+                self.entries.append(doc)
+            self._pattern = None
+
+    def replace_entries(self, replace):
+        self.entries = [replace(entry) for entry in self.entries]
+        self._merged = {}
+
+    def freeze(self):
+        self.queries = tuple(self.queries)
+        self.entries = tuple(self.entries)
+        if self.queries and self._pattern is None:
+            self._compile()
+
+    def _compile(self) -> re.Pattern:
+        parts = []
+        self._groups = []
+        offset = 0
+        for i, query in enumerate(self.queries):
+            own = re.compile(query.pattern)
+            embedded = _prefix_groups(query.pattern, prefix=f'_q{i}_', offset=offset + 1)
+            parts.append(f'(?:(?=(?P<_q{i}>{embedded})\\Z))?')
+            self._groups.append((offset + 1, own.groups, dict(own.groupindex)))
+            offset += own.groups + 1
+        self._merged = {}
+        self._pattern = re.compile(''.join(parts))
+        return self._pattern
+
+    def resolve(self, token):
+        if not self.queries or not isinstance(token, str):
+            return None
+        pattern = self._pattern
+        if pattern is None:
+            pattern = self._compile()
+
+        values = pattern.match(token).groups()
+        matched = tuple(i for i, (index, _, _) in enumerate(self._groups)
+                        if values[index - 1] is not None)
+        if not matched:
+            return None
+
+        entry = self._merged.get(matched)
+        if entry is None:
+            if len(matched) == 1:
+                entry = self.entries[matched[0]]
+            else:
+                entry = MergedEntry([self.entries[i] for i in matched])
+            if len(self._merged) >= self.cache_size:
+                self._merged.clear()
+            self._merged[matched] = entry
+
+        meta = []
+        for i in matched:
+            index, count, names = self._groups[i]
+            groups = values[index:index + count]
+            meta.append(RegexMatch(
+                query=self.queries[i],
+                groups=groups,
+                named={name: groups[j - 1] for name, j in names.items()}
+            ))
+        return entry, tuple(meta)
+
+
+class PrefixResolver(Resolver):
+    """Resolves `PrefixQuery` queries with a character trie in O(len(token))
+
+    If several prefixes of the token are registered, their action entries are merged
+    into a `MergedEntry`, longer prefixes win. Resolver meta is the longest matched prefix.
+    Call `freeze` after the table is built to replace the trie with a compact array-backed one.
+
+    :param form: Normalized token form to match prefixes against (see `tokema.normalize`),
+        prefixes of the queries are normalized the same way
+    """
+    token_types = (str, )
+
+    def __init__(self, form: Optional[str] = None):
+        self.form = form
+        self.normalizer: Optional[TokenNormalizer] = None
+        self.trie = CharTrie()
+        self.prefixes: List[str] = []
+
+        # Action entries of the queries of each prefix, queries may share a normalized prefix
+        self.entries: List[List[Dict]] = []
+
+        # Normalized prefix -> prefix id, query -> prefix id.
+        # Table registers the entry of a query once per state, the entry is updated in place.
+        self._ids: Dict[str, int] = {}
+        self._query_ids: Dict[PrefixQuery, int] = {}
+
+        # Matched prefix ids -> merged action entry
+        self._merged: Dict[Tuple[int, ...], Dict] = {}
+
+    def add_query(self, query: TerminalQuery, doc):
+        if isinstance(query, PrefixQuery) and query not in self._query_ids:
+            if not isinstance(self.trie, CharTrie):
+                raise TypeError('Frozen prefix trie is read-only, queries can not be added')
+            prefix = query.prefix
+            if self.form is not None:
+                prefix = self.normalizer.normalize(prefix, self.form)
+            prefix_id = self._ids.get(prefix)
+            if prefix_id is None:
+                prefix_id = len(self.prefixes)
+                self._ids[prefix] = prefix_id
+                self.trie.add(prefix, prefix_id)
+                self.prefixes.append(prefix)
+                self.entries.append([])
+            self.entries[prefix_id].append(doc)
+            self._query_ids[query] = prefix_id
+            self._merged = {}
+
+    def replace_entries(self, replace):
+        self.entries = [[replace(entry) for entry in entries] for entries in self.entries]
+        self._merged = {}
+
+    def freeze(self):
+        """Replaces the trie with a read-only array-backed one (see `tokema.trie`)"""
+        self.trie = self.trie.freeze()
+        self.prefixes = tuple(self.prefixes)
+        self.entries = tuple(tuple(entries) for entries in self.entries)
+
+    def resolve(self, token):
+        if not isinstance(token, str):
+            return None
+        found = self.trie.find_prefixes(token)
+        if not found:
+            return None
+
+        length, prefix_id = found[-1]
+        if len(found) == 1 and len(self.entries[prefix_id]) == 1:
+            return self.entries[prefix_id][0], self.prefixes[prefix_id]
+
+        key = tuple(i for _, i in found)
+        entry = self._merged.get(key)
+        if entry is None:
+            entry = MergedEntry([e for _, i in reversed(found) for e in self.entries[i]])
+            self._merged[key] = entry
+        return entry, self.prefixes[prefix_id]
+
 
 def _iter_levenshtein_distance1_variations(original: str, alphabet: str) -> Iterable[str]:
     original = original.lower()
@@ -154,10 +452,19 @@ def _iter_levenshtein_distance1_variations(original: str, alphabet: str) -> Iter
 
 
 class LevenshteinTextResolver(Resolver):
+    """Matches texts with at most one typo
+
+    :param min_len: Minimum length of the texts matched with typos
+    :param fuzzy_score: Score of the matches with a typo (see `ScoredMatch`), i.e. a negative
+        penalty so that parses of the exact matches rank higher, None - matches are not scored
+    """
+    token_types = (str, )
 
-    def __init__(self, min_len: int = 4):
+    def __init__(self, min_len: int = 4, fuzzy_score: Optional[float] = None):
         self.min_len = min_len
+        self.fuzzy_score = fuzzy_score
         self.index = {}
+        self.exact = set()
         self.alphabet: str = ' abcdefghijklmnopqrstuvwxyz' \
                              'абвгдеёжзгдийклмнопрстуфхцчшщъыьэюя' \
                              ',./1234567890-=\\'
@@ -166,12 +473,174 @@ class LevenshteinTextResolver(Resolver):
         if isinstance(query, TextQuery):
             text = query.text.lower()
             if len(text) >= self.min_len:
+                self.exact.add(text)
                 for variation in _iter_levenshtein_distance1_variations(text, self.alphabet):
                     self.index[variation] = doc
 
     def resolve(self, token):
         if isinstance(token, str):
-            return self.index.get(token.lower())
+            text = token.lower()
+            entry = self.index.get(text)
+            if entry is not None and self.fuzzy_score is not None and text not in self.exact:
+                return entry, ScoredMatch(self.fuzzy_score)
+            return entry
+
+    def replace_entries(self, replace):
+        _replace_index_entries(self.index, replace)
+
+    def freeze(self):
+        if isinstance(self.index, dict):
+            self.index = FrozenDict(self.index)
+        self.exact = frozenset(self.exact)
+
+
+class FrozenTextIndex:
+    """Read-only replacement of the text resolvers index (see `freeze_text_resolvers`)
+
+    :param strings: Word to entry id index
+    :param entries: Action entries by entry id, shared by all text resolvers of the table
+    """
+    __slots__ = 'strings', 'entries'
+
+    def __init__(self, strings: FrozenStringIndex, entries: List[Optional[Dict[int, Action]]]):
+        self.strings = strings
+        self.entries = entries
+
+    def get(self, key: str) -> Optional[Dict[int, Action]]:
+        entry_id = self.strings.get(key)
+        if entry_id is None:
+            return None
+        return self.entries[entry_id]
+
+    def __setitem__(self, key, value):
+        raise TypeError('Frozen text index is read-only, queries can not be added')
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} with {len(self)} words>'
+
+
+def _replace_index_entries(index: Union[Dict[str, Dict[int, Action]], FrozenTextIndex], replace):
+    if isinstance(index, FrozenTextIndex):
+        # Entries list is shared by all frozen text indexes of the table
+        index.entries[:] = [replace(entry) for entry in index.entries]
+    else:
+        for key, entry in index.items():
+            index[key] = replace(entry)
+
+
+_TEXT_RESOLVERS = (
+    ExactTextResolver,
+    CaseInsensitiveTextResolver,
+    LevenshteinTextResolver,
+    NormalizedTextResolver
+)
+
+
+def text_entries(table: ParsingTable) -> List[Optional[Dict[int, Action]]]:
+    """Action entries of the text queries of the table ordered by query text
+
+    Position of an entry in the list is its id in frozen text indexes. It depends only on
+    the grammar, so ids are the same for tables built from the same rules in other processes.
+    """
+    texts = sorted({
+        q.text for rule in table.rules for q in rule.queries if isinstance(q, TextQuery)
+    })
+    return [table.get_entry(TextQuery(text)) for text in texts]
+
+
+def _text_resolvers(table: ParsingTable) -> List[Resolver]:
+    return [r for r in table.resolvers if isinstance(r, _TEXT_RESOLVERS)]
+
+
+def freeze_text_resolvers(table: ParsingTable) -> List[Optional[Dict[int, Action]]]:
+    """Replaces dict indexes of the text resolvers of the table with compact `FrozenTextIndex`
+
+    All text resolvers share one list of action entries, queries can not be added afterwards.
+
+    :returns: Shared action entries list (see `text_entries`)
+    """
+    entries = text_entries(table)
+    entry_ids = {id(entry): i for i, entry in enumerate(entries)}
+    for resolver in _text_resolvers(table):
+        if isinstance(resolver.index, FrozenTextIndex):
+            continue
+        try:
+            mapping = {word: entry_ids[id(entry)] for word, entry in resolver.index.items()}
+        except KeyError:
+            raise ValueError(f'{resolver.__class__.__name__} index contains entries '
+                             f'not registered in the table')
+        resolver.index = FrozenTextIndex(FrozenStringIndex.from_mapping(mapping), entries)
+    return entries
+
+
+def save_text_resolvers(table: ParsingTable, path: str):
+    """Freezes text resolvers of the table and saves their indexes to the file
+
+    Workers building the table from the same rules can share the saved file
+    (see `load_text_resolvers`).
+    """
+    freeze_text_resolvers(table)
+    with open(path, 'wb') as f:
+        for resolver in _text_resolvers(table):
+            resolver.index.strings.write(f)
+
+
+def load_text_resolvers(table: ParsingTable, path: str, use_mmap: bool = True):
+    """Replaces indexes of the text resolvers of the table with ones saved by `save_text_resolvers`
+
+    With `use_mmap` the file is mapped to memory, so processes loading the same file
+    share a single copy of it.
+    Table should be built from the same rules with the same text resolvers.
+    """
+    resolvers = _text_resolvers(table)
+    indexes = FrozenStringIndex.load_many(path, use_mmap=use_mmap)
+    if len(indexes) != len(resolvers):
+        raise ValueError(f'File contains {len(indexes)} text indexes, '
+                         f'table has {len(resolvers)} text resolvers')
+
+    entries = text_entries(table)
+    for resolver, strings in zip(resolvers, indexes):
+        if len(strings) and max(strings.values) >= len(entries):
+            raise ValueError('Text index does not match the table grammar')
+        resolver.index = FrozenTextIndex(strings, entries)
+
+
+def _split_outside_braces(text: str, sep: Optional[str] = None) -> List[str]:
+    """Splits text by the separator (whitespace if None) except inside `{re:...}` queries,
+    so that regex queries may contain separators
+    """
+    if '{re:' not in text:
+        return text.split(sep)
+
+    parts = []
+    current = []
+    depth = 0
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if depth and ch == '\\':
+            current.append(text[i:i + 2])
+            i += 2
+            continue
+        if ch == '{' and (depth or text.startswith('{re:', i)):
+            depth += 1
+        elif ch == '}' and depth:
+            depth -= 1
+        if not depth and (ch.isspace() if sep is None else text.startswith(sep, i)):
+            parts.append(''.join(current))
+            current = []
+            i += 1 if sep is None else len(sep)
+            continue
+        current.append(ch)
+        i += 1
+    parts.append(''.join(current))
+
+    if sep is None:
+        return [p for p in parts if p]
+    return parts
 
 
 def _parse_rules_from_line(
@@ -194,8 +663,8 @@ def _parse_rules_from_line(
     if not args_collection:
         raise ValueError(f'Invalid rule "{rule}": missing args')
 
-    for args_str in args_collection.split(productions_sep):
-        args = args_str.strip().split()
+    for args_str in _split_outside_braces(args_collection, productions_sep):
+        args = _split_outside_braces(args_str.strip())
 
         if not args:
             raise ValueError(f'Invalid rule "{rule}": empty argument in production')
@@ -203,20 +672,41 @@ def _parse_rules_from_line(
         tokens = []
         for a in args:
             a = a.strip()
-            if a.startswith(reference_start) and a.endswith(reference_end):
-                tokens.append(ReferenceQuery(a[len(reference_start):-len(reference_end)]))
-            elif a == EofQuery.QUERY_SYMBOL:
-                tokens.append(EofQuery())
-            elif a == '{int}':
-                tokens.append(IntQuery())
-            elif a == '{float}':
-                tokens.append(FloatQuery())
+
+            # Repetition operators are allowed for references only, so plain text like "?", "+7"
+            # or "{int}+" is matched literally (use `RepeatQuery` to repeat a terminal query)
+            operator = a[-1:]
+            base = a[:-1]
+            if (
+                    len(a) > 1 and
+                    operator in RepeatQuery.OPERATORS and
+                    base.startswith(reference_start) and
+                    base.endswith(reference_end)
+            ):
+                query = _parse_query(base, reference_start, reference_end)
+                tokens.append(RepeatQuery.from_operator(query, operator))
             else:
-                tokens.append(TextQuery(a))
+                tokens.append(_parse_query(a, reference_start, reference_end))
 
         yield Rule(production=production, queries=tuple(tokens))
 
 
+def _parse_query(arg: str, reference_start: str, reference_end: str) -> Query:
+    if arg.startswith(reference_start) and arg.endswith(reference_end):
+        return ReferenceQuery(arg[len(reference_start):-len(reference_end)])
+    elif arg == EofQuery.QUERY_SYMBOL:
+        return EofQuery()
+    elif arg == '{int}':
+        return IntQuery()
+    elif arg == '{float}':
+        return FloatQuery()
+    elif arg.startswith('{re:') and arg.endswith('}'):
+        return RegexQuery(arg[len('{re:'):-1])
+    elif arg.startswith('{prefix:') and arg.endswith('}'):
+        return PrefixQuery(arg[len('{prefix:'):-1])
+    return TextQuery(arg)
+
+
 def parse_rules_from_string(
         raw: str,
         rule_sep: str = '=',
@@ -225,6 +715,19 @@ def parse_rules_from_string(
         reference_start: str = '<',
         reference_end: str = '>',
 ) -> List[Rule]:
+    """Parses grammar rules, one or more alternatives per line: `ROOT = <A> b | c {int}`
+
+    References may be followed by a repetition operator (see `RepeatQuery`): `<A>?`, `<A>*`
+    and `<A>+`. Note that such arguments were matched as literal text before operators
+    were supported. Other arguments never take operators, i.e. `{int}+` is a literal token.
+
+    :param raw: Rules text
+    :param rule_sep: Separator of the production and its alternatives
+    :param productions_sep: Separator of the alternatives
+    :param line_comment: Prefix of the comment lines
+    :param reference_start: Start of the production reference
+    :param reference_end: End of the production reference
+    """
     rules = []
     for line in raw.splitlines():
         line = line.strip()
@@ -244,17 +747,35 @@ def parse_rules_from_string(
 def build_text_parsing_table(
         rules: List[Rule],
         verbose: bool = False,
-        additional_resolvers: Iterable[Resolver] = None
+        additional_resolvers: Iterable[Resolver] = None,
+        roots: Optional[Iterable[str]] = None,
+        optimize: bool = False,
+        normalizer: Optional[TokenNormalizer] = None
 ) -> ParsingTable:
     """Construct text-parsing table for parsing text-based tokens
 
     Special set of text-resolvers is added
+
+    :param rules: Grammar rules
+    :param verbose: Print states and transitions
+    :param additional_resolvers: Resolvers to use after the text ones
+    :param roots: Root productions, see `build_parsing_table`
+    :param optimize: Normalize grammar before building the table, see `optimize_rules`.
+        Use `restore_tree` to get parse trees of the original grammar
+    :param normalizer: Token normalization pipeline for resolvers with `form`
+        (i.e. `tokema.normalize.NormalizedTextResolver`)
     """
+    if optimize:
+        rules, report = optimize_rules(rules, roots=roots, measure=verbose)
+        if verbose:
+            print(report)
 
     resolvers = [
         ExactTextResolver(),
         CaseInsensitiveTextResolver(),
         #LevenshteinTextResolver(),
+        RegexResolver(),
+        PrefixResolver(),
         IntResolver(),
         FloatResolver(),
         EofResolver()
@@ -264,7 +785,13 @@ def build_text_parsing_table(
         for r in additional_resolvers:
             resolvers.append(r)
 
-    return build_parsing_table(rules=rules, verbose=verbose, resolvers=resolvers)
+    return build_parsing_table(
+        rules=rules,
+        verbose=verbose,
+        resolvers=resolvers,
+        roots=roots,
+        normalizer=normalizer
+    )
 
 
 def tokenize(src: str, add_eof: bool = False) -> List[str]:
@@ -277,3 +804,121 @@ def tokenize(src: str, add_eof: bool = False) -> List[str]:
     if add_eof:
         symbols.append(EOF_TOKEN)
     return symbols
+
+
+# Default tokenization regex: words, numbers or single punctuation symbols
+TOKEN_PATTERN = re.compile(
+    r'[^\W\d_]+|'                            # any alphabetical and non-numeric
+    r'\d+|'                                  # or digit
+    r'[:";\'!@#$%^&*()<>?,./[\]{}\\|\-_+=]'  # or symbol
+)
+
+
+class TextToken(str):
+    """Text token that remembers its character offsets in the source
+
+    Behaves exactly like a `str`, so all text resolvers work with it as is.
+    Offsets are kept on the token rather than in `Symbol.meta`, which holds the resolver meta
+    (i.e. `int` value or regex groups), `Symbol.span` and `ParseNode.span` read them.
+
+    :param text: Token text
+    :param start: Index of the first character of the token in the source
+    :param end: Index after the last character of the token in the source
+    """
+    __slots__ = 'start', 'end'
+
+    def __new__(cls, text: str, start: int, end: int):
+        token = super().__new__(cls, text)
+        token.start = start
+        token.end = end
+        return token
+
+    @property
+    def span(self) -> Tuple[int, int]:
+        return self.start, self.end
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({str(self)!r}, {self.start!r}, {self.end!r})'
+
+    def __reduce__(self):
+        return self.__class__, (str(self), self.start, self.end)
+
+
+def iter_token_spans(src: str, pattern=TOKEN_PATTERN) -> Iterator[Tuple[int, int]]:
+    """Lazily yields (start, end) character offsets of tokens without copying substrings"""
+    for match in pattern.finditer(src):
+        yield match.span()
+
+
+def iter_tokens(
+        src: str,
+        pattern=TOKEN_PATTERN,
+        add_eof: bool = False,
+        offset: int = 0
+) -> Iterator[Union[TextToken, object]]:
+    """Lazily tokenizes `src` yielding `TextToken` objects with character offsets
+
+    :param src: Source text
+    :param pattern: Compiled tokenization regex
+    :param add_eof: Yield `EOF_TOKEN` after the last token
+    :param offset: Value added to all offsets (i.e. position of `src` in a larger text)
+    """
+    for match in pattern.finditer(src):
+        start, end = match.span()
+        yield TextToken(match.group(), start + offset, end + offset)
+
+    if add_eof:
+        yield EOF_TOKEN
+
+
+def iter_file_tokens(
+        f: Union[str, IO[str]],
+        pattern=TOKEN_PATTERN,
+        add_eof: bool = False,
+        chunk_size: int = 1 << 16,
+        encoding: str = 'utf-8'
+) -> Iterator[Union[TextToken, object]]:
+    """Tokenizes a (large) text file reading it in chunks without loading it whole
+
+    Offsets of the tokens are character offsets in the whole file.
+    Matches starting within the last `chunk_size` characters of the buffer and the text after
+    them are postponed until the next chunk is read, so tokens crossing chunk boundaries are
+    not split or lost, even if their beginning is a shorter token (i.e. `11` of `11.25`)
+    or not a match by itself (i.e. `3.` of `\\d+\\.\\d+`).
+    Tokens are expected to be shorter than the chunk: unmatched text is postponed only
+    within the last `chunk_size` characters, except for a match continuing to the end.
+
+    :param f: Path to a file or a file-like object opened in text mode
+    :param pattern: Compiled tokenization regex
+    :param add_eof: Yield `EOF_TOKEN` after the last token
+    :param chunk_size: Number of characters to read at once
+    :param encoding: File encoding if path is given
+    """
+    if isinstance(f, str):
+        with open(f, 'r', encoding=encoding) as fp:
+            yield from iter_file_tokens(fp, pattern, add_eof, chunk_size)
+        return
+
+    buffer = ''
+    buffer_offset = 0  # Offset of the buffer start in the whole file
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        buffer += chunk
+
+        # Text that might continue in the next chunk
+        pending_start = max(len(buffer) - chunk_size, 0)
+        for match in pattern.finditer(buffer):
+            start, end = match.span()
+            if start >= pending_start or end == len(buffer):
+                # The match might be a beginning of a longer token
+                pending_start = start
+                break
+            yield TextToken(match.group(), start + buffer_offset, end + buffer_offset)
+            pending_start = max(pending_start, end)
+
+        buffer = buffer[pending_start:]
+        buffer_offset += pending_start
+
+    yield from iter_tokens(buffer, pattern, add_eof=add_eof, offset=buffer_offset)
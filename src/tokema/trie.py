@@ -0,0 +1,124 @@
+"""Character tries mapping string prefixes to integer values
+
+`CharTrie` is mutable and stores children of each node in a dict.
+`FrozenCharTrie` stores the same structure in a few flat typed arrays
+with sorted edges per node, which takes a fraction of the memory of the dicts.
+Both find all stored prefixes of a string in O(len(string)).
+"""
+
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+__all__ = [
+    'CharTrie',
+    'FrozenCharTrie'
+]
+
+
+# Value of nodes that do not end a stored key
+_NO_VALUE = -1
+
+
+class CharTrie:
+    """Mutable trie of string keys with non-negative integer values"""
+
+    def __init__(self):
+        # Children and value of each node, node 0 is the root
+        self.children: List[Dict[str, int]] = [{}]
+        self.values = array('i', [_NO_VALUE])
+
+    def __len__(self):
+        return sum(1 for v in self.values if v != _NO_VALUE)
+
+    def add(self, key: str, value: int):
+        node = 0
+        for ch in key:
+            child = self.children[node].get(ch)
+            if child is None:
+                child = len(self.children)
+                self.children[node][ch] = child
+                self.children.append({})
+                self.values.append(_NO_VALUE)
+            node = child
+        self.values[node] = value
+
+    def find_prefixes(self, text: str) -> List[Tuple[int, int]]:
+        """Returns (prefix length, value) of all keys that are prefixes of the text, shortest first"""
+        children = self.children
+        values = self.values
+        found = []
+        node = 0
+        if values[0] != _NO_VALUE:
+            found.append((0, values[0]))
+        for i, ch in enumerate(text):
+            node = children[node].get(ch)
+            if node is None:
+                break
+            if values[node] != _NO_VALUE:
+                found.append((i + 1, values[node]))
+        return found
+
+    def freeze(self) -> 'FrozenCharTrie':
+        return FrozenCharTrie.from_trie(self)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} with {len(self)} keys, {len(self.values)} nodes>'
+
+
+class FrozenCharTrie:
+    """Read-only array-backed trie (see `CharTrie.freeze`)
+
+    Edges of node `n` are `edge_chars[first_edge[n]:first_edge[n + 1]]` (sorted code points)
+    leading to the nodes `edge_targets` at the same positions.
+    """
+    __slots__ = 'first_edge', 'edge_chars', 'edge_targets', 'values'
+
+    def __init__(self, first_edge: array, edge_chars: array, edge_targets: array, values: array):
+        self.first_edge = first_edge
+        self.edge_chars = edge_chars
+        self.edge_targets = edge_targets
+        self.values = values
+
+    @classmethod
+    def from_trie(cls, trie: CharTrie) -> 'FrozenCharTrie':
+        first_edge = array('i', [0])
+        edge_chars = array('I')
+        edge_targets = array('i')
+        for children in trie.children:
+            for ch, child in sorted(children.items()):
+                edge_chars.append(ord(ch))
+                edge_targets.append(child)
+            first_edge.append(len(edge_chars))
+        return cls(first_edge, edge_chars, edge_targets, array('i', trie.values))
+
+    def __len__(self):
+        return sum(1 for v in self.values if v != _NO_VALUE)
+
+    def find_prefixes(self, text: str) -> List[Tuple[int, int]]:
+        """Returns (prefix length, value) of all keys that are prefixes of the text, shortest first"""
+        first_edge = self.first_edge
+        edge_chars = self.edge_chars
+        edge_targets = self.edge_targets
+        values = self.values
+        found = []
+        node = 0
+        if values[0] != _NO_VALUE:
+            found.append((0, values[0]))
+        for i, ch in enumerate(text):
+            code = ord(ch)
+            lo = first_edge[node]
+            hi = first_edge[node + 1]
+            edge = bisect_left(edge_chars, code, lo, hi)
+            if edge == hi or edge_chars[edge] != code:
+                break
+            node = edge_targets[edge]
+            if values[node] != _NO_VALUE:
+                found.append((i + 1, values[node]))
+        return found
+
+    def freeze(self) -> 'FrozenCharTrie':
+        return self
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} with {len(self)} keys, {len(self.values)} nodes>'
@@ -5,7 +5,8 @@ from contextlib import contextmanager
 __all__ = [
     'print_tree',
     'print_parented_tree',
-    'benchmark'
+    'benchmark',
+    'same_tree'
 ]
 
 
@@ -19,26 +20,24 @@ def print_tree(
 ):
     padding = " "*len(marker_str)
     connection_str = "│" + padding[:-1]
-    level = len(level_markers)
     mapper_fn = (lambda draw: connection_str if draw else padding)
-    markers = "".join(map(mapper_fn, level_markers[:-1]))
-
-    if not is_last:
-        markers += marker_str if level > 0 else ""
-    else:
-        markers += "└─ " if level > 0 else ""
-    print(f"{markers}{value_fn(root)}")
-    children = list(iter_children_fn(root))
-    for i, child in enumerate(children):
-        is_last = i == len(children) - 1
-        print_tree(
-            root=child,
-            value_fn=value_fn,
-            iter_children_fn=iter_children_fn,
-            marker_str=marker_str,
-            level_markers=[*level_markers, not is_last],
-            is_last=is_last
-        )
+
+    # Walked without recursion, so that deep trees don't hit the recursion limit
+    stack = [(root, tuple(level_markers), is_last)]
+    while stack:
+        node, node_markers, node_is_last = stack.pop()
+        level = len(node_markers)
+        markers = "".join(map(mapper_fn, node_markers[:-1]))
+
+        if not node_is_last:
+            markers += marker_str if level > 0 else ""
+        else:
+            markers += "└─ " if level > 0 else ""
+        print(f"{markers}{value_fn(node)}")
+        children = list(iter_children_fn(node))
+        for i in range(len(children) - 1, -1, -1):
+            child_is_last = i == len(children) - 1
+            stack.append((children[i], (*node_markers, not child_is_last), child_is_last))
 
 
 def print_parented_tree(nodes_iterator, parent_fn, value_fn, key_fn=lambda x: x):
@@ -51,10 +50,12 @@ def print_parented_tree(nodes_iterator, parent_fn, value_fn, key_fn=lambda x: x)
     """
 
     def _iter_node_parent_pairs(_n):
-        _p = parent_fn(_n)
-        yield _n, _p
-        if _p:
-            yield from _iter_node_parent_pairs(_p)
+        while True:
+            _p = parent_fn(_n)
+            yield _n, _p
+            if not _p:
+                break
+            _n = _p
 
     nodes_normalized = defaultdict(dict)
     for node in nodes_iterator:
@@ -83,3 +84,22 @@ def benchmark(name: str):
     yield
     elapsed = (time.time() - started) * 1000
     print(f'{name} finished in {elapsed:.2f} ms')
+
+
+def same_tree(a, b) -> bool:
+    """Compares parse trees by rules, token values and positions
+
+    Trees are walked without recursion, so that deep trees don't hit the recursion limit.
+    """
+    stack = [(a, b)]
+    while stack:
+        x, y = stack.pop()
+        x_args = getattr(x, 'args', None)
+        y_args = getattr(y, 'args', None)
+        if x_args is not None:
+            if y_args is None or x.rule is not y.rule or len(x_args) != len(y_args):
+                return False
+            stack.extend(zip(x_args, y_args))
+        elif y_args is not None or x.position != y.position or x.value != y.value:
+            return False
+    return True
@@ -0,0 +1,163 @@
+"""Vocabulary encoding of tokens into compact integer arrays
+
+Each distinct token is resolved by the table only once, when it is added to the vocabulary.
+Encoded token ids index precomputed action entries, so parsing encoded input
+(see `tokema.parsing.parse_encoded`) costs a list lookup per token instead of
+calling all table resolvers.
+"""
+
+from array import array
+from itertools import chain
+from typing import Iterable, List, Sequence, Dict, Optional, Any, Hashable
+
+from .table import ParsingTable, Action
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+__all__ = [
+    'NOISE_ID',
+    'Vocabulary',
+    'EncodedCorpus'
+]
+
+
+# Id of all tokens that are not accepted by any of the table resolvers
+NOISE_ID = 0
+
+
+class EncodedCorpus:
+    """Batch of documents encoded into one flat token id array
+
+    :param ids: Token ids of all documents one after another
+    :param offsets: Start index of each document in `ids` (plus the end of the last one)
+    """
+    __slots__ = 'ids', 'offsets'
+
+    def __init__(self, ids, offsets):
+        self.ids = ids
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, item: int):
+        return self.ids[self.offsets[item]:self.offsets[item + 1]]
+
+    def __iter__(self):
+        ids = self.ids
+        offsets = self.offsets
+        for i in range(len(offsets) - 1):
+            yield ids[offsets[i]:offsets[i + 1]]
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} with {len(self)} documents, {len(self.ids)} tokens>'
+
+
+class Vocabulary:
+    """Maps tokens to integer ids with precomputed table resolution
+
+    Tokens that are not accepted by any resolver are mapped to `NOISE_ID`.
+    Tokens must be hashable.
+
+    The vocabulary stores resolutions made at the time of encoding. If the table has changed
+    since then (i.e. it was frozen or compacted, which replaces its action entries),
+    tokens are resolved again on the next use, see `refresh`.
+
+    :param table: Parsing table used to resolve tokens
+    :param use_numpy: Return numpy arrays instead of `array('i')` if numpy is installed
+    """
+
+    def __init__(self, table: ParsingTable, use_numpy: bool = False):
+        self.table = table
+        self.use_numpy = use_numpy and numpy is not None
+
+        # id -> original token, action entry and resolver meta
+        self.tokens: List[Any] = [None]
+        self.entries: List[Optional[Dict[int, Action]]] = [None]
+        self.metas: List[Any] = [None]
+
+        # Table version the entries were resolved with
+        self.version = table.version
+
+        self._ids: Dict[Hashable, int] = {}
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def __contains__(self, token):
+        self.refresh()
+        return self.entries[self._ids.get(token, NOISE_ID)] is not None
+
+    def refresh(self) -> bool:
+        """Resolves registered tokens again if the table has changed since they were resolved
+
+        Token ids are kept, so previously encoded arrays stay valid. Tokens that are
+        no longer accepted by the table keep their ids but have no action entry (noise).
+
+        :returns: True if tokens were resolved again
+        """
+        table = self.table
+        if self.version == table.version:
+            return False
+        for token_id in range(1, len(self.tokens)):
+            self.entries[token_id], self.metas[token_id] = table.resolve(self.tokens[token_id])
+        # Noise tokens are not stored, so they are resolved again when they are met
+        self._ids = {token: token_id for token, token_id in self._ids.items() if token_id != NOISE_ID}
+        self.version = table.version
+        return True
+
+    def add(self, token) -> int:
+        """Returns id of the token, resolving and registering it if it is new"""
+        self.refresh()
+        token_id = self._ids.get(token)
+        if token_id is None:
+            entry, meta = self.table.resolve(token)
+            if entry is None:
+                token_id = NOISE_ID
+            else:
+                token_id = len(self.tokens)
+                if isinstance(token, str):
+                    # Drop str subclasses (i.e. TextToken offsets of the first occurrence)
+                    token = str(token)
+                self.tokens.append(token)
+                self.entries.append(entry)
+                self.metas.append(meta)
+            self._ids[token] = token_id
+        return token_id
+
+    def encode(self, tokens: Iterable):
+        """Encodes tokens to the array of token ids"""
+        return self._to_array(self._encode(tokens))
+
+    def encode_batch(self, corpus: Iterable[Sequence]) -> EncodedCorpus:
+        """Encodes a batch of documents (token sequences) in one pass into a flat id array"""
+        documents = corpus if isinstance(corpus, (list, tuple)) else list(corpus)
+        offsets = array('l', [0])
+        total = 0
+        for document in documents:
+            total += len(document)
+            offsets.append(total)
+        ids = self._encode(chain.from_iterable(documents))
+        return EncodedCorpus(ids=self._to_array(ids), offsets=offsets)
+
+    def decode(self, token_ids: Iterable[int]) -> List[Any]:
+        """Maps token ids back to tokens, noise tokens are decoded as None"""
+        tokens = self.tokens
+        return [tokens[i] for i in token_ids]
+
+    def _encode(self, tokens: Iterable) -> array:
+        tokens = tokens if isinstance(tokens, (list, tuple)) else list(tokens)
+        self.refresh()
+        try:
+            # Fast path: all tokens are already known
+            return array('i', map(self._ids.__getitem__, tokens))
+        except KeyError:
+            return array('i', map(self.add, tokens))
+
+    def _to_array(self, ids: array):
+        if self.use_numpy:
+            return numpy.frombuffer(ids, dtype=numpy.intc)
+        return ids
@@ -0,0 +1,59 @@
+from tokema import *
+
+
+def build_table(resolvers):
+    rules = parse_rules_from_string('''
+        ROOT = <N> {EOF}
+        N = {int} | {float} | five
+    ''')
+    return build_parsing_table(rules, resolvers)
+
+
+def describe(parses):
+    return [(str(p.rule), [a.meta for a in p.args[0].args]) for p in parses]
+
+
+def test_reorder_keeps_parses_of_overlapping_resolvers():
+    table = build_table([ExactTextResolver(), IntResolver(), FloatResolver(), EofResolver()])
+    tokens = ['5', 'five', '5.5']
+    before = [describe(parse([token, EOF_TOKEN], table)) for token in tokens]
+
+    adaptive = table.enable_adaptive_order(interval=10 ** 6, sample_interval=1)
+    # Only floats are seen, float resolver has the best hit rate
+    for _ in range(50):
+        table.resolve('2.5')
+    adaptive.reorder()
+
+    order = table.resolver_order
+    assert order.index(table.resolvers[0]) < order.index(table.resolvers[1]) \
+        < order.index(table.resolvers[2])
+    assert [describe(parse([token, EOF_TOKEN], table)) for token in tokens] == before
+
+
+def test_reorder_swaps_resolvers_of_unrelated_token_types():
+    text, eof = ExactTextResolver(), EofResolver()
+    table = build_table([text, eof])
+    adaptive = table.enable_adaptive_order(interval=10 ** 6, sample_interval=1)
+    for _ in range(20):
+        table.resolve(EOF_TOKEN)
+    adaptive.reorder()
+    assert table.resolver_order == [eof, text]
+
+
+def test_reorder_swaps_declared_disjoint_resolvers():
+    int_resolver, text = IntResolver(), ExactTextResolver()
+    table = build_table([text, int_resolver, EofResolver()])
+    adaptive = table.enable_adaptive_order(
+        disjoint=[(text, int_resolver)], interval=10 ** 6, sample_interval=1
+    )
+    for _ in range(20):
+        table.resolve('7')
+    adaptive.reorder()
+    assert table.resolver_order.index(int_resolver) < table.resolver_order.index(text)
+
+    # Declared disjoint resolvers accepting the same token get the declared order back
+    table.resolve('five')
+    table.resolve('5')
+    text.index['5'] = text.index['five']
+    table.resolve('5')
+    assert table.resolver_order.index(text) < table.resolver_order.index(int_resolver)
@@ -0,0 +1,104 @@
+from tokema import *
+
+
+def test_prefilter_accepts_overlapping_regex_queries():
+    rules = parse_rules_from_string('''
+    ROOT = call {re:\\d+}
+    ROOT = ping {re:1\\d*}
+    ''')
+    table = build_text_parsing_table(rules)
+    prefilter = Prefilter(table)
+
+    for tokens in (['call', '123'], ['ping', '123'], ['call', '5']):
+        assert parse(tokens, table)
+        assert prefilter.accepts(tokens)
+    assert not prefilter.accepts(['ping', '5'])
+
+
+def test_prefilter_accepts_overlapping_prefixes():
+    rules = [
+        Rule('ROOT', (TextQuery('buy'), PrefixQuery('потреб'))),
+        Rule('ROOT', (TextQuery('sell'), PrefixQuery('потребит'))),
+    ]
+    table = build_text_parsing_table(rules)
+    prefilter = Prefilter(table)
+
+    for tokens in (['buy', 'потребитель'], ['sell', 'потребитель'], ['buy', 'потребление']):
+        assert parse(tokens, table)
+        assert prefilter.accepts(tokens)
+    assert not prefilter.accepts(['sell', 'потребление'])
+
+
+def test_encoded_prefilter_accepts_overlapping_prefixes():
+    rules = [
+        Rule('ROOT', (TextQuery('buy'), PrefixQuery('потреб'))),
+        Rule('ROOT', (TextQuery('sell'), PrefixQuery('потребит'))),
+    ]
+    table = build_text_parsing_table(rules)
+    prefilter = Prefilter(table)
+    vocabulary = Vocabulary(table)
+
+    assert prefilter.accepts_encoded(vocabulary.encode(['buy', 'потребитель']), vocabulary)
+    assert not prefilter.accepts_encoded(vocabulary.encode(['sell', 'потребление']), vocabulary)
+
+
+def test_prefilter_and_vocabulary_after_freeze():
+    table = build_text_parsing_table(parse_rules_from_string('ROOT = buy {prefix:потреб} | sell x'))
+    prefilter = Prefilter(table)
+    vocabulary = Vocabulary(table)
+    accepted = vocabulary.encode(['buy', 'потребитель'])
+    rejected = vocabulary.encode(['sell', 'потребитель'])
+    assert prefilter.accepts_encoded(accepted, vocabulary)
+
+    # Freezing replaces action entries, ids resolved before must not be used against the new ones
+    table.freeze()
+    assert prefilter.accepts(['buy', 'потребитель'])
+    assert not prefilter.accepts(['sell', 'потребитель'])
+    assert prefilter.accepts_encoded(accepted, vocabulary)
+    assert not prefilter.accepts_encoded(rejected, vocabulary)
+    assert vocabulary.entries[accepted[0]] is table.resolve('buy')[0]
+    assert len(parse_encoded(accepted, vocabulary)) == 1
+
+
+def test_necessary_terminals():
+    rules = parse_rules_from_string('''
+    ROOT = <LOAN> <OBJECT> | ипотека
+    LOAN = кредит | займ
+    OBJECT = на <AUTO> | <AUTO>
+    AUTO = машина | авто
+    UNUSED = <MISSING>
+    ''')
+    assert set(necessary_terminals(rules)) == {
+        frozenset({TextQuery('кредит'), TextQuery('займ'), TextQuery('ипотека')}),
+        frozenset({TextQuery('машина'), TextQuery('авто'), TextQuery('ипотека')}),
+    }
+    assert necessary_terminals(rules, production='OBJECT') == \
+        [frozenset({TextQuery('машина'), TextQuery('авто')})]
+    assert necessary_terminals(rules, production='UNUSED') == [frozenset()]
+
+
+def test_prefilter_rejects_only_unparsable_inputs():
+    rules = parse_rules_from_string('''
+    ROOT = <LOAN> <OBJECT> | ипотека
+    LOAN = кредит | займ
+    OBJECT = на <AUTO> | <AUTO>
+    AUTO = машина | авто
+    ''')
+    table = build_text_parsing_table(rules)
+    prefilter = Prefilter(table)
+    corpus = [
+        'хочу кредит на машину'.split(),
+        'хочу кредит на машина'.split(),
+        'машина кредит'.split(),
+        'ипотека'.split(),
+        'займ на дачу'.split(),
+        []
+    ]
+    accepted = [i for i, _ in prefilter.filter(corpus)]
+    assert accepted == [1, 2, 3]
+    for i, tokens in enumerate(corpus):
+        if i not in accepted:
+            assert not parse(tokens, table)
+    assert prefilter.stats.checked == 6
+    assert prefilter.stats.rejected == 3
+    assert prefilter.stats.hit_rate == 0.5
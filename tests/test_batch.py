@@ -0,0 +1,37 @@
+import random
+
+import pytest
+
+from tokema import *
+
+
+GRAMMAR = '''
+ROOT = <S> .
+S = <NP> <VP> | <S> <PP>
+NP = n | <NP> <PP> | d n
+VP = v <NP> | <VP> <PP>
+PP = p <NP>
+'''
+
+
+@pytest.mark.parametrize('options', [
+    dict(),
+    dict(beam_limit=0),
+    dict(beam_limit=5),
+    dict(beam_limit=20, max_skip=2, max_span=8),
+])
+def test_batch_parses_as_parse(options):
+    table = build_text_parsing_table(parse_rules_from_string(GRAMMAR))
+    rnd = random.Random(5)
+    prefixes = ['d n v'.split(), 'n v d n'.split(), []]
+    inputs = [[], [], ['.']]
+    for _ in range(60):
+        tokens = rnd.choice(prefixes) + [rnd.choice('n v p d x'.split()) for _ in range(rnd.randint(0, 6))]
+        inputs.append(tokens + ['.'])
+    inputs.extend(inputs[:10])
+
+    results = parse_batch(inputs, table, **options)
+    assert len(results) == len(inputs)
+    assert sum(map(bool, results)) > 10
+    for tokens, parses in zip(inputs, results):
+        assert [str(p) for p in parses] == [str(p) for p in parse(tokens, table, **options)]
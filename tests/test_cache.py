@@ -0,0 +1,83 @@
+from tokema import *
+
+
+GRAMMAR = '''
+ROOT = <GREETING> | <NUMBER>
+GREETING = hi | hello there
+NUMBER = {int} | {float}
+'''
+
+
+def build_table():
+    table = build_text_parsing_table(parse_rules_from_string(GRAMMAR))
+    table.enable_cache(max_size=2)
+    return table
+
+
+def test_hits_and_misses():
+    table = build_table()
+    stats = table.cache.stats
+    first = parse(['hello', 'there'], table)
+    assert (stats.hits, stats.misses) == (0, 1)
+    assert parse(['hello', 'there'], table)[0] is first[0]
+    assert (stats.hits, stats.misses) == (1, 1)
+
+    # Other options are another input
+    parse(['hello', 'there'], table, beam_limit=10)
+    assert (stats.hits, stats.misses) == (1, 2)
+
+    parse(['hi'], table)
+    assert stats.evictions == 1
+    assert len(table.cache) == 2
+
+
+def test_table_change_invalidates_results():
+    table = build_table()
+    stats = table.cache.stats
+    parse(['hi'], table)
+    table.add_goto(0, 'UNUSED', 0)
+    parse(['hi'], table)
+    assert (stats.hits, stats.misses, stats.invalidations) == (0, 2, 1)
+    parse(['hi'], table)
+    assert stats.hits == 1
+
+
+def test_equal_values_of_other_types_are_not_confused():
+    table = build_table()
+    for token in [1, 1.0, True]:
+        parses = parse([token], table)
+        assert parses[0].args[0].args[0].value is token
+    assert table.cache.stats.hits == 0
+
+
+def test_hit_rebinds_token_offsets():
+    table = build_table()
+    first = parse(list(iter_tokens('hello there')), table)
+    second = parse(list(iter_tokens('  hello   there')), table)
+    assert table.cache.stats.hits == 1
+    assert first[0].span == (0, 11)
+    assert second[0].span == (2, 15)
+    assert str(second[0]) == str(first[0])
+
+
+def test_normalized_tokens_share_results():
+    normalizer = TokenNormalizer()
+    normalizer.add_stage('lower', str.lower)
+    table = build_parsing_table(
+        parse_rules_from_string(GRAMMAR), [NormalizedTextResolver('lower')], normalizer=normalizer
+    )
+    table.enable_cache()
+    parse(['Hi'], table)
+    parses = parse(['HI'], table)
+    assert table.cache.stats.hits == 1
+    assert parses[0].args[0].args[0].value == 'HI'
+
+
+def test_unhashable_tokens_are_not_cached():
+    rules = parse_rules_from_string('ROOT = a b')
+    table = build_text_parsing_table(rules)
+    expected = [str(p) for p in parse(['a', ['x'], 'b'], table)]
+    table.enable_cache()
+    for token in (['x'], {'x': 1}):
+        assert [str(p) for p in parse(['a', token, 'b'], table)] == expected
+    assert len(table.cache) == 0
@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+from tokema import *
+
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), '..', 'examples')
+
+TOKENS = 'эй бот , плз расскажи как мне играть ' \
+         'против ебаного шторма на миде и как контрить снайпера'.split()
+
+
+def build_table() -> ParsingTable:
+    with open(os.path.join(EXAMPLES, 'dota.txt'), encoding='utf-8') as f:
+        return build_text_parsing_table(parse_rules_from_string(f.read()))
+
+
+@pytest.fixture
+def tables():
+    table = build_table()
+    compacted = build_table()
+    compact_table(compacted)
+    return table, compacted
+
+
+def test_packed_row_rejects_invalid_states(tables):
+    _, compacted = tables
+    for entry in compacted._action_pre_table.values():
+        assert isinstance(entry, PackedRow)
+        assert entry.get(-1) is None
+        assert entry.get(None) is None
+        assert entry.get(10 ** 6) is None
+        with pytest.raises(KeyError):
+            entry[-1]
+
+
+def test_same_parses(tables):
+    table, compacted = tables
+    expected = [str(p) for p in parse(TOKENS, table)]
+    assert expected
+    assert [str(p) for p in parse(TOKENS, compacted)] == expected
+
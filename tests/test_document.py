@@ -0,0 +1,26 @@
+from tokema import *
+
+
+GRAMMAR = '''
+S = <NP> <VP> .
+NP = n | d n
+VP = v <NP>
+'''
+
+
+def test_combine_segments():
+    table = build_text_parsing_table(parse_rules_from_string(GRAMMAR))
+    combine_table = build_parsing_table(
+        [Rule('DOC', (RepeatQuery(ProductionQuery('S')), EofQuery()))],
+        [ProductionResolver(), EofResolver()]
+    )
+    tokens = 'd n v n . x n v d n .'.split() + [EOF_TOKEN]
+    segments = split_segments(tokens, boundaries='.')
+
+    doc = parse_document(
+        segments, table, combine_table=combine_table, combine_root='DOC', root_production='S'
+    )
+    assert len(doc) == 1
+    # Segment parses are the tokens of the top-level grammar
+    sentences = doc[0][0]
+    assert [s.value[-1].position for s in sentences] == [4, 10]
@@ -0,0 +1,58 @@
+import random
+
+from tokema import *
+
+
+GRAMMAR = '''
+ROOT = <S> .
+S = <NP> <VP> | <S> <PP>
+NP = n | <NP> <PP> | d n
+VP = v <NP> | <VP> <PP>
+PP = p <NP>
+'''
+
+
+def leaves(tree):
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ParseNode):
+            stack.extend(node.args)
+        else:
+            yield node
+
+
+def skipped(tree):
+    """Tokens skipped from the start of the input to the end of the parse"""
+    symbols = list(leaves(tree))
+    return max(s.position for s in symbols) + 1 - len(symbols)
+
+
+def test_parse_first_stops_at_first_parse():
+    table = build_text_parsing_table(parse_rules_from_string(GRAMMAR))
+    consumed = []
+
+    def tokens():
+        for token in 'x n v n . d n v n .'.split():
+            consumed.append(token)
+            yield token
+
+    tree = parse_first(tokens(), table)
+    assert str(tree) == 'ROOT(S(NP(n), VP(v, NP(n))), .)'
+    assert len(consumed) == 5
+    assert parse_first('n v n'.split(), table) is None
+
+
+def test_parse_best_has_fewest_skipped_tokens():
+    table = build_text_parsing_table(parse_rules_from_string(GRAMMAR))
+    rnd = random.Random(7)
+    for _ in range(200):
+        tokens = [rnd.choice('n v p d . x'.split()) for _ in range(rnd.randint(0, 12))]
+        parses = parse(tokens, table, beam_limit=0)
+        best = parse_best(tokens, table, beam_limit=0)
+        if not parses:
+            assert best is None
+            assert parse_first(tokens, table, beam_limit=0) is None
+        else:
+            assert skipped(best) == min(map(skipped, parses))
+            assert parse_first(tokens, table, beam_limit=0) is not None
@@ -0,0 +1,95 @@
+import random
+
+import pytest
+
+from tokema import *
+from tokema.utils import same_tree
+
+
+GRAMMAR = '''
+ROOT = <S> .
+S = <NP> <VP> | <S> <PP>
+NP = n | <NP> <PP> | d n
+VP = v <NP> | <VP> <PP>
+PP = p <NP>
+'''
+
+
+def assert_same_parses(parses, expected):
+    assert len(parses) == len(expected)
+    assert all(same_tree(a, b) for a, b in zip(parses, expected))
+
+
+@pytest.fixture
+def table():
+    return build_text_parsing_table(parse_rules_from_string(GRAMMAR))
+
+
+@pytest.mark.parametrize('options, max_length', [
+    (dict(beam_limit=0), 12),
+    (dict(beam_limit=4), 60),
+    (dict(beam_limit=100), 30),
+    (dict(beam_limit=20, max_skip=3), 60),
+    (dict(beam_limit=20, max_span=8), 60),
+    (dict(beam_limit=0, max_skip=2, max_span=6), 60),
+])
+def test_edits_parse_as_parse(table, options, max_length):
+    rnd = random.Random(3)
+    vocabulary = 'n v p d . . x'.split()
+    parser = IncrementalParser(table, **options)
+    tokens = []
+    for _ in range(300):
+        start = rnd.randint(0, len(tokens))
+        end = rnd.randint(start, min(len(tokens), start + 3))
+        count = rnd.randint(0, 3) if len(tokens) < max_length else 0
+        new = [rnd.choice(vocabulary) for _ in range(count)]
+        tokens[start:end] = new
+
+        parses = parser.replace(start, end, new)
+        assert parser.tokens == tokens
+        assert_same_parses(parses, parse(tokens, table, **options))
+
+
+@pytest.mark.parametrize('options, inserted', [
+    # Without limits sentences are extended over the whole input, only noise keeps the frontier
+    (dict(beam_limit=20), ['x', 'x']),
+    (dict(beam_limit=20, max_skip=3, max_span=10), ['p', 'n']),
+])
+def test_insert_and_delete_reuse_tail(table, options, inserted):
+    tokens = 'd n v n p d n .'.split() * 100
+    parser = IncrementalParser(table, tokens, **options)
+
+    parses = parser.insert(400, inserted)
+    assert parser.last_steps < 20
+    assert_same_parses(parses, parse(parser.tokens, table, **options))
+
+    parses = parser.delete(400, 400 + len(inserted))
+    assert parser.last_steps < 20
+    assert_same_parses(parses, parse(parser.tokens, table, **options))
+
+
+def test_unlimited_beam_snapshots_share_nodes(table):
+    tokens = 'd n v n .'.split() * 2
+    parser = IncrementalParser(table, tokens, beam_limit=0)
+    snapshots = parser._snapshots
+    assert len({id(s.state.inactive_nodes) for s in snapshots[1:]}) == 1
+    assert_same_parses(parser.parses, parse(tokens, table, beam_limit=0))
+
+
+@pytest.mark.parametrize('options', [
+    dict(beam_limit=0),
+    dict(beam_limit=20),
+    dict(beam_limit=20, max_skip=3, max_span=10),
+])
+def test_returned_parses_keep_positions_after_edits(table, options):
+    tokens = 'd n v n . x x'.split() * 6
+    parser = IncrementalParser(table, tokens, **options)
+    before = parser.parses
+    expected = parse(tokens, table, **options)
+    assert_same_parses(before, expected)
+
+    parser.insert(14, ['x', 'x'])
+    parser.delete(3, 5)
+    parser.replace(20, 21, ['x', 'x', 'x'])
+    assert_same_parses(parser.parses, parse(parser.tokens, table, **options))
+    assert_same_parses(before, expected)
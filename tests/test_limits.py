@@ -0,0 +1,65 @@
+import pytest
+
+from tokema import *
+
+
+@pytest.fixture
+def table():
+    return build_text_parsing_table(parse_rules_from_string('ROOT = a b c'))
+
+
+@pytest.mark.parametrize('text, max_skip, count', [
+    ('a b c', 0, 1),
+    ('a x b c', 0, 0),
+    ('a x b x x c', 1, 0),
+    ('a x b x x c', 2, 1),
+    ('x x x a b c', 0, 1),
+])
+def test_max_skip(table, text, max_skip, count):
+    assert len(parse(text.split(), table, max_skip=max_skip)) == count
+
+
+@pytest.mark.parametrize('text, max_span, count', [
+    ('a b c', 3, 1),
+    ('a x b c', 3, 0),
+    ('a x b c', 4, 1),
+    ('x x a b c x', 3, 1),
+])
+def test_max_span(table, text, max_span, count):
+    assert len(parse(text.split(), table, max_span=max_span)) == count
+
+
+def test_limits_keep_early_parses_of_long_input(table):
+    tokens = ('a b c ' + 'x ' * 500) * 20
+    parses = parse(tokens.split(), table, beam_limit=10, max_skip=2, max_span=5)
+    assert [p.args[0].position for p in parses] == [i * 503 for i in range(20)]
+
+
+def test_node_budget_returns_partial_results(table):
+    tokens = 'a b c x '.split() * 50
+    full = parse(tokens, table, max_skip=1)
+    assert not full.truncated and len(full) == 50
+
+    partial = parse(tokens, table, max_skip=1, max_nodes=100)
+    assert partial.truncated
+    assert 0 < len(partial) < len(full)
+    starts = sorted(p.args[0].position for p in partial)
+    assert starts == [i * 4 for i in range(len(partial))]
+
+    assert not parse(tokens, table, max_skip=1, max_nodes=10 ** 6).truncated
+
+
+def test_step_node_budget(table):
+    tokens = 'a a a a b b b b c c c c'.split()
+    assert not parse(tokens, table, max_step_nodes=100).truncated
+    results = parse(tokens, table, max_step_nodes=2)
+    assert results.truncated
+    assert results == []
+
+
+def test_deadline(table):
+    tokens = 'a b c'.split()
+    results = parse(tokens, table, deadline=-1.0)
+    assert results.truncated and results == []
+    results = parse(tokens, table, deadline=60.0)
+    assert not results.truncated and len(results) == 1
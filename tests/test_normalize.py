@@ -0,0 +1,50 @@
+import pytest
+
+from tokema import *
+
+
+def test_token_forms_are_computed_once():
+    calls = []
+
+    def stem(text):
+        calls.append(text)
+        return text[:4]
+
+    normalizer = default_normalizer(stem=stem)
+    assert normalizer.forms == ['casefold', 'unicode', 'yo', 'stem']
+    forms = normalizer.token_forms('Ёлочки')
+    assert forms['casefold'] == 'ёлочки'
+    assert calls == []
+    assert forms['stem'] == 'елоч'
+    assert forms['stem'] == 'елоч'
+    assert forms['yo'] == 'елочки'
+    assert calls == ['елочки']
+    assert normalizer.normalize('ＡＢＣ', 'unicode') == 'abc'
+
+    with pytest.raises(ValueError):
+        forms['lemma']
+    with pytest.raises(ValueError):
+        normalizer.add_stage('yo', fold_yo)
+
+
+def test_resolvers_share_normalized_forms():
+    calls = []
+
+    def stem(text):
+        calls.append(text)
+        return text[:4]
+
+    rules = parse_rules_from_string('''
+    ROOT = купить <ITEM>
+    ITEM = ёлку | слона
+    ''')
+    table = build_text_parsing_table(
+        rules,
+        additional_resolvers=[NormalizedTextResolver(form='yo'), NormalizedTextResolver(form='stem')],
+        normalizer=default_normalizer(stem=stem)
+    )
+    assert str(parse('Купить елку'.split(), table)[0]) == 'ROOT(Купить, ITEM(елку))'
+    assert str(parse('купить слоника'.split(), table)[0]) == 'ROOT(купить, ITEM(слоника))'
+    assert parse('купить слоника слоника'.split(), table)
+    # Stemming of the tokens is memoized
+    assert calls.count('слоника') == 1
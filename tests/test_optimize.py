@@ -0,0 +1,72 @@
+from tokema import *
+
+
+GRAMMAR = '''
+ROOT = <GREETING> <NAME>
+GREETING = <HELLO>
+HELLO = hello | hi
+NAME = bob | alice
+NAME = bob
+BROKEN = <MISSING> x
+UNUSED = y
+'''
+
+
+def test_optimization_report():
+    rules = parse_rules_from_string(GRAMMAR)
+    optimized, report = optimize_rules(rules, measure=True)
+    assert report.rules_before == 9
+    assert report.unproductive == 1
+    assert report.duplicates == 1
+    assert report.inlined == 1
+    assert report.unreachable == 1
+    assert report.rules_after == len(optimized) == 5
+    assert optimized[0].production == 'ROOT'
+    assert {r.production for r in optimized} == {'ROOT', 'GREETING', 'NAME'}
+    assert report.states_after < report.states_before
+
+
+def test_optimized_table_parses_as_original():
+    rules = parse_rules_from_string(GRAMMAR)
+    table = build_text_parsing_table(rules)
+    optimized = build_text_parsing_table(rules, optimize=True)
+    for text in ['hello bob', 'well hi there alice', 'bob hello', 'hi x bob']:
+        tokens = text.split()
+        expected = [str(p) for p in parse(tokens, table)]
+        parses = parse(tokens, optimized)
+        assert [str(restore_tree(p)) for p in parses] == expected
+        if expected:
+            assert str(parses[0]).startswith('ROOT(GREETING(')
+            assert isinstance(parses[0].args[0].rule, InlinedRule)
+
+
+def _removed(report: OptimizationReport) -> int:
+    return report.unproductive + report.unreachable + report.duplicates + report.inlined
+
+
+def test_unreachable_unit_cycle_is_counted():
+    rules = parse_rules_from_string('''
+    S = x
+    A = <B>
+    B = <C>
+    C = <A>
+    A = y
+    ''')
+    optimized, report = optimize_rules(rules, roots=['S'])
+    assert [str(r) for r in optimized] == [str(rules[0])]
+    assert report.unreachable == 4
+    assert (report.unproductive, report.duplicates, report.inlined) == (0, 0, 0)
+    assert report.rules_before - report.rules_after == _removed(report) == 4
+
+
+def test_inlined_unit_chain_is_counted():
+    rules = parse_rules_from_string('''
+    ROOT = <A> end
+    A = <B>
+    B = <C>
+    C = x | y
+    ''')
+    optimized, report = optimize_rules(rules)
+    assert report.inlined == 2
+    assert report.rules_before - report.rules_after == _removed(report) == 2
+    assert {r.production for r in optimized} == {'ROOT', 'A'}
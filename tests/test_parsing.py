@@ -0,0 +1,155 @@
+import io
+import json
+
+import pytest
+
+from tokema import *
+
+
+@pytest.fixture
+def deep_parse():
+    rules = parse_rules_from_string('''
+    ROOT = <WORDS> {EOF}
+    WORDS = w | <WORDS> w
+    ''')
+    table = build_text_parsing_table(rules)
+    tokens = ['w'] * 5000 + [EOF_TOKEN]
+    parses = parse(tokens, table)
+    assert len(parses) == 1
+    return table, tokens, parses[0]
+
+
+def test_str_of_deep_tree(deep_parse):
+    _, _, tree = deep_parse
+    text = str(tree)
+    assert text.startswith('ROOT(WORDS(WORDS(')
+    assert text.endswith(', w), {EOF})')
+    assert text.count('WORDS(') == 5000
+    assert repr(tree).count('ParseNode(') == 5001
+
+
+def test_str_matches_nested_format():
+    rules = parse_rules_from_string('''
+    ROOT = <A> <B>
+    A = a
+    B = b c
+    ''')
+    table = build_text_parsing_table(rules)
+    tree = parse(['a', 'b', 'c'], table)[0]
+    assert str(tree) == 'ROOT(A(a), B(b, c))'
+    assert repr(tree.args[0]) == \
+        f"ParseNode(rule={tree.args[0].rule!r}, args=[Symbol('a', 0, None)])"
+
+
+def test_flat_export_of_deep_tree(deep_parse):
+    table, tokens, tree = deep_parse
+    flat = flatten_parses([tree], table.rules)
+    assert len(flat) == 1
+    assert flat.starts[0] == 0 and flat.ends[0] == len(tokens)
+    assert str(flat.tree(0, table.rules, tokens)) == str(tree)
+
+
+def test_jsonl_export(deep_parse):
+    table, tokens, tree = deep_parse
+    small = parse(['w', 'w', EOF_TOKEN], table)
+    out = io.StringIO()
+    assert write_jsonl([small, [], [tree]], out) == 3
+
+    lines = out.getvalue().splitlines()
+    assert json.loads(lines[0]) == [{
+        'production': 'ROOT',
+        'args': [
+            {'production': 'WORDS', 'args': [
+                {'production': 'WORDS', 'args': [{'token': 'w', 'position': 0}]},
+                {'token': 'w', 'position': 1}
+            ]},
+            {'token': '{EOF}', 'position': 2}
+        ]
+    }]
+    assert json.loads(lines[1]) == []
+    assert lines[2].count('"production": "WORDS"') == 5000
+
+
+def test_multiple_roots_in_one_pass():
+    rules = parse_rules_from_string('''
+    PHONE = call <NUMBER> | phone <NUMBER>
+    NUMBER = {int}
+    DATE = on <DAY> | <DAY> <MONTH>
+    DAY = {int}
+    MONTH = may | june
+    ''')
+    table = build_text_parsing_table(rules, roots=['PHONE', 'DATE'])
+    assert table.roots == ['PHONE', 'DATE']
+
+    tokens = 'please call 123 on 5 june'.split()
+    groups = parse_grouped(tokens, table)
+    assert set(groups) == {'PHONE', 'DATE'}
+    for root, parses in groups.items():
+        single = build_text_parsing_table(rules, roots=[root])
+        expected = parse(tokens, single, root_production=root)
+        assert sorted(map(str, parses)) == sorted(map(str, expected))
+        assert sorted(map(str, parse(tokens, table, root_production=root))) == \
+            sorted(map(str, expected))
+    assert 'PHONE(call, NUMBER(123))' in map(str, groups['PHONE'])
+    assert 'DATE(DAY(5), MONTH(june))' in map(str, groups['DATE'])
+
+    assert list(parse_grouped(tokens, table, root_productions=['DATE'])) == ['DATE']
+
+
+SUPERSET_STATE_GRAMMAR = '''
+ROOT = b <B> | b c c | <A> c <A>
+A = c <C> | a d <B>
+B = a | c <A>
+C = a a <A> | a | b d
+'''
+
+
+def test_default_root_starts_from_all_root_rules():
+    rules = parse_rules_from_string(SUPERSET_STATE_GRAMMAR)
+    table = build_text_parsing_table(rules)
+    assert table.roots == ['ROOT']
+    assert measure_automaton(rules) == measure_automaton(rules, roots=['ROOT'])
+    assert list(map(str, parse(['b', 'c', 'c'], table))) == ['ROOT(b, c, c)']
+
+
+def test_reductions_do_not_pop_past_root():
+    table = build_text_parsing_table(parse_rules_from_string(SUPERSET_STATE_GRAMMAR))
+    assert parse(['b', 'c'], table, beam_limit=0) == []
+    assert list(map(str, parse(['b', 'a'], table, beam_limit=0))) == ['ROOT(b, B(a))']
+    assert list(map(str, parse(['b', 'c', 'c'], table, beam_limit=0))) == ['ROOT(b, c, c)']
+    assert parse(['c', 'a', 'c', 'c', 'a'], table, beam_limit=0) == []
+
+
+def test_reductions_do_not_pop_past_root_with_multiple_roots():
+    rules = parse_rules_from_string(SUPERSET_STATE_GRAMMAR)
+    table = build_text_parsing_table(rules, roots=['ROOT', 'B'])
+    for tokens in (['b', 'c'], ['b', 'c', 'c'], ['b', 'a'], ['c', 'a', 'c', 'c', 'a']):
+        groups = parse_grouped(tokens, table, beam_limit=0)
+        for root, parses in groups.items():
+            single = build_text_parsing_table(rules, roots=[root])
+            expected = parse(tokens, single, beam_limit=0, root_production=root)
+            assert sorted(map(str, parses)) == sorted(map(str, expected))
+    groups = parse_grouped(['b', 'c', 'c'], table, beam_limit=0)
+    assert list(map(str, groups['ROOT'])) == ['ROOT(b, c, c)']
+    groups = parse_grouped(['b', 'a'], table, beam_limit=0)
+    assert list(map(str, groups['ROOT'])) == ['ROOT(b, B(a))']
+    assert list(map(str, groups['B'])) == ['B(a)']
+
+
+def test_roots_reduced_from_same_parent_are_not_alternatives():
+    rules = parse_rules_from_string('''
+    DATE = a c
+    PHONE = a b c
+    ''')
+    table = build_text_parsing_table(rules, roots=['DATE', 'PHONE'])
+    tokens = ['a', 'b', 'c']
+    groups = parse_grouped(tokens, table)
+    assert {root: list(map(str, parses)) for root, parses in groups.items()} == {
+        'DATE': ['DATE(a, c)'],
+        'PHONE': ['PHONE(a, b, c)'],
+    }
+    assert list(map(str, parse(tokens, table, root_production='DATE'))) == ['DATE(a, c)']
+    for root in table.roots:
+        single = build_text_parsing_table(rules, roots=[root])
+        assert list(map(str, parse(tokens, single, root_production=root))) == \
+            list(map(str, groups[root]))
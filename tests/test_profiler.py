@@ -0,0 +1,44 @@
+import json
+
+from tokema import *
+
+
+def test_profile_counts_corpus():
+    rules = parse_rules_from_string('''
+    ROOT = take <N> apples
+    N = {int} | one
+    ''')
+    table = build_text_parsing_table(rules)
+    table.enable_cache()
+    corpus = [
+        'take 2 apples'.split(),
+        'please take one apples'.split(),
+        'take 2 apples'.split(),
+    ]
+    profile = ParseProfile()
+    for tokens in corpus:
+        assert [str(p) for p in parse(tokens, table, profile=profile)] == \
+            [str(p) for p in parse(tokens, table)]
+
+    assert profile.parses == 3
+    assert profile.tokens == 10
+    assert profile.noise_tokens == 1
+    assert table.cache.stats.hits == 1
+
+    reductions = {str(s.rule): s.reductions for s in profile.rule_stats()}
+    assert reductions['ROOT = take <N> apples'] == 3
+    assert reductions['N = {int}'] == 2
+    assert reductions['N = one'] == 1
+
+    resolvers = profile.resolver_stats(sort_by='hits')
+    assert sum(s.hits for s in resolvers) == 9
+    assert all(s.calls >= s.hits for s in resolvers)
+    assert sum(s.shifts for s in profile.state_stats()) > 0
+
+    dump = json.loads(profile.to_json())
+    assert dump['parses'] == 3
+    assert {r['rule'] for r in dump['rules']} == set(reductions)
+    assert 'ROOT = take <N> apples' in profile.report()
+
+    profile.reset()
+    assert profile.parses == 0 and profile.rule_stats() == []
@@ -0,0 +1,53 @@
+import pytest
+
+from tokema import *
+
+
+def rule(production, text, weight=0.0):
+    queries = tuple(
+        ReferenceQuery(q[1:-1]) if q.startswith('<') else TextQuery(q) for q in text.split()
+    )
+    return Rule(production, queries, weight=weight)
+
+
+@pytest.fixture(params=[False, True], ids=['declared', 'reversed'])
+def table(request):
+    # Best scored parses skip more tokens than the fewest-skip one
+    rules = [
+        rule('ROOT', '<X> d'),
+        rule('X', 'a b c'),
+        rule('X', 'a c', weight=2),
+        rule('X', 'a <Y> c', weight=1),
+        rule('Y', 'b', weight=0.5),
+    ]
+    if request.param:
+        rules[1:] = rules[:0:-1]
+    return build_text_parsing_table(rules)
+
+
+def test_viterbi_prefers_score_to_skipped_tokens(table):
+    tokens = 'a b c d'.split()
+    # Skipping `b` is rejected as an ambiguous alternative by `parse`
+    assert 'ROOT(X(a, c), d)' not in [str(p) for p in parse(tokens, table)]
+
+    best = parse_viterbi(tokens, table)
+    assert str(best) == 'ROOT(X(a, c), d)'
+    assert parse_score(best) == 2
+
+
+def test_k_best_ranks_ambiguous_alternatives(table):
+    tokens = 'a b c d'.split()
+    results = parse_k_best(tokens, table, k=5)
+    assert [(score, str(p)) for score, p in results] == [
+        (2.0, 'ROOT(X(a, c), d)'),
+        (1.5, 'ROOT(X(a, Y(b), c), d)'),
+        (0.0, 'ROOT(X(a, b, c), d)'),
+    ]
+    assert all(score == parse_score(p) for score, p in results)
+    assert [str(p) for _, p in parse_k_best(tokens, table, k=2)] == \
+        [str(p) for _, p in results[:2]]
+
+
+def test_k_best_rejects_non_positive_k(table):
+    with pytest.raises(ValueError):
+        parse_k_best(['a'], table, k=0)
@@ -0,0 +1,85 @@
+import pytest
+
+from tokema import *
+from tokema.utils import same_tree
+
+
+def iter_nodes(tree):
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        yield node
+        if isinstance(node, ParseNode):
+            stack.extend(node.args)
+
+
+def test_repetition_syntax():
+    rules = parse_rules_from_string('ROOT = <A>+ <B>* <C>? {int}+ x+ ?')
+    assert rules[0].queries == (
+        RepeatQuery(ReferenceQuery('A'), 1, None),
+        RepeatQuery(ReferenceQuery('B'), 0, None),
+        RepeatQuery(ReferenceQuery('C'), 0, 1),
+        TextQuery('{int}+'),
+        TextQuery('x+'),
+        TextQuery('?'),
+    )
+
+
+def test_literal_special_query_with_operator():
+    table = build_text_parsing_table(parse_rules_from_string('ROOT = take {int}+'))
+    assert len(parse(['take', '{int}+'], table)) == 1
+    assert len(parse(['take', '5'], table)) == 0
+
+
+@pytest.mark.parametrize('tokens, count', [
+    ('a end', 0),
+    ('a w end', 1),
+    ('a w w w end', 3),
+])
+def test_repetition_is_flat(tokens, count):
+    table = build_text_parsing_table(parse_rules_from_string('''
+        ROOT = a <W>* end
+        W = w
+    '''))
+    parses = parse(tokens.split(), table)
+    assert len(parses) == 1
+    if count:
+        repetition = parses[0].args[1]
+        assert str(repetition.rule) == '<W>+ = <<W>+> <W>' if count > 1 else '<W>+ = <W>'
+        assert [a.rule.production for a in repetition.args] == ['W'] * count
+    else:
+        assert len(parses[0].args) == 2
+
+
+def test_long_nested_repetitions():
+    table = build_text_parsing_table(parse_rules_from_string('''
+        ROOT = <S>+ end
+        S = <W>+ x
+        W = w
+    '''))
+    tokens = ('w ' * 50 + 'x ') * 20 + 'end'
+    parses = parse(tokens.split(), table)
+    assert len(parses) == 1
+    sentences = parses[0].args[0]
+    assert len(sentences.args) == 20
+    assert all(len(s.args[0].args) == 50 for s in sentences.args)
+    # Parses never contain the internal nodes of the accumulated repetitions
+    assert {type(n) for n in iter_nodes(parses[0])} == {ParseNode, Symbol}
+
+
+def test_incremental_edits_with_repetitions():
+    table = build_text_parsing_table(parse_rules_from_string('''
+        ROOT = <S>+ end
+        S = <W>+ x
+        W = w
+    '''))
+    parser = IncrementalParser(table, 'w w x w x w w w x end'.split())
+    before = parser.parses
+    parser.insert(4, ['w', 'w'])
+    parser.delete(0, 1)
+    parser.replace(3, 4, ['x', 'w'])
+    for parses in (parser.parses, before):
+        assert all(type(n) in (ParseNode, Symbol) for p in parses for n in iter_nodes(p))
+    expected = parse(parser.tokens, table)
+    assert len(parser.parses) == len(expected)
+    assert all(same_tree(a, b) for a, b in zip(parser.parses, expected))
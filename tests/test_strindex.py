@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from tokema import *
+from tokema.strindex import FrozenStringIndex
+
+
+def test_frozen_string_index_lookups(tmp_path):
+    rnd = random.Random(2)
+    mapping = {''.join(rnd.choice('abcйцё') for _ in range(rnd.randint(0, 8))): i for i in range(500)}
+    index = FrozenStringIndex.from_mapping(mapping)
+    assert len(index) == len(mapping)
+    assert dict(index.items()) == mapping
+    assert list(index.keys()) == sorted(mapping, key=lambda k: k.encode('utf-8'))
+    for key, value in mapping.items():
+        assert index[key] == value and key in index
+    assert index.get('zzz') is None and 'zzz' not in index
+    with pytest.raises(KeyError):
+        index['zzz']
+
+    path = str(tmp_path / 'index.bin')
+    other = FrozenStringIndex.from_mapping({'x': 1})
+    with open(path, 'wb') as f:
+        index.write(f)
+        other.write(f)
+    for use_mmap in (True, False):
+        loaded = FrozenStringIndex.load_many(path, use_mmap=use_mmap)
+        assert [dict(i.items()) for i in loaded] == [mapping, {'x': 1}]
+
+
+def test_frozen_text_resolvers(tmp_path):
+    rules = parse_rules_from_string('''
+    ROOT = купить <ITEM> | buy <ITEM>
+    ITEM = слон | elephant
+    ''')
+    texts = ['купить слон', 'buy Elephant', 'Купить elephant', 'sell слон']
+    table = build_text_parsing_table(rules)
+    expected = [[str(p) for p in parse(t.split(), table)] for t in texts]
+    assert any(expected)
+
+    frozen = build_text_parsing_table(rules)
+    freeze_text_resolvers(frozen)
+    assert any(isinstance(getattr(r, 'index', None), FrozenTextIndex) for r in frozen.resolvers)
+    assert [[str(p) for p in parse(t.split(), frozen)] for t in texts] == expected
+
+    path = str(tmp_path / 'text.bin')
+    save_text_resolvers(build_text_parsing_table(rules), path)
+    loaded = build_text_parsing_table(rules)
+    load_text_resolvers(loaded, path)
+    assert [[str(p) for p in parse(t.split(), loaded)] for t in texts] == expected
@@ -0,0 +1,53 @@
+import pickle
+
+import pytest
+
+from tokema import *
+
+
+GRAMMAR = '''
+ROOT = <NP> <VP> .
+NP = n | d n | {prefix:noun} | {re:N\\d+}
+VP = v <NP> | {int} <NP>
+'''
+
+TOKENS = 'd n v noun42 . n 7 N12 .'.split()
+
+
+@pytest.fixture
+def table():
+    table = build_text_parsing_table(parse_rules_from_string(GRAMMAR))
+    table.freeze()
+    return table
+
+
+def test_frozen_resolvers_are_read_only(table):
+    indexes = [r.index for r in table.resolvers if hasattr(r, 'index')]
+    assert indexes
+    for index in indexes:
+        assert isinstance(index, FrozenDict)
+        with pytest.raises(TypeError):
+            index['x'] = None
+    with pytest.raises(TypeError):
+        table.get_entry(TextQuery('n'))[0] = None
+
+
+def test_frozen_table_pickles(table):
+    restored = pickle.loads(pickle.dumps(table))
+    assert restored.frozen
+    assert [str(p) for p in parse(TOKENS, restored)] == [str(p) for p in parse(TOKENS, table)]
+
+
+
+def test_measure_automaton_counts_table_actions():
+    rules = parse_rules_from_string(GRAMMAR)
+    table = build_text_parsing_table(rules)
+    states, actions = measure_automaton(rules)
+
+    table_states = {0} | {s for s, row in table._goto.items() if row}
+    table_actions = {(s, v) for s, row in table._goto.items() for v in row}
+    for query, entry in table._action_pre_table.items():
+        table_states.update(entry)
+        table_actions.update((s, query) for s in entry)
+    assert states >= len(table_states)
+    assert actions == len(table_actions)
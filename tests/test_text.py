@@ -0,0 +1,114 @@
+import io
+import re
+
+import pytest
+
+from tokema import *
+
+
+def test_prefix_query_syntax():
+    rules = parse_rules_from_string('ROOT = buy {prefix:потреб}')
+    assert rules[0].queries == (TextQuery('buy'), PrefixQuery('потреб'))
+    assert str(rules[0]) == 'ROOT = buy {prefix:потреб}'
+
+    table = build_text_parsing_table(rules)
+    assert len(parse(['buy', 'потребитель'], table)) == 1
+
+
+def test_literal_asterisks_match_exactly():
+    rules = parse_rules_from_string('ROOT = a ** 5*')
+    assert rules[0].queries == (TextQuery('a'), TextQuery('**'), TextQuery('5*'))
+
+    table = build_text_parsing_table(rules)
+    assert len(parse(['a', '**', '5*'], table)) == 1
+    assert len(parse(['a', '***', '5*'], table)) == 0
+    assert len(parse(['a', '**', '55'], table)) == 0
+
+
+def test_combined_regex_keeps_octal_escapes():
+    queries = [
+        RegexQuery(r'(a)\1'),
+        RegexQuery(r'x\0'),
+        RegexQuery(r'b\101'),
+        RegexQuery(r'(c)(d)\2')
+    ]
+    table = build_parsing_table(
+        [Rule('ROOT', (query, )) for query in queries],
+        [RegexResolver()]
+    )
+    for token in ['aa', 'x\0', 'bA', 'cdd']:
+        assert len(parse([token], table)) == 1, token
+    for token in ['a1', 'x0', 'b101', 'cd2']:
+        assert len(parse([token], table)) == 0, token
+
+
+@pytest.mark.parametrize('pattern', [
+    TOKEN_PATTERN,
+    re.compile(r'\d+\.\d+'),
+    re.compile(r'\d+\.\d+|\w+'),
+])
+def test_file_tokens_across_chunks(pattern):
+    text = 'pi is 3.14,   e is 2.71828 and so on ' * 3
+    expected = [(str(t), t.start, t.end) for t in iter_tokens(text, pattern)]
+    for chunk_size in range(8, 24):
+        tokens = iter_file_tokens(io.StringIO(text), pattern, chunk_size=chunk_size)
+        assert [(str(t), t.start, t.end) for t in tokens] == expected, chunk_size
+
+
+def test_file_tokens_split_number():
+    # Chunk ends after `3.`, which is not a match by itself
+    text = 'pi is 3.14 and so on'
+    tokens = iter_file_tokens(io.StringIO(text), re.compile(r'\d+\.\d+'), chunk_size=8)
+    assert [(str(t), t.start, t.end) for t in tokens] == [('3.14', 6, 10)]
+
+
+
+def test_file_tokens_shorter_token_in_window():
+    # `11` and `.` are tokens by themselves but are only a beginning of `11.25`
+    pattern = re.compile(r'\d+\.\d+|\w+|[.,]')
+    text = 'a' * 60 + ' 11.25 rest'
+    expected = [(str(t), t.start, t.end) for t in iter_tokens(text, pattern)]
+    assert [t[0] for t in expected] == ['a' * 60, '11.25', 'rest']
+    for chunk_size in range(8, 80):
+        tokens = iter_file_tokens(io.StringIO(text), pattern, chunk_size=chunk_size)
+        assert [(str(t), t.start, t.end) for t in tokens] == expected, chunk_size
+
+def test_prefix_resolver_registers_prefix_once():
+    rules = parse_rules_from_string('''
+        ROOT = <A> <B> <C>
+        A = {prefix:потреб} | x {prefix:потреб}
+        B = {prefix:товар} | <A> {prefix:товар}
+        C = {prefix:потребит} | y <B> {prefix:потребит}
+    ''')
+    table = build_text_parsing_table(rules)
+    resolver = next(r for r in table.resolvers if isinstance(r, PrefixResolver))
+    assert len(resolver.prefixes) == 3
+    assert sum(len(entries) for entries in resolver.entries) == 3
+    assert len(parse('потребитель товары потребители'.split(), table)) == 1
+
+
+def test_prefix_queries_sharing_normalized_prefix():
+    rules = [
+        Rule('ROOT', (TextQuery('a'), PrefixQuery('Потреб'))),
+        Rule('ROOT', (TextQuery('b'), PrefixQuery('потреб'))),
+    ]
+    normalizer = TokenNormalizer()
+    normalizer.add_stage('casefold', str.casefold)
+    table = build_parsing_table(rules, [ExactTextResolver(), PrefixResolver(form='casefold')],
+                                normalizer=normalizer)
+    resolver = table.resolvers[1]
+    assert resolver.prefixes == ['потреб']
+    assert len(parse(['a', 'потребитель'], table)) == 1
+    assert len(parse(['b', 'потребитель'], table)) == 1
+
+
+def test_token_offsets_with_resolver_meta():
+    table = build_text_parsing_table(parse_rules_from_string('ROOT = take {int} apples'))
+    table.enable_cache()
+    for text in ['take 12 apples', '  take  12 apples']:
+        tree = parse(list(iter_tokens(text)), table)[0]
+        number = tree.args[1]
+        assert number.meta == 12
+        assert text[slice(*number.span)] == '12'
+        assert text[slice(*tree.span)] == text.strip()
+    assert table.cache.stats.hits == 1
@@ -0,0 +1,54 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from tokema import *
+
+
+GRAMMAR = '''
+ROOT = <S> .
+S = <NP> <VP> | <S> <PP>
+NP = n | <NP> <PP> | d n | {int} n
+VP = v <NP> | <VP> <PP>
+PP = p <NP>
+'''
+
+
+def as_strings(results):
+    return [[str(p) for p in r] for r in results]
+
+
+def test_frozen_table_shared_by_threads():
+    table = build_text_parsing_table(parse_rules_from_string(GRAMMAR))
+    table.freeze()
+    table.enable_cache()
+
+    rnd = random.Random(0)
+    vocabulary = 'd n v p . 2 x'.split()
+    # Repeated inputs are served by the cache shared by the threads
+    inputs = [[rnd.choice(vocabulary) for _ in range(rnd.randint(1, 12))] for _ in range(100)] * 2
+
+    expected = parse_many(inputs, table)
+    assert any(expected)
+    for _ in range(3):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = parse_many(inputs, table, executor=executor)
+        assert as_strings(results) == as_strings(expected)
+
+
+def test_vocabulary_and_prefilter_shared_by_threads():
+    table = build_text_parsing_table(parse_rules_from_string(GRAMMAR))
+    table.freeze()
+    vocabulary = Vocabulary(table)
+    prefilter = Prefilter(table)
+
+    rnd = random.Random(1)
+    inputs = [[rnd.choice('d n v p . x'.split()) for _ in range(rnd.randint(1, 12))] for _ in range(100)]
+    encoded = [vocabulary.encode(tokens) for tokens in inputs]
+    expected = [(prefilter.accepts_encoded(ids, vocabulary), as_strings([parse_encoded(ids, vocabulary)]))
+                for ids in encoded]
+
+    def check(ids):
+        return prefilter.accepts_encoded(ids, vocabulary), as_strings([parse_encoded(ids, vocabulary)])
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert list(executor.map(check, encoded)) == expected
@@ -0,0 +1,57 @@
+import pytest
+
+from tokema import *
+
+
+GRAMMAR = '''
+ROOT = <S> .
+S = <NP> <VP>
+NP = n | d n | {int} n
+VP = v <NP>
+'''
+
+
+@pytest.fixture
+def table():
+    return build_text_parsing_table(parse_rules_from_string(GRAMMAR))
+
+
+def test_encode_assigns_ids_once(table):
+    vocabulary = Vocabulary(table)
+    ids = vocabulary.encode('d n x v 2 n . x'.split())
+    assert ids.typecode == 'i'
+    assert ids[2] == ids[7] == NOISE_ID
+    assert ids[1] == ids[5] != NOISE_ID
+    assert len(set(ids)) == 6
+    assert len(vocabulary) == 6
+    assert 'n' in vocabulary and 'x' not in vocabulary
+    assert vocabulary.decode(ids) == ['d', 'n', None, 'v', '2', 'n', '.', None]
+    assert vocabulary.metas[ids[4]] == 2
+
+
+def test_parse_encoded_as_parse(table):
+    vocabulary = Vocabulary(table)
+    for text in ['d n v n .', 'x d n x v 3 n . x', 'n v', '']:
+        tokens = text.split()
+        expected = parse(tokens, table)
+        parses = parse_encoded(vocabulary.encode(tokens), vocabulary)
+        assert [str(p) for p in parses] == [str(p) for p in expected]
+        assert [p.span for p in parses] == [p.span for p in expected]
+
+
+def test_encode_batch(table):
+    vocabulary = Vocabulary(table)
+    corpus = [['d', 'n'], [], ['v', 'x', 'n', '.']]
+    encoded = vocabulary.encode_batch(corpus)
+    assert len(encoded) == 3
+    assert list(encoded.offsets) == [0, 2, 2, 6]
+    assert [list(ids) for ids in encoded] == [list(vocabulary.encode(tokens)) for tokens in corpus]
+    assert list(encoded[2]) == list(vocabulary.encode(corpus[2]))
+
+
+def test_numpy_ids(table):
+    numpy = pytest.importorskip('numpy')
+    vocabulary = Vocabulary(table, use_numpy=True)
+    ids = vocabulary.encode('d n v n .'.split())
+    assert isinstance(ids, numpy.ndarray)
+    assert len(parse_encoded(ids, vocabulary)) == 1